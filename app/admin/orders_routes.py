@@ -6,6 +6,7 @@ from app.auth.token import verify_token
 from app.services.dbServices import connect_to_database
 from app.utils.date_convert import format_datetime
 from app.utils.is_admin import is_admin
+from app.utils.serialization import FastJSONResponse
 from app.orders.schemas import OrderResponse
 
 router = APIRouter()
@@ -56,7 +57,7 @@ async def get_all_orders(token: str = Depends(oauth2_scheme)):
         cursor.close()
         conn.close()
 
-        return order_list
+        return FastJSONResponse(order_list)
     except Exception as e:
         print(f"Exception: {e}")
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Error fetching orders")
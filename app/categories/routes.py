@@ -1,31 +1,52 @@
-from fastapi import APIRouter, HTTPException, status, Depends
-from typing import List
+from fastapi import APIRouter, HTTPException, status, Depends, Query, Response
+from typing import List, Optional, Union
 from fastapi.security import OAuth2PasswordBearer
 
 from app.categories.schemas import CategoryCreate, CategoryUpdate, CategoryResponse
-from app.products.schemas import ProductResponse
+from app.products.schemas import ProductResponse, ProductSummaryResponse
+from app.reviews.services import RATING_JOIN
+from app.products.suggest import suggest_index
+from app.products.services import PRODUCT_INCLUDES, PRODUCT_VIEWS, parse_include, attach_variants
+from app.products_varient.services import fetch_variant_types_by_category_ids
 from app.services.dbServices import connect_to_database
-from app.utils.date_convert import format_datetime
+from app.services.httpCacheServices import http_cache, bump_versions
 from app.utils.is_admin import is_admin
+from app.utils.serialization import FastJSONResponse
 from app.auth.token import verify_token
 
 router = APIRouter()
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/admin/auth/login")
 
+CATEGORY_INCLUDES = {"variant_types"}
 
-@router.get("/categories", response_model=List[CategoryResponse])
-async def get_all_categories():
+
+@router.get("/categories", response_model=List[CategoryResponse], dependencies=[Depends(http_cache("categories", max_age=300))])
+async def get_all_categories(
+    include: Optional[str] = Query(None, description="Comma-separated related data to embed: variant_types")
+):
     try:
+        try:
+            includes = parse_include(include, CATEGORY_INCLUDES)
+        except ValueError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
         conn = await connect_to_database()
         cursor = conn.cursor()
 
         cursor.execute("SELECT * FROM Categories")
-        categories = cursor.fetchall()
+        categories = [{"id": category[0], "name": category[1]} for category in cursor.fetchall()]
+
+        if "variant_types" in includes:
+            variant_types = fetch_variant_types_by_category_ids(cursor, [category["id"] for category in categories])
+            for category in categories:
+                category["variant_types"] = variant_types[category["id"]]
 
         cursor.close()
         conn.close()
 
-        return [{"id": category[0], "name": category[1]} for category in categories]
+        return categories
+    except HTTPException:
+        raise
     except Exception as e:
         print("Exception:", e)
         raise HTTPException(
@@ -34,31 +55,44 @@ async def get_all_categories():
         )
 
 
-@router.get("/categories/{categoryId}/products", response_model=List[ProductResponse])
-async def get_products_by_category(categoryId: int):
+@router.get(
+    "/categories/{categoryId}/products",
+    response_model=List[Union[ProductResponse, ProductSummaryResponse]],
+    dependencies=[Depends(http_cache("products", "variants"))],
+)
+async def get_products_by_category(
+    categoryId: int,
+    response: Response,
+    include: Optional[str] = Query(None, description="Comma-separated related data to embed: variants"),
+    view: str = Query("full", description="full, or summary to leave out descriptions"),
+):
     try:
+        try:
+            includes = parse_include(include, PRODUCT_INCLUDES)
+        except ValueError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+        if view not in PRODUCT_VIEWS:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="view must be full or summary")
+        projection, to_response = PRODUCT_VIEWS[view]
+
         conn = await connect_to_database()
         cursor = conn.cursor()
 
-        cursor.execute("SELECT * FROM Products WHERE categoryId=?", (categoryId,))
-        products = cursor.fetchall()
+        cursor.execute(
+            f"SELECT {projection.columns} FROM Products p {RATING_JOIN} WHERE p.categoryId=?", (categoryId,)
+        )
+        products = [to_response(product) for product in projection.all(cursor)]
+
+        if "variants" in includes:
+            products = attach_variants(cursor, products)
 
         cursor.close()
         conn.close()
 
-        return [
-            {
-                "id": product[0],
-                "name": product[1],
-                "description": product[2],
-                "price": product[3],
-                "category_id": product[4],
-                "image_url": product[5],
-                "created_at": format_datetime(product[6]),
-                "updated_at": format_datetime(product[7]),
-            }
-            for product in products
-        ]
+        return FastJSONResponse(products, headers=response.headers)
+    except HTTPException:
+        raise
     except Exception as e:
         print("Exception:", e)
         raise HTTPException(
@@ -90,6 +124,7 @@ async def create_category(
         """,
             (category.name,),
         )
+        bump_versions(cursor, "categories")
         conn.commit()
 
         cursor.execute("SELECT * FROM Categories WHERE categoryId=@@IDENTITY")
@@ -103,6 +138,8 @@ async def create_category(
                 status_code=status.HTTP_404_NOT_FOUND, detail="Category creation failed"
             )
 
+        suggest_index.upsert("category", new_category[0], new_category[1])
+
         return {"id": new_category[0], "name": new_category[1]}
     except Exception as e:
         print("Exception:", e)
@@ -132,6 +169,7 @@ async def update_category(categoryId: int, category: CategoryUpdate, token: str
             """,
             (category.name, categoryId),
         )
+        bump_versions(cursor, "categories")
         conn.commit()
 
         cursor.execute("SELECT * FROM Categories WHERE categoryId=?", (categoryId,))
@@ -145,6 +183,8 @@ async def update_category(categoryId: int, category: CategoryUpdate, token: str
                 status_code=status.HTTP_404_NOT_FOUND, detail="Category not found"
             )
 
+        suggest_index.upsert("category", updated_category[0], updated_category[1])
+
         return {"id": updated_category[0], "name": updated_category[1]}
     except Exception as e:
         print("Exception:", e)
@@ -167,7 +207,9 @@ async def delete_category(categoryId: int, token: str = Depends(oauth2_scheme)):
         cursor = conn.cursor()
 
         cursor.execute("DELETE FROM Categories WHERE categoryId=?", (categoryId,))
+        bump_versions(cursor, "categories")
         conn.commit()
+        suggest_index.remove("category", categoryId)
 
         if cursor.rowcount == 0:
             raise HTTPException(
@@ -1,4 +1,7 @@
 from pydantic import BaseModel
+from typing import List, Optional
+
+from app.products_varient.schemas import VariantResponse
 
 class CategoryResponse(BaseModel):
     id: int
@@ -15,4 +18,5 @@ class CategoryUpdate(BaseModel):
 
 class CategoryResponse(BaseModel):
     id: int
-    name: str
\ No newline at end of file
+    name: str
+    variant_types: Optional[List[VariantResponse]] = None
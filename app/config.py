@@ -1,24 +1,17 @@
+import os
+from importlib import import_module
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
-from app.services.dbServices import connect_to_database
-from app.database.init_db import initialize_roles
-from app.auth.routes import router as auth_router
-from app.auth.admin_routes import router as admin_auth_router
-from app.user.routes import router as user_router
-from app.admin.routes import router as admin_router
-from app.products.routes import router as product_router
-from app.categories.routes import router as categories_router
-from app.cart.routes import router as cart_router
-from app.orders.routes import router as orders_router
-from app.admin.orders_routes import router as admin_order_router
-from app.payments.routes import router as payments_router
-from app.reviews.routes import router as reviews_router
-from app.inventory.routes import router as inventory_routes
-from app.notifications.routes import router as notifications_routes
-from app.reports.routes import router as reports_routes
-from app.supports.routes import router as supports_routes
-from app.products_varient.routes import router as products_varient_routes
+from app.services.dbServices import pool
+from app.services.metricsServices import start_export as start_metrics_export, stop_export as stop_metrics_export
+from app.services.startupServices import startup as run_startup, timed
+from app.utils.compression import CompressionMiddleware
+from app.utils.is_admin import is_admin_token
+from app.utils.metrics import MetricsMiddleware
+from app.utils.profiler import ProfilerMiddleware
+from app.utils.query_stats import QueryStatsMiddleware
 
 app = FastAPI(
     title="VendoAPI"
@@ -35,27 +28,59 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Review pages return their cursor in a header the browser hides otherwise
+    expose_headers=["X-Next-Cursor"],
 )
 
+# Added innermost first: query stats wrap metrics so the request's query
+# record is still current when the metrics middleware reads it, and the
+# profiler wraps everything a profiled request runs.
+app.add_middleware(CompressionMiddleware)
+app.add_middleware(MetricsMiddleware)
+app.add_middleware(QueryStatsMiddleware)
+app.add_middleware(ProfilerMiddleware, is_admin_token=is_admin_token)
+
 @app.on_event("startup")
 async def startup():
-    await connect_to_database()
-    await initialize_roles()
+    await run_startup()
+    start_metrics_export()
     print("DB Connect Successfully")
 
-app.include_router(auth_router, prefix="/api/auth", tags=["User Auth"])
-app.include_router(user_router, prefix="/api/user", tags=["User Management"])
-app.include_router(admin_auth_router, prefix="/api/admin/auth", tags=["Admin Auth"])
-app.include_router(admin_router, prefix="/api/admin", tags=["Admin Management"])
-app.include_router(categories_router, prefix="/api", tags=["Categories"])
-app.include_router(product_router, prefix="/api", tags=["Products"])
-app.include_router(products_varient_routes, prefix="/api", tags=["Products Varients"])
-app.include_router(cart_router, prefix="/api", tags=["Carts"])
-app.include_router(orders_router, prefix="/api", tags=["Orders"])
-app.include_router(admin_order_router, prefix="/api", tags=["Admin Order Management"])
-app.include_router(payments_router, prefix="/api", tags=["Payments"])
-app.include_router(reviews_router, prefix="/api", tags=["Reviews"])
-app.include_router(inventory_routes, prefix="/api", tags=["Inventory"])
-app.include_router(notifications_routes, prefix="/api", tags=["Notifications"])
-app.include_router(reports_routes, prefix="/api", tags=["Reports"])
-app.include_router(supports_routes, prefix="/api", tags=["Customer Supports"])
\ No newline at end of file
+@app.on_event("shutdown")
+async def shutdown():
+    await stop_metrics_export()
+    pool.clear()
+
+# (module, prefix, tags) in registration order; route modules are imported
+# here rather than at the top so each import shows up in the startup profile.
+# ENABLED_ROUTERS (comma-separated module names) lets a dedicated worker pool
+# load only the routers it serves; the others are never imported.
+ROUTERS = [
+    ("app.auth.routes", "/api/auth", ["User Auth"]),
+    ("app.user.routes", "/api/user", ["User Management"]),
+    ("app.auth.admin_routes", "/api/admin/auth", ["Admin Auth"]),
+    ("app.admin.routes", "/api/admin", ["Admin Management"]),
+    ("app.categories.routes", "/api", ["Categories"]),
+    ("app.products.routes", "/api", ["Products"]),
+    ("app.products_varient.routes", "/api", ["Products Varients"]),
+    ("app.cart.routes", "/api", ["Carts"]),
+    ("app.orders.routes", "/api", ["Orders"]),
+    ("app.admin.orders_routes", "/api", ["Admin Order Management"]),
+    ("app.payments.routes", "/api", ["Payments"]),
+    ("app.reviews.routes", "/api", ["Reviews"]),
+    ("app.inventory.routes", "/api", ["Inventory"]),
+    ("app.notifications.routes", "/api", ["Notifications"]),
+    ("app.reports.routes", "/api", ["Reports"]),
+    ("app.supports.routes", "/api", ["Customer Supports"]),
+    ("app.monitoring.routes", "/api", ["Monitoring"]),
+    ("app.monitoring.metrics_routes", "", ["Monitoring"]),
+]
+
+ENABLED_ROUTERS = {name.strip() for name in os.getenv("ENABLED_ROUTERS", "").split(",") if name.strip()}
+
+for module_name, prefix, tags in ROUTERS:
+    if ENABLED_ROUTERS and module_name not in ENABLED_ROUTERS:
+        continue
+    with timed(f"import {module_name}"):
+        module = import_module(module_name)
+    app.include_router(module.router, prefix=prefix, tags=tags)
@@ -0,0 +1,46 @@
+import os
+
+
+class SqlServerBackend:
+    name = "mssql"
+
+    def __init__(self, server, database, driver="SQL SERVER"):
+        self.key = f"{server}/{database}"
+        self.connection_string = f"""
+    DRIVER={{{driver}}};
+    SERVER={server};
+    DATABASE={database};
+"""
+
+    def connect(self):
+        # Imported on first use so the SQLite backend runs without an ODBC driver
+        import pypyodbc as odbc
+
+        return odbc.connect(self.connection_string)
+
+
+class SqliteBackend:
+    # Local and CI stand-in: the application's T-SQL goes through the dialect
+    # shim in app.database.sqlite_dialect.
+    name = "sqlite"
+
+    def __init__(self, path):
+        self.path = path
+        self.key = os.path.abspath(path) if path != ":memory:" else path
+
+    def connect(self):
+        from app.database.sqlite_dialect import SqliteConnection
+
+        return SqliteConnection(self.path)
+
+
+BACKENDS = {
+    "mssql": SqlServerBackend,
+    "sqlite": SqliteBackend,
+}
+
+
+def create_backend(name, **settings):
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown DATABASE_BACKEND {name!r}; expected one of {', '.join(BACKENDS)}")
+    return BACKENDS[name](**settings)
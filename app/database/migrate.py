@@ -0,0 +1,223 @@
+import argparse
+import asyncio
+import hashlib
+import os
+import sys
+import tempfile
+
+from app.database.migrations import MIGRATIONS, Table
+from app.services.dbServices import backend, connect_to_database
+
+MIGRATION_LOCK = "SchemaMigrations"
+MIGRATION_LOCK_TIMEOUT_MS = 60000
+LATEST_VERSION = max(migration.version for migration in MIGRATIONS)
+
+# What startup does about the schema: "migrate" applies pending migrations,
+# "verify" refuses to start on an old schema, "off" trusts the deploy.
+SCHEMA_BOOTSTRAP = os.getenv("SCHEMA_BOOTSTRAP", "migrate").lower()
+
+# Written once the database is known to be at LATEST_VERSION, so later worker
+# starts on the same host skip the schema check entirely.
+_database_key = hashlib.sha1(f"{backend.name}:{backend.key}".encode("utf-8")).hexdigest()[:12]
+SCHEMA_MARKER_PATH = os.getenv("SCHEMA_MARKER_PATH") or os.path.join(
+    tempfile.gettempdir(), f"vendo-schema-{_database_key}.version"
+)
+
+
+SCHEMA_MIGRATIONS = Table("SchemaMigrations", """
+        version INT PRIMARY KEY,
+        name NVARCHAR(200) NOT NULL,
+        appliedAt DATETIME NOT NULL DEFAULT GETUTCDATE()
+""")
+
+
+def ensure_migration_table(cursor):
+    for statement in SCHEMA_MIGRATIONS.render(backend.name):
+        cursor.execute(statement)
+
+
+def applied_versions(cursor):
+    cursor.execute("SELECT version FROM SchemaMigrations")
+    return {row[0] for row in cursor.fetchall()}
+
+
+def current_version(cursor):
+    if backend.name == "sqlite":
+        cursor.execute("SELECT COUNT(*) FROM sqlite_master WHERE type = 'table' AND name = 'SchemaMigrations'")
+        if not cursor.fetchone()[0]:
+            return 0
+        cursor.execute("SELECT IFNULL(MAX(version), 0) FROM SchemaMigrations")
+        return cursor.fetchone()[0]
+    cursor.execute("""
+    IF OBJECT_ID('SchemaMigrations', 'U') IS NULL SELECT 0
+    ELSE SELECT ISNULL(MAX(version), 0) FROM SchemaMigrations
+    """)
+    return cursor.fetchone()[0]
+
+
+def read_marker():
+    try:
+        with open(SCHEMA_MARKER_PATH) as marker:
+            return int(marker.read().strip() or 0)
+    except (OSError, ValueError):
+        return 0
+
+
+def write_marker(version):
+    # Written to a temp file and renamed so concurrent workers never read half a marker
+    try:
+        partial = f"{SCHEMA_MARKER_PATH}.{os.getpid()}"
+        with open(partial, "w") as marker:
+            marker.write(str(version))
+        os.replace(partial, SCHEMA_MARKER_PATH)
+    except OSError as e:
+        print(e)
+
+
+def _acquire_lock(cursor):
+    # Several workers start at once; only one of them applies migrations and
+    # the others wait, then find nothing left to do. SQLite serializes writers
+    # on the database file already.
+    if backend.name == "sqlite":
+        return
+    cursor.execute("""
+    SET NOCOUNT ON;
+    DECLARE @result INT;
+    EXEC @result = sp_getapplock @Resource = ?, @LockMode = 'Exclusive', @LockOwner = 'Session', @LockTimeout = ?;
+    SELECT @result;
+    """, [MIGRATION_LOCK, MIGRATION_LOCK_TIMEOUT_MS])
+    result = cursor.fetchone()[0]
+    if result < 0:
+        raise RuntimeError(f"Could not acquire the migration lock (sp_getapplock returned {result})")
+
+
+def _release_lock(cursor):
+    if backend.name == "sqlite":
+        return
+    cursor.execute("EXEC sp_releaseapplock @Resource = ?, @LockOwner = 'Session'", [MIGRATION_LOCK])
+
+
+def migrate(conn, target=None):
+    # Applies pending migrations in version order, each in its own transaction
+    # together with its SchemaMigrations row. Returns the versions applied.
+    cursor = conn.cursor()
+    applied = []
+    try:
+        ensure_migration_table(cursor)
+        conn.commit()
+        _acquire_lock(cursor)
+        try:
+            done = applied_versions(cursor)
+            for migration in sorted(MIGRATIONS, key=lambda m: m.version):
+                if target is not None and migration.version > target:
+                    break
+                if migration.version in done:
+                    continue
+                try:
+                    for step in migration.statements:
+                        for statement in step.render(backend.name):
+                            cursor.execute(statement)
+                    cursor.execute(
+                        "INSERT INTO SchemaMigrations (version, name, appliedAt) VALUES (?, ?, GETUTCDATE())",
+                        [migration.version, migration.name]
+                    )
+                    conn.commit()
+                except Exception:
+                    conn.rollback()
+                    print(f"Migration {migration.version} ({migration.name}) failed")
+                    raise
+                applied.append(migration.version)
+                print(f"Applied migration {migration.version} ({migration.name})")
+        finally:
+            _release_lock(cursor)
+            conn.commit()
+    finally:
+        cursor.close()
+    return applied
+
+
+def status(conn):
+    cursor = conn.cursor()
+    try:
+        ensure_migration_table(cursor)
+        conn.commit()
+        cursor.execute("SELECT version, appliedAt FROM SchemaMigrations")
+        applied = {row[0]: row[1] for row in cursor.fetchall()}
+    finally:
+        cursor.close()
+    return [
+        (migration.version, migration.name, applied.get(migration.version))
+        for migration in sorted(MIGRATIONS, key=lambda m: m.version)
+    ]
+
+
+async def run_migrations():
+    conn = await connect_to_database()
+    if conn is None:
+        raise RuntimeError("Database connection failed; migrations were not applied")
+    try:
+        return migrate(conn)
+    finally:
+        conn.close()
+
+
+async def ensure_schema(mode=SCHEMA_BOOTSTRAP):
+    # Returns what was done: "off", "marker", "current" or "migrated"
+    if mode == "off":
+        return "off"
+    if read_marker() >= LATEST_VERSION:
+        return "marker"
+
+    conn = await connect_to_database()
+    if conn is None:
+        raise RuntimeError("Database connection failed; schema version unknown")
+    try:
+        cursor = conn.cursor()
+        version = current_version(cursor)
+        cursor.close()
+        conn.commit()
+        if version < LATEST_VERSION:
+            if mode == "verify":
+                raise RuntimeError(
+                    f"Schema is at version {version}, expected {LATEST_VERSION}; run python -m app.database.migrate"
+                )
+            migrate(conn)
+            result = "migrated"
+        else:
+            result = "current"
+    finally:
+        conn.close()
+
+    write_marker(LATEST_VERSION)
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m app.database.migrate", description="Apply or inspect schema migrations")
+    commands = parser.add_subparsers(dest="command")
+    upgrade = commands.add_parser("upgrade", help="apply pending migrations (default)")
+    upgrade.add_argument("--target", type=int, default=None, help="stop after this version")
+    commands.add_parser("status", help="list migrations and when they were applied")
+    args = parser.parse_args(argv)
+
+    conn = asyncio.run(connect_to_database())
+    if conn is None:
+        return 1
+    try:
+        if args.command == "status":
+            for version, name, applied_at in status(conn):
+                print(f"{version:>4}  {'applied ' + str(applied_at) if applied_at else 'pending':<30}  {name}")
+        else:
+            target = getattr(args, "target", None)
+            applied = migrate(conn, target=target)
+            if not applied:
+                print("Schema is up to date")
+            if target is None or target >= LATEST_VERSION:
+                write_marker(LATEST_VERSION)
+    finally:
+        conn.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,358 @@
+from collections import namedtuple
+
+from app.database.sqlite_dialect import sqlite_columns
+
+# Each migration is a list of statements applied in one transaction together
+# with its SchemaMigrations row. Statements are guarded so that databases set
+# up before versioning existed adopt a version without errors, and render
+# themselves for the configured backend ("mssql" or "sqlite").
+Migration = namedtuple("Migration", ["version", "name", "statements"])
+
+
+class Sql:
+    # Literal SQL; sqlite=None reuses the SQL Server text, () skips the step
+    def __init__(self, mssql, sqlite=None):
+        self.mssql = mssql
+        self.sqlite = (mssql,) if sqlite is None else sqlite if isinstance(sqlite, tuple) else (sqlite,)
+
+    def render(self, dialect):
+        return list(self.sqlite) if dialect == "sqlite" else [self.mssql]
+
+
+class Table:
+    def __init__(self, name, columns):
+        self.name = name
+        self.columns = columns
+
+    def render(self, dialect):
+        if dialect == "sqlite":
+            return [f"CREATE TABLE IF NOT EXISTS {self.name} ({sqlite_columns(self.columns)})"]
+        return [f"""
+    IF OBJECT_ID('{self.name}', 'U') IS NULL
+    CREATE TABLE {self.name} (
+        {self.columns}
+    )
+    """]
+
+
+class Index:
+    def __init__(self, name, table, columns, unique=False, include=None):
+        self.name = name
+        self.table = table
+        self.columns = columns
+        self.unique = unique
+        self.include = include
+
+    def render(self, dialect):
+        unique = "UNIQUE " if self.unique else ""
+        if dialect == "sqlite":
+            # No covering INCLUDE columns in SQLite
+            return [f"CREATE {unique}INDEX IF NOT EXISTS {self.name} ON {self.table} ({self.columns})"]
+        include = f" INCLUDE ({self.include})" if self.include else ""
+        return [f"""
+    IF NOT EXISTS (SELECT * FROM sys.indexes WHERE name='{self.name}' AND object_id=OBJECT_ID('{self.table}'))
+    CREATE {unique}INDEX {self.name} ON {self.table} ({self.columns}){include}
+    """]
+
+
+# Column order matters: several routes still decode SELECT * rows by position.
+BASELINE_TABLES = [
+    Table("roles", """
+        id INT PRIMARY KEY IDENTITY(1,1),
+        name VARCHAR(50) NOT NULL
+    """),
+    Sql("INSERT INTO roles (name) SELECT 'admin' WHERE NOT EXISTS (SELECT * FROM roles WHERE name='admin')"),
+    Sql("INSERT INTO roles (name) SELECT 'user' WHERE NOT EXISTS (SELECT * FROM roles WHERE name='user')"),
+    Table("Users", """
+        userId INT PRIMARY KEY IDENTITY(1,1),
+        username NVARCHAR(255) NOT NULL,
+        email NVARCHAR(255) NOT NULL,
+        passwordHash NVARCHAR(255) NOT NULL,
+        fullName NVARCHAR(255) NULL,
+        phone NVARCHAR(50) NULL,
+        address NVARCHAR(500) NULL,
+        createdAt DATETIME NOT NULL DEFAULT GETDATE(),
+        updatedAt DATETIME NOT NULL DEFAULT GETDATE()
+    """),
+    Table("Admins", """
+        adminId INT PRIMARY KEY IDENTITY(1,1),
+        username NVARCHAR(255) NOT NULL,
+        email NVARCHAR(255) NOT NULL,
+        passwordHash NVARCHAR(255) NOT NULL,
+        fullName NVARCHAR(255) NULL,
+        createdAt DATETIME NOT NULL DEFAULT GETDATE(),
+        updatedAt DATETIME NOT NULL DEFAULT GETDATE()
+    """),
+    Table("UserVisits", """
+        visitId BIGINT PRIMARY KEY IDENTITY(1,1),
+        userId INT NULL,
+        createdAt DATETIME NOT NULL DEFAULT GETDATE()
+    """),
+    Table("Categories", """
+        categoryId INT PRIMARY KEY IDENTITY(1,1),
+        name NVARCHAR(255) NOT NULL
+    """),
+    Table("Products", """
+        productId INT PRIMARY KEY IDENTITY(1,1),
+        name NVARCHAR(255) NOT NULL,
+        description NVARCHAR(MAX) NULL,
+        price DECIMAL(18, 2) NOT NULL,
+        categoryId INT NOT NULL,
+        imageUrl NVARCHAR(1000) NULL,
+        createdAt DATETIME NOT NULL DEFAULT GETDATE(),
+        updatedAt DATETIME NOT NULL DEFAULT GETDATE()
+    """),
+    Table("VariantTypes", """
+        variantTypeId INT PRIMARY KEY IDENTITY(1,1),
+        categoryId INT NOT NULL,
+        variantType NVARCHAR(100) NOT NULL
+    """),
+    Table("ProductVariants", """
+        variantId INT PRIMARY KEY IDENTITY(1,1),
+        productId INT NOT NULL,
+        variantType NVARCHAR(100) NOT NULL,
+        variantValue NVARCHAR(100) NOT NULL,
+        stock INT NOT NULL DEFAULT 0,
+        price DECIMAL(18, 2) NOT NULL
+    """),
+    Table("Inventory", """
+        inventoryId INT PRIMARY KEY IDENTITY(1,1),
+        productId INT NOT NULL,
+        quantity INT NOT NULL DEFAULT 0,
+        createdAt DATETIME NOT NULL DEFAULT GETDATE(),
+        updatedAt DATETIME NOT NULL DEFAULT GETDATE()
+    """),
+    Table("Carts", """
+        cartId INT PRIMARY KEY IDENTITY(1,1),
+        userId INT NOT NULL,
+        createdAt DATETIME NOT NULL DEFAULT GETDATE(),
+        updatedAt DATETIME NOT NULL DEFAULT GETDATE()
+    """),
+    Table("CartItems", """
+        cartItemId INT PRIMARY KEY IDENTITY(1,1),
+        cartId INT NOT NULL,
+        productId INT NOT NULL,
+        quantity INT NOT NULL,
+        createdAt DATETIME NOT NULL DEFAULT GETDATE(),
+        updatedAt DATETIME NOT NULL DEFAULT GETDATE()
+    """),
+    Table("Orders", """
+        orderId INT PRIMARY KEY IDENTITY(1,1),
+        userId INT NOT NULL,
+        totalAmount DECIMAL(18, 2) NOT NULL,
+        status VARCHAR(20) NOT NULL,
+        createdAt DATETIME NOT NULL DEFAULT GETDATE(),
+        updatedAt DATETIME NOT NULL DEFAULT GETDATE()
+    """),
+    Table("OrderItems", """
+        orderItemId INT PRIMARY KEY IDENTITY(1,1),
+        orderId INT NOT NULL,
+        productId INT NOT NULL,
+        quantity INT NOT NULL,
+        price DECIMAL(18, 2) NOT NULL,
+        createdAt DATETIME NOT NULL DEFAULT GETDATE(),
+        updatedAt DATETIME NOT NULL DEFAULT GETDATE()
+    """),
+    Table("Payments", """
+        paymentId INT PRIMARY KEY IDENTITY(1,1),
+        orderId INT NOT NULL,
+        amount DECIMAL(18, 2) NOT NULL,
+        paymentMethod VARCHAR(50) NOT NULL,
+        paymentStatus VARCHAR(20) NOT NULL,
+        createdAt DATETIME NOT NULL DEFAULT GETDATE(),
+        updatedAt DATETIME NOT NULL DEFAULT GETDATE()
+    """),
+    Table("Reviews", """
+        reviewId INT PRIMARY KEY IDENTITY(1,1),
+        productId INT NOT NULL,
+        userId INT NOT NULL,
+        rating INT NOT NULL,
+        comment NVARCHAR(MAX) NULL,
+        createdAt DATETIME NOT NULL DEFAULT GETDATE(),
+        updatedAt DATETIME NOT NULL DEFAULT GETDATE()
+    """),
+    Table("Notifications", """
+        notificationId INT PRIMARY KEY IDENTITY(1,1),
+        userId INT NOT NULL,
+        message NVARCHAR(MAX) NOT NULL,
+        isRead BIT NOT NULL DEFAULT 0,
+        createdAt DATETIME NOT NULL DEFAULT GETDATE(),
+        updatedAt DATETIME NOT NULL DEFAULT GETDATE()
+    """),
+    Table("SupportTickets", """
+        ticketId INT PRIMARY KEY IDENTITY(1,1),
+        userId INT NOT NULL,
+        subject NVARCHAR(255) NOT NULL,
+        message NVARCHAR(MAX) NOT NULL,
+        status VARCHAR(20) NOT NULL,
+        createdAt DATETIME NOT NULL DEFAULT GETDATE(),
+        updatedAt DATETIME NOT NULL DEFAULT GETDATE()
+    """),
+]
+
+INVENTORY_ALERTS = [
+    # Per-product reorder threshold
+    Sql(
+        """
+        IF COL_LENGTH('Inventory', 'reorderLevel') IS NULL
+        ALTER TABLE Inventory ADD reorderLevel INT NOT NULL DEFAULT 0
+        """,
+        sqlite="ALTER TABLE Inventory ADD COLUMN reorderLevel INT NOT NULL DEFAULT 0",
+    ),
+    # Materialized set of items at or below their threshold
+    Table("LowStockItems", """
+        productId INT PRIMARY KEY,
+        quantity INT NOT NULL,
+        reorderLevel INT NOT NULL,
+        flaggedAt DATETIME NOT NULL,
+        updatedAt DATETIME NOT NULL
+    """),
+]
+
+INVENTORY_LEDGER = [
+    # Append-only stock movement ledger
+    Table("InventoryMovements", """
+        movementId BIGINT PRIMARY KEY IDENTITY(1,1),
+        productId INT NOT NULL,
+        movementType VARCHAR(20) NOT NULL,
+        delta INT NOT NULL,
+        reference VARCHAR(255) NULL,
+        createdBy VARCHAR(255) NULL,
+        createdAt DATETIME NOT NULL
+    """),
+    Index("IX_InventoryMovements_productId_movementId", "InventoryMovements", "productId, movementId"),
+    # Periodic balances with the ledger position they include
+    Table("InventorySnapshots", """
+        snapshotId BIGINT PRIMARY KEY IDENTITY(1,1),
+        productId INT NOT NULL,
+        quantity INT NOT NULL,
+        lastMovementId BIGINT NOT NULL,
+        createdAt DATETIME NOT NULL
+    """),
+    Index("IX_InventorySnapshots_productId_snapshotId", "InventorySnapshots", "productId, snapshotId"),
+]
+
+NOTIFICATION_INDEXES = [
+    # Unread badge counts and mark-read updates
+    Index("IX_Notifications_userId_isRead", "Notifications", "userId, isRead"),
+    # Newest-first feed pages
+    Index("IX_Notifications_userId_notificationId", "Notifications", "userId, notificationId DESC"),
+]
+
+NOTIFICATION_BROADCASTS = [
+    # Fan-out jobs and their progress
+    Table("NotificationBroadcasts", """
+        broadcastId INT PRIMARY KEY IDENTITY(1,1),
+        message NVARCHAR(MAX) NOT NULL,
+        segment VARCHAR(50) NOT NULL,
+        targetId INT NULL,
+        status VARCHAR(20) NOT NULL,
+        totalTargets INT NULL,
+        processed INT NOT NULL DEFAULT 0,
+        lastUserId INT NOT NULL DEFAULT 0,
+        createdBy VARCHAR(255) NULL,
+        createdAt DATETIME NOT NULL,
+        updatedAt DATETIME NOT NULL
+    """),
+]
+
+BROADCAST_ATTEMPTS = [
+    # Ownership token of a broadcast run, bumped on resume
+    Sql(
+        """
+        IF COL_LENGTH('NotificationBroadcasts', 'attempt') IS NULL
+        ALTER TABLE NotificationBroadcasts ADD attempt INT NOT NULL DEFAULT 0
+        """,
+        sqlite="ALTER TABLE NotificationBroadcasts ADD COLUMN attempt INT NOT NULL DEFAULT 0",
+    ),
+]
+
+PRODUCT_RATINGS_COLUMNS = """
+    productId INT PRIMARY KEY,
+    reviewCount INT NOT NULL DEFAULT 0,
+    ratingSum INT NOT NULL DEFAULT 0,
+    rating1 INT NOT NULL DEFAULT 0,
+    rating2 INT NOT NULL DEFAULT 0,
+    rating3 INT NOT NULL DEFAULT 0,
+    rating4 INT NOT NULL DEFAULT 0,
+    rating5 INT NOT NULL DEFAULT 0,
+    updatedAt DATETIME NOT NULL
+"""
+
+PRODUCT_RATINGS_BACKFILL = """
+    INSERT INTO ProductRatings (productId, reviewCount, ratingSum, rating1, rating2, rating3, rating4, rating5, updatedAt)
+    SELECT productId, COUNT(*), SUM(rating),
+           SUM(CASE WHEN rating = 1 THEN 1 ELSE 0 END),
+           SUM(CASE WHEN rating = 2 THEN 1 ELSE 0 END),
+           SUM(CASE WHEN rating = 3 THEN 1 ELSE 0 END),
+           SUM(CASE WHEN rating = 4 THEN 1 ELSE 0 END),
+           SUM(CASE WHEN rating = 5 THEN 1 ELSE 0 END),
+           GETDATE()
+    FROM Reviews
+    GROUP BY productId
+"""
+
+PRODUCT_RATINGS = [
+    # Per-product review aggregates, backfilled once from Reviews
+    Sql(
+        f"""
+        IF OBJECT_ID('ProductRatings', 'U') IS NULL
+        BEGIN
+            CREATE TABLE ProductRatings ({PRODUCT_RATINGS_COLUMNS});
+            {PRODUCT_RATINGS_BACKFILL};
+        END
+        """,
+        sqlite=(*Table("ProductRatings", PRODUCT_RATINGS_COLUMNS).render("sqlite"), PRODUCT_RATINGS_BACKFILL),
+    ),
+]
+
+REVIEW_INDEXES = [
+    # Recency-ordered review pages per product; also serves plain productId lookups
+    Index("IX_Reviews_productId_createdAt", "Reviews", "productId, createdAt DESC, reviewId DESC"),
+    # Rating-ordered and rating-filtered review pages per product
+    Index("IX_Reviews_productId_rating", "Reviews", "productId, rating, reviewId"),
+]
+
+CACHE_VERSIONS = [
+    # One counter per cacheable resource family; writers bump it in the same
+    # transaction so HTTP validators can be checked without re-running queries.
+    Table("CacheVersions", """
+        scope NVARCHAR(100) PRIMARY KEY,
+        version BIGINT NOT NULL DEFAULT 0,
+        updatedAt DATETIME NOT NULL DEFAULT GETUTCDATE()
+    """),
+]
+
+# Access paths for the lookups every request makes. Reviews(productId) and
+# Notifications(userId) are served by the composite indexes above.
+BASELINE_INDEXES = [
+    Index("IX_Users_username", "Users", "username"),
+    Index("IX_Users_email", "Users", "email"),
+    Index("IX_Admins_username", "Admins", "username"),
+    Index("IX_Admins_email", "Admins", "email"),
+    Index("IX_Carts_userId", "Carts", "userId"),
+    Index("IX_CartItems_cartId", "CartItems", "cartId"),
+    Index("IX_Orders_userId_createdAt", "Orders", "userId, createdAt"),
+    Index("IX_OrderItems_orderId", "OrderItems", "orderId", include="productId, quantity, price"),
+    Index("IX_OrderItems_productId", "OrderItems", "productId, orderId"),
+    Index("IX_Payments_orderId", "Payments", "orderId"),
+    Index("IX_Products_categoryId", "Products", "categoryId"),
+    Index("IX_ProductVariants_productId_type_value", "ProductVariants", "productId, variantType, variantValue"),
+    Index("IX_VariantTypes_categoryId", "VariantTypes", "categoryId"),
+    Index("IX_Inventory_productId", "Inventory", "productId"),
+    Index("IX_SupportTickets_userId_createdAt", "SupportTickets", "userId, createdAt"),
+    Index("IX_UserVisits_createdAt", "UserVisits", "createdAt"),
+]
+
+MIGRATIONS = [
+    Migration(1, "baseline tables", BASELINE_TABLES),
+    Migration(2, "inventory alerts", INVENTORY_ALERTS),
+    Migration(3, "inventory ledger", INVENTORY_LEDGER),
+    Migration(4, "notification indexes", NOTIFICATION_INDEXES),
+    Migration(5, "notification broadcasts", NOTIFICATION_BROADCASTS),
+    Migration(6, "product ratings", PRODUCT_RATINGS),
+    Migration(7, "review indexes", REVIEW_INDEXES),
+    Migration(8, "cache versions", CACHE_VERSIONS),
+    Migration(9, "baseline indexes", BASELINE_INDEXES),
+    Migration(10, "broadcast attempts", BROADCAST_ATTEMPTS),
+]
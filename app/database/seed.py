@@ -0,0 +1,245 @@
+import argparse
+import asyncio
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+# Row counts per scale; orders, reviews and visits are the volume that
+# matters for reports and listing pages.
+SCALES = {
+    "small": {"users": 200, "categories": 8, "products": 1000, "orders": 1000, "reviews": 2000, "visits": 5000},
+    "medium": {"users": 5000, "categories": 25, "products": 20000, "orders": 50000, "reviews": 100000, "visits": 200000},
+    "large": {"users": 50000, "categories": 60, "products": 100000, "orders": 500000, "reviews": 1000000, "visits": 2000000},
+}
+
+CATEGORY_NAMES = [
+    "Shirts", "Shoes", "Jackets", "Bags", "Watches", "Phones", "Laptops", "Headphones", "Kitchen", "Furniture",
+    "Toys", "Books", "Garden", "Sports", "Beauty", "Jewelry", "Cameras", "Tablets", "Lighting", "Bedding",
+]
+ADJECTIVES = ["Classic", "Slim", "Pro", "Ultra", "Eco", "Vintage", "Smart", "Compact", "Deluxe", "Everyday"]
+VARIANT_VALUES = {
+    "Size": ["XS", "S", "M", "L", "XL"],
+    "Color": ["Black", "White", "Red", "Blue", "Green"],
+}
+ORDER_STATUSES = ["Completed"] * 6 + ["Pending"] * 3 + ["Cancelled"]
+PAYMENT_METHODS = ["card", "paypal", "cash"]
+
+BATCH_SIZE = 1000
+
+
+def _timestamp(rng, now, days=365):
+    return (now - timedelta(seconds=rng.randrange(days * 86400))).replace(microsecond=0)
+
+
+def _insert(cursor, query, rows):
+    for start in range(0, len(rows), BATCH_SIZE):
+        cursor.executemany(query, rows[start:start + BATCH_SIZE])
+
+
+def _ids(cursor, query):
+    cursor.execute(query)
+    return [row[0] for row in cursor.fetchall()]
+
+
+def generate_users(rng, count, password_hash, now):
+    for index in range(count):
+        created = _timestamp(rng, now)
+        yield (
+            f"user{index}", f"user{index}@example.com", password_hash, f"User {index}",
+            f"555-{rng.randrange(10**7):07d}", f"{rng.randrange(1, 999)} Main St", created, created,
+        )
+
+
+def generate_products(rng, count, category_ids, now):
+    for index in range(count):
+        category_id = rng.choice(category_ids)
+        created = _timestamp(rng, now)
+        # Log-normal prices: many cheap items, a long tail of expensive ones
+        price = round(min(rng.lognormvariate(3.5, 0.9), 5000), 2)
+        yield (
+            f"{rng.choice(ADJECTIVES)} Product {index}",
+            f"{rng.choice(ADJECTIVES)} item {index}. " + "Durable, well reviewed and ready to ship. " * rng.randint(1, 6),
+            price, category_id, f"https://cdn.example.com/products/{index}.jpg", created, created,
+        )
+
+
+def seed(conn, counts, password_hash, rng=None, now=None):
+    # Fills an empty, migrated database. Returns the row count per table.
+    rng = rng or random.Random(0)
+    now = now or datetime.now().replace(microsecond=0)
+    cursor = conn.cursor()
+    totals = {}
+
+    _insert(cursor, """
+        INSERT INTO Users (username, email, passwordHash, fullName, phone, address, createdAt, updatedAt)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    """, list(generate_users(rng, counts["users"], password_hash, now)))
+    cursor.execute("""
+        INSERT INTO Admins (username, email, passwordHash, fullName, createdAt, updatedAt)
+        VALUES ('admin', 'admin@example.com', ?, 'Administrator', GETDATE(), GETDATE())
+    """, (password_hash,))
+    user_ids = _ids(cursor, "SELECT userId FROM Users")
+    totals["Users"] = len(user_ids)
+
+    names = [CATEGORY_NAMES[i % len(CATEGORY_NAMES)] + ("" if i < len(CATEGORY_NAMES) else f" {i}") for i in range(counts["categories"])]
+    _insert(cursor, "INSERT INTO Categories (name) VALUES (?)", [(name,) for name in names])
+    category_ids = _ids(cursor, "SELECT categoryId FROM Categories")
+    _insert(cursor, "INSERT INTO VariantTypes (categoryId, variantType) VALUES (?, ?)", [
+        (category_id, variant_type) for category_id in category_ids for variant_type in VARIANT_VALUES
+    ])
+    totals["Categories"] = len(category_ids)
+
+    _insert(cursor, """
+        INSERT INTO Products (name, description, price, categoryId, imageUrl, createdAt, updatedAt)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+    """, list(generate_products(rng, counts["products"], category_ids, now)))
+    cursor.execute("SELECT productId, price FROM Products")
+    prices = {product_id: float(price) for product_id, price in cursor.fetchall()}
+    product_ids = list(prices)
+    totals["Products"] = len(product_ids)
+
+    variants = []
+    inventory = []
+    for product_id in product_ids:
+        variant_type = rng.choice(list(VARIANT_VALUES))
+        for value in rng.sample(VARIANT_VALUES[variant_type], rng.randint(1, 4)):
+            variants.append((product_id, variant_type, value, rng.randint(0, 200), prices[product_id]))
+        created = _timestamp(rng, now)
+        inventory.append((product_id, rng.randint(0, 500), rng.choice([5, 10, 20]), created, created))
+    _insert(cursor, """
+        INSERT INTO ProductVariants (productId, variantType, variantValue, stock, price) VALUES (?, ?, ?, ?, ?)
+    """, variants)
+    _insert(cursor, """
+        INSERT INTO Inventory (productId, quantity, reorderLevel, createdAt, updatedAt) VALUES (?, ?, ?, ?, ?)
+    """, inventory)
+    # Opening receipts, so ledger reconciliation agrees with the seeded balances
+    _insert(cursor, """
+        INSERT INTO InventoryMovements (productId, movementType, delta, reference, createdBy, createdAt)
+        VALUES (?, 'receipt', ?, 'seed', 'seed', ?)
+    """, [(product_id, quantity, created) for product_id, quantity, _, created, _ in inventory if quantity])
+    totals["ProductVariants"] = len(variants)
+    totals["Inventory"] = len(inventory)
+
+    # Orders get ids in insertion order, so their items can be matched by position
+    orders = []
+    order_lines = []
+    for _ in range(counts["orders"]):
+        created = _timestamp(rng, now)
+        lines = [(rng.choice(product_ids), rng.randint(1, 3)) for _ in range(rng.randint(1, 5))]
+        total = round(sum(prices[product_id] * quantity for product_id, quantity in lines), 2)
+        orders.append((rng.choice(user_ids), total, rng.choice(ORDER_STATUSES), created, created))
+        order_lines.append(lines)
+    orders.sort(key=lambda order: order[3])
+    _insert(cursor, """
+        INSERT INTO Orders (userId, totalAmount, status, createdAt, updatedAt) VALUES (?, ?, ?, ?, ?)
+    """, orders)
+    order_ids = _ids(cursor, "SELECT orderId FROM Orders ORDER BY orderId")[-len(orders):] if orders else []
+    items = []
+    payments = []
+    for order_id, order, lines in zip(order_ids, orders, order_lines):
+        for product_id, quantity in lines:
+            items.append((order_id, product_id, quantity, prices[product_id], order[3], order[3]))
+        if order[2] != "Cancelled":
+            payment_status = "Completed" if order[2] == "Completed" else "Pending"
+            payments.append((order_id, order[1], rng.choice(PAYMENT_METHODS), payment_status, order[3], order[3]))
+    _insert(cursor, """
+        INSERT INTO OrderItems (orderId, productId, quantity, price, createdAt, updatedAt) VALUES (?, ?, ?, ?, ?, ?)
+    """, items)
+    _insert(cursor, """
+        INSERT INTO Payments (orderId, amount, paymentMethod, paymentStatus, createdAt, updatedAt)
+        VALUES (?, ?, ?, ?, ?, ?)
+    """, payments)
+    totals["Orders"] = len(orders)
+    totals["OrderItems"] = len(items)
+    totals["Payments"] = len(payments)
+
+    # A few products collect most of the reviews, as on a real storefront
+    popular = product_ids[:max(1, len(product_ids) // 20)]
+    reviews = []
+    for _ in range(counts["reviews"]):
+        product_id = rng.choice(popular) if rng.random() < 0.5 else rng.choice(product_ids)
+        created = _timestamp(rng, now)
+        rating = rng.choices([1, 2, 3, 4, 5], weights=[1, 1, 2, 4, 6])[0]
+        reviews.append((product_id, rng.choice(user_ids), rating, f"Rated {rating} out of 5.", created, created))
+    _insert(cursor, """
+        INSERT INTO Reviews (productId, userId, rating, comment, createdAt, updatedAt) VALUES (?, ?, ?, ?, ?, ?)
+    """, reviews)
+    totals["Reviews"] = len(reviews)
+
+    # ProductRatings is maintained by the review routes; rebuild it once here
+    cursor.execute("DELETE FROM ProductRatings")
+    cursor.execute("""
+        INSERT INTO ProductRatings (productId, reviewCount, ratingSum, rating1, rating2, rating3, rating4, rating5, updatedAt)
+        SELECT productId, COUNT(*), SUM(rating),
+               SUM(CASE WHEN rating = 1 THEN 1 ELSE 0 END),
+               SUM(CASE WHEN rating = 2 THEN 1 ELSE 0 END),
+               SUM(CASE WHEN rating = 3 THEN 1 ELSE 0 END),
+               SUM(CASE WHEN rating = 4 THEN 1 ELSE 0 END),
+               SUM(CASE WHEN rating = 5 THEN 1 ELSE 0 END),
+               GETDATE()
+        FROM Reviews
+        GROUP BY productId
+    """)
+
+    _insert(cursor, """
+        INSERT INTO Notifications (userId, message, isRead, createdAt, updatedAt) VALUES (?, ?, ?, ?, ?)
+    """, [
+        (user_id, f"Welcome back, user {user_id}!", rng.random() < 0.7, created, created)
+        for user_id in user_ids
+        for created in sorted(_timestamp(rng, now, 90) for _ in range(rng.randint(0, 5)))
+    ])
+    _insert(cursor, "INSERT INTO UserVisits (userId, createdAt) VALUES (?, ?)", [
+        (rng.choice(user_ids) if rng.random() < 0.6 else None, _timestamp(rng, now))
+        for _ in range(counts["visits"])
+    ])
+    totals["UserVisits"] = counts["visits"]
+
+    conn.commit()
+    cursor.close()
+    return totals
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m app.database.seed", description="Create the schema and fill it with generated data"
+    )
+    parser.add_argument("--scale", choices=sorted(SCALES), default="small")
+    for table in SCALES["small"]:
+        parser.add_argument(f"--{table}", type=int, default=None, help=f"override the {table} count")
+    parser.add_argument("--seed", type=int, default=0, help="random seed, for reproducible data sets")
+    parser.add_argument("--password", default="password", help="password for every generated user and admin")
+    args = parser.parse_args(argv)
+
+    counts = {table: getattr(args, table) or count for table, count in SCALES[args.scale].items()}
+
+    # Imported here so the generators and SCALES load without configuring a backend
+    from app.auth.services import get_password_hash
+    from app.database.migrate import migrate
+    from app.services.dbServices import backend, connect_to_database
+
+    conn = asyncio.run(connect_to_database())
+    if conn is None:
+        return 1
+    try:
+        migrate(conn)
+        cursor = conn.cursor()
+        cursor.execute("SELECT COUNT(*) FROM Users")
+        existing = cursor.fetchone()[0]
+        cursor.close()
+        if existing:
+            print(f"Database already has {existing} users; seed an empty database")
+            return 1
+
+        started = time.perf_counter()
+        totals = seed(conn, counts, get_password_hash(args.password), rng=random.Random(args.seed))
+        print(f"Seeded {backend.name} database in {time.perf_counter() - started:.1f}s")
+        for table, count in totals.items():
+            print(f"  {count:>9}  {table}")
+    finally:
+        conn.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,683 @@
+import re
+import sqlite3
+from datetime import date, datetime
+from decimal import Decimal
+from functools import lru_cache
+
+# Runs the application's T-SQL against SQLite. Statements are rewritten once
+# per distinct SQL string (GETDATE, DATEADD, @@IDENTITY, ISNULL, LEN, FORMAT, TOP,
+# OFFSET/FETCH, table hints, VALUES column aliases, GROUPING SETS, OUTPUT);
+# MERGE and UPDATE ... OUTPUT deleted.* are emulated statement by statement.
+# APPLY is supported in its "latest row per parent" form (SELECT TOP 1 from
+# one table); sp_* procedures are not supported.
+#
+# Placeholders are numbered before rewriting, so clauses can move (TOP to
+# LIMIT) or repeat (GROUPING SETS to UNION ALL) and still bind the right values.
+
+sqlite3.register_adapter(Decimal, float)
+sqlite3.register_adapter(datetime, lambda value: value.isoformat(" "))
+sqlite3.register_adapter(date, lambda value: value.isoformat())
+sqlite3.register_converter("DATETIME", lambda value: datetime.fromisoformat(value.decode()))
+sqlite3.register_converter("DECIMAL", lambda value: Decimal(value.decode()))
+sqlite3.register_converter("BIT", lambda value: bool(int(value)))
+
+_MARKER = "\ue000{}\ue001"
+_MARKER_RE = re.compile("\ue000(\\d+)\ue001")
+# @@IDENTITY is bound per execution: SQLite's last_insert_rowid() also moves on
+# inserts into tables without an identity column, which SQL Server ignores.
+_IDENTITY = "\ue002"
+_BIND_RE = re.compile("\ue000(\\d+)\ue001|\ue002")
+_INSERT_RE = re.compile(r"\s*INSERT\s+INTO\s+(\w+)", re.I)
+_LITERAL_OR_PLACEHOLDER = re.compile(r"'(?:[^']|'')*'|\?")
+
+_SIMPLE_REWRITES = [
+    (re.compile(r"\bGETDATE\(\)", re.I), "datetime('now', 'localtime')"),
+    (re.compile(r"\bGETUTCDATE\(\)", re.I), "datetime('now')"),
+    (re.compile(r"@@IDENTITY", re.I), _IDENTITY),
+    (re.compile(r"\bISNULL\(", re.I), "IFNULL("),
+    (re.compile(r"\bLEN\(", re.I), "LENGTH("),
+    (re.compile(r"\bN'"), "'"),
+    (re.compile(
+        r"\bWITH\s*\(\s*(?:NOLOCK|HOLDLOCK|UPDLOCK|ROWLOCK|READPAST|XLOCK|TABLOCKX?|SERIALIZABLE)(?:\s*,\s*\w+)*\s*\)",
+        re.I,
+    ), ""),
+    (re.compile(r"\bOFFSET\s+(\S+?)\s+ROWS?\s+FETCH\s+(?:NEXT|FIRST)\s+(\S+?)\s+ROWS?\s+ONLY", re.I), r"LIMIT \1, \2"),
+]
+
+_DATE_FORMAT_TOKENS = [("yyyy", "%Y"), ("MM", "%m"), ("dd", "%d"), ("HH", "%H"), ("mm", "%M"), ("ss", "%S")]
+
+_TOP_RE = re.compile(r"\bSELECT(\s+DISTINCT)?\s+TOP\s*(\([^()]*\)|\d+)\s*", re.I)
+_FORMAT_RE = re.compile(r"\bFORMAT\(", re.I)
+_DATEADD_RE = re.compile(r"\bDATEADD\(", re.I)
+_DATEADD_UNITS = {
+    "year": "years", "yy": "years", "yyyy": "years",
+    "month": "months", "mm": "months", "m": "months",
+    "day": "days", "dd": "days", "d": "days",
+    "hour": "hours", "hh": "hours",
+    "minute": "minutes", "mi": "minutes", "n": "minutes",
+    "second": "seconds", "ss": "seconds", "s": "seconds",
+}
+_VALUES_RE = re.compile(r"\(\s*VALUES\b", re.I)
+_VALUES_ALIAS_RE = re.compile(r"\s+AS\s+(\w+)\s*\(([^()]*)\)")
+_GROUPING_SETS_RE = re.compile(r"\bGROUP\s+BY\s+GROUPING\s+SETS\s*\(", re.I)
+_GROUPING_RE = re.compile(r"\bGROUPING\(([^()]*)\)", re.I)
+_APPLY_RE = re.compile(r"\b(OUTER|CROSS)\s+APPLY\s*\(", re.I)
+_APPLY_BODY_RE = re.compile(
+    r"\s*SELECT\s+TOP\s*(?:\(\s*1\s*\)|1)\s+(?:[\w.]+\s*,\s*)*[\w.]+\s+FROM\s+(\w+)(?:\s+(?:AS\s+)?(?!WHERE\b|ORDER\b)(\w+))?(.*)$",
+    re.I | re.S,
+)
+
+
+def _mark_placeholders(sql):
+    counter = iter(range(len(sql)))
+
+    def replace(match):
+        text = match.group(0)
+        return text if text != "?" else _MARKER.format(next(counter))
+
+    return _LITERAL_OR_PLACEHOLDER.sub(replace, sql)
+
+
+def _depths(sql):
+    # Paren depth per character, with string literals marked as None
+    depths = []
+    depth = 0
+    quoted = False
+    for char in sql:
+        if char == "'":
+            quoted = not quoted
+            depths.append(None)
+            continue
+        if quoted:
+            depths.append(None)
+            continue
+        if char == "(":
+            depths.append(depth)
+            depth += 1
+        elif char == ")":
+            depth -= 1
+            depths.append(depth)
+        else:
+            depths.append(depth)
+    return depths
+
+
+def _closing_paren(sql, open_index):
+    depth = 0
+    quoted = False
+    for index in range(open_index, len(sql)):
+        char = sql[index]
+        if char == "'":
+            quoted = not quoted
+        elif quoted:
+            continue
+        elif char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+            if depth == 0:
+                return index
+    raise ValueError("Unbalanced parentheses in SQL")
+
+
+def _split_top_level(text, pattern):
+    # Splits on matches of pattern that sit outside parens and literals
+    depths = _depths(text)
+    parts = []
+    start = 0
+    for match in re.finditer(pattern, text, re.I):
+        if depths[match.start()] == 0:
+            parts.append(text[start:match.start()])
+            start = match.end()
+    parts.append(text[start:])
+    return parts
+
+
+def _keyword_positions(text, pattern):
+    depths = _depths(text)
+    return [match for match in re.finditer(pattern, text, re.I) if depths[match.start()] == 0]
+
+
+def _scope_end(sql, start):
+    depth = 0
+    quoted = False
+    for index in range(start, len(sql)):
+        char = sql[index]
+        if char == "'":
+            quoted = not quoted
+        elif quoted:
+            continue
+        elif char == "(":
+            depth += 1
+        elif char == ")":
+            if depth == 0:
+                return index
+            depth -= 1
+        elif char == ";" and depth == 0:
+            return index
+    return len(sql)
+
+
+def _rewrite_top(sql):
+    # Rightmost first, so inner selects are rewritten before their parents
+    while True:
+        matches = list(_TOP_RE.finditer(sql))
+        if not matches:
+            return sql
+        match = matches[-1]
+        end = _scope_end(sql, match.end())
+        limit = match.group(2)
+        body = sql[match.end():end].rstrip()
+        sql = f"{sql[:match.start()]}SELECT{match.group(1) or ''} {body} LIMIT {limit}{sql[end:]}"
+
+
+def _rewrite_format(sql):
+    while True:
+        matches = list(_FORMAT_RE.finditer(sql))
+        if not matches:
+            return sql
+        match = matches[-1]
+        close = _closing_paren(sql, match.end() - 1)
+        arguments = _split_top_level(sql[match.end():close], r",")
+        if len(arguments) != 2:
+            raise NotImplementedError("FORMAT with a culture argument is not supported on SQLite")
+        pattern = arguments[1].strip().strip("'")
+        for token, directive in _DATE_FORMAT_TOKENS:
+            pattern = pattern.replace(token, directive)
+        sql = f"{sql[:match.start()]}strftime('{pattern}', {arguments[0].strip()}){sql[close + 1:]}"
+
+
+def _rewrite_values_aliases(sql):
+    # "(VALUES ...) AS source (a, b)" -> "(SELECT column1 AS a, column2 AS b FROM (VALUES ...)) AS source"
+    search_from = 0
+    while True:
+        match = _VALUES_RE.search(sql, search_from)
+        if match is None:
+            return sql
+        close = _closing_paren(sql, match.start())
+        alias = _VALUES_ALIAS_RE.match(sql, close + 1)
+        if alias is None:
+            search_from = close
+            continue
+        columns = [column.strip() for column in alias.group(2).split(",")]
+        select = ", ".join(f"column{index} AS {column}" for index, column in enumerate(columns, 1))
+        replacement = f"(SELECT {select} FROM {sql[match.start():close + 1]}) AS {alias.group(1)}"
+        sql = sql[:match.start()] + replacement + sql[alias.end():]
+        search_from = match.start() + len(replacement)
+
+
+def _rewrite_apply(sql):
+    # "OUTER APPLY (SELECT TOP 1 cols FROM t WHERE ... ORDER BY ...) a" ->
+    # "LEFT JOIN t a ON a.rowid = (SELECT rowid FROM t WHERE ... ORDER BY ... LIMIT 1)"
+    while True:
+        match = _APPLY_RE.search(sql)
+        if match is None:
+            return sql
+        close = _closing_paren(sql, match.end() - 1)
+        body = _APPLY_BODY_RE.match(sql[match.end():close])
+        alias = re.match(r"\s*(?:AS\s+)?(\w+)", sql[close + 1:], re.I)
+        if body is None or alias is None:
+            raise NotImplementedError("Only APPLY over SELECT TOP 1 ... FROM one table is supported on SQLite")
+        table, inner_alias, rest = body.groups()
+        inner = f"{table} {inner_alias}" if inner_alias else table
+        rowid = f"{inner_alias}.rowid" if inner_alias else "rowid"
+        join = "LEFT JOIN" if match.group(1).upper() == "OUTER" else "JOIN"
+        name = alias.group(1)
+        sql = (
+            f"{sql[:match.start()]}{join} {table} {name} ON {name}.rowid = "
+            f"(SELECT {rowid} FROM {inner} {rest.strip()} LIMIT 1){sql[close + 1 + alias.end():]}"
+        )
+
+
+def _normalize(expression):
+    return " ".join(expression.split()).lower()
+
+
+def _rewrite_grouping_sets(sql):
+    # One SELECT per grouping set joined with UNION ALL; columns outside the
+    # set become NULL and GROUPING(col) becomes a constant.
+    match = _GROUPING_SETS_RE.search(sql)
+    if match is None:
+        return sql
+    close = _closing_paren(sql, match.end() - 1)
+    sets = []
+    for grouping_set in _split_top_level(sql[match.end():close], r","):
+        grouping_set = grouping_set.strip()
+        inner = grouping_set[1:-1] if grouping_set.startswith("(") else grouping_set
+        sets.append([column.strip() for column in _split_top_level(inner, r",") if column.strip()])
+    grouped = {_normalize(column) for columns in sets for column in columns}
+
+    select_start = _keyword_positions(sql[:match.start()], r"\bSELECT\b")[-1].start()
+    from_match = _keyword_positions(sql[select_start:match.start()], r"\bFROM\b")[0]
+    select_list = sql[select_start + len("SELECT"):select_start + from_match.start()]
+    from_clause = sql[select_start + from_match.start():match.start()]
+
+    branches = []
+    for columns in sets:
+        in_set = {_normalize(column) for column in columns}
+        items = []
+        for item in _split_top_level(select_list, r","):
+            normalized = _normalize(item)
+            if normalized in grouped and normalized not in in_set:
+                items.append("NULL")
+            else:
+                items.append(_GROUPING_RE.sub(
+                    lambda grouping: "0" if _normalize(grouping.group(1)) in in_set else "1", item
+                ).strip())
+        group_by = f" GROUP BY {', '.join(columns)}" if columns else ""
+        branches.append(f"SELECT {', '.join(items)} {from_clause.strip()}{group_by}")
+    return sql[:select_start] + " UNION ALL ".join(branches) + sql[close + 1:]
+
+
+def _output_to_returning(sql):
+    # INSERT ... OUTPUT inserted.x VALUES/SELECT and DELETE ... OUTPUT deleted.x
+    positions = _keyword_positions(sql, r"\bOUTPUT\b")
+    if not positions:
+        return sql
+    output = positions[0]
+    end_match = re.compile(r"\bVALUES\b|\bSELECT\b|\bWHERE\b", re.I).search(sql, output.end())
+    end = end_match.start() if end_match else len(sql)
+    columns = re.sub(r"\b(?:inserted|deleted)\.", "", sql[output.end():end], flags=re.I).strip()
+    rest = (sql[:output.start()] + sql[end:]).rstrip().rstrip(";")
+    return f"{rest} RETURNING {columns}"
+
+
+def _rewrite_dateadd(sql):
+    # DATEADD(unit, n, date) -> datetime(date, '+n units'); n may be a placeholder
+    while True:
+        matches = list(_DATEADD_RE.finditer(sql))
+        if not matches:
+            return sql
+        match = matches[-1]
+        close = _closing_paren(sql, match.end() - 1)
+        arguments = _split_top_level(sql[match.end():close], r",")
+        unit = _DATEADD_UNITS.get(arguments[0].strip().lower()) if len(arguments) == 3 else None
+        if unit is None:
+            raise NotImplementedError(f"DATEADD({arguments[0].strip()}, ...) is not supported on SQLite")
+        amount, value = arguments[1].strip(), arguments[2].strip()
+        sql = f"{sql[:match.start()]}datetime({value}, printf('%+d {unit}', {amount})){sql[close + 1:]}"
+
+
+def rewrite(sql):
+    for pattern, replacement in _SIMPLE_REWRITES:
+        sql = pattern.sub(replacement, sql)
+    sql = _rewrite_dateadd(sql)
+    sql = _rewrite_format(sql)
+    sql = _rewrite_values_aliases(sql)
+    sql = _rewrite_apply(sql)
+    sql = _rewrite_grouping_sets(sql)
+    sql = _rewrite_top(sql)
+    return sql
+
+
+def _bind(expression, params, source=None, source_alias=None):
+    # Turns markers (and source.column references) back into "?" with values
+    values = []
+    pattern = "'(?:[^']|'')*'|\ue000(\\d+)\ue001"
+    if source_alias:
+        pattern += rf"|\b{source_alias}\.(\w+)\b"
+
+    def replace(match):
+        if match.group(1) is not None:
+            values.append(params[int(match.group(1))])
+            return "?"
+        if match.lastindex == 2 and match.group(2) is not None:
+            values.append(source[match.group(2).lower()])
+            return "?"
+        return match.group(0)
+
+    return re.sub(pattern, replace, expression, flags=re.I), values
+
+
+class _SqlStep:
+    def __init__(self, sql):
+        self.sql = _BIND_RE.sub("?", sql)
+        self.order = [int(match.group(1)) if match.group(1) else None for match in _BIND_RE.finditer(sql)]
+        insert = _INSERT_RE.match(sql)
+        self.insert_table = insert.group(1) if insert else None
+
+    def run(self, cursor, params):
+        identity = cursor.connection.last_identity
+        cursor._raw.execute(self.sql, [identity if index is None else params[index] for index in self.order])
+        cursor._rows = None
+        cursor.rowcount = cursor._raw.rowcount
+        if self.insert_table:
+            cursor.connection.record_insert(self.insert_table, cursor._raw.lastrowid)
+
+
+def _row(raw, table, rowid):
+    raw.execute(f"SELECT * FROM {table} WHERE rowid = ?", [rowid])
+    values = raw.fetchone()
+    if values is None:
+        return None
+    return {column[0].lower(): value for column, value in zip(raw.description, values)}
+
+
+def _output_row(items, action, inserted, deleted):
+    row = []
+    for item in items:
+        if item == "$action":
+            row.append(action)
+            continue
+        prefix, _, column = item.partition(".")
+        prefix = prefix.lower()
+        if prefix in ("inserted", "deleted"):
+            source = inserted if prefix == "inserted" else deleted
+            if column == "*":
+                row.extend((source or {}).values())
+            else:
+                row.append(None if source is None else source[column.lower()])
+        elif item.startswith("'"):
+            row.append(item[1:-1].replace("''", "'"))
+        else:
+            row.append(int(item) if item.isdigit() else item)
+    return tuple(row)
+
+
+_MERGE_HEAD_RE = re.compile(
+    r"\s*(?:WITH\s+(\w+)\s+AS\s*\((.*)\)\s*)?MERGE\s+(?:INTO\s+)?(\w+)(?:\s+(?:AS\s+)?(?!USING\b)(\w+))?\s+USING\s+",
+    re.I | re.S,
+)
+_CTE_RE = re.compile(r"\s*SELECT\s+.*?\s+FROM\s+(\w+)(?:\s+WHERE\s+(.*))?\s*$", re.I | re.S)
+_SOURCE_ALIAS_RE = re.compile(r"\s*(?:AS\s+)?(\w+)\s*(?:\(([^()]*)\))?\s*ON\s+", re.I)
+_WHEN_RE = re.compile(
+    r"\s*(NOT\s+MATCHED(?:\s+BY\s+(TARGET|SOURCE))?|MATCHED)(?:\s+AND\s+(.*?))?\s+THEN\s+(.*)$", re.I | re.S
+)
+_INSERT_ACTION_RE = re.compile(r"INSERT\s*\(([^()]*)\)\s*VALUES\s*\((.*)\)\s*$", re.I | re.S)
+
+
+class _MergeStep:
+    # MERGE as a loop over the source rows: find the matching target rows,
+    # apply the first WHEN clause whose condition holds, collect OUTPUT rows.
+    def __init__(self, sql):
+        head = _MERGE_HEAD_RE.match(sql)
+        if head is None:
+            raise NotImplementedError("Unsupported MERGE form on SQLite")
+        cte_name, cte_body, target, alias = head.groups()
+        self.scope = "1=1"
+        if cte_name:
+            cte = _CTE_RE.match(cte_body)
+            if cte is None or target.lower() != cte_name.lower():
+                raise NotImplementedError("MERGE into a CTE must select from one table")
+            target = cte.group(1)
+            self.scope = cte.group(2) or "1=1"
+            alias = alias or cte_name
+        self.table = target
+        self.alias = alias or target
+
+        rest = sql[head.end():]
+        if not rest.startswith("("):
+            raise NotImplementedError("MERGE source must be a parenthesized query or VALUES")
+        close = _closing_paren(rest, 0)
+        source_body = rest[1:close].strip()
+        source_alias = _SOURCE_ALIAS_RE.match(rest, close + 1)
+        self.source_alias = source_alias.group(1)
+        source_columns = source_alias.group(2)
+        if source_body.upper().startswith("VALUES"):
+            self.source_sql = rewrite(f"SELECT * FROM ({source_body}) AS {self.source_alias} ({source_columns})")
+            self.source_columns = None
+        else:
+            self.source_sql = rewrite(source_body)
+            self.source_columns = [c.strip().lower() for c in source_columns.split(",")] if source_columns else None
+
+        clauses = rest[source_alias.end():].rstrip().rstrip(";")
+        output = _keyword_positions(clauses, r"\bOUTPUT\b")
+        self.output = None
+        if output:
+            self.output = [item.strip() for item in _split_top_level(clauses[output[0].end():], r",")]
+            clauses = clauses[:output[0].start()]
+
+        parts = _split_top_level(clauses, r"\bWHEN\b")
+        self.on = rewrite(parts[0])
+        self.matched, self.not_matched, self.not_matched_by_source = [], [], []
+        for part in parts[1:]:
+            when = _WHEN_RE.match(part)
+            if when is None:
+                raise NotImplementedError(f"Unsupported MERGE clause: WHEN {part.strip()}")
+            kind, by, condition, action = when.groups()
+            clause = (rewrite(condition) if condition else None, self._action(action.strip()))
+            if kind.upper() == "MATCHED":
+                self.matched.append(clause)
+            elif (by or "").upper() == "SOURCE":
+                self.not_matched_by_source.append(clause)
+            else:
+                self.not_matched.append(clause)
+
+    def _action(self, action):
+        if action.upper() == "DELETE":
+            return ("DELETE", None)
+        if action.upper().startswith("UPDATE"):
+            return ("UPDATE", rewrite(re.sub(r"^UPDATE\s+SET\s+", "", action, flags=re.I)))
+        insert = _INSERT_ACTION_RE.match(action)
+        if insert is None:
+            raise NotImplementedError(f"Unsupported MERGE action: {action}")
+        return ("INSERT", (insert.group(1), rewrite(insert.group(2))))
+
+    def _holds(self, raw, condition, params, source, rowid=None):
+        if condition is None:
+            return True
+        condition, values = _bind(condition, params, source, self.source_alias)
+        if rowid is None:
+            raw.execute(f"SELECT 1 WHERE {condition}", values)
+        else:
+            raw.execute(
+                f"SELECT 1 FROM {self.table} AS {self.alias} WHERE {self.alias}.rowid = ? AND ({condition})",
+                [rowid, *values],
+            )
+        return raw.fetchone() is not None
+
+    def _apply(self, cursor, action, params, source, rowid=None):
+        raw = cursor._raw
+        kind, argument = action
+        if kind == "INSERT":
+            columns, expressions = argument
+            expressions, values = _bind(expressions, params, source, self.source_alias)
+            raw.execute(f"INSERT INTO {self.table} ({columns}) VALUES ({expressions})", values)
+            cursor.connection.record_insert(self.table, raw.lastrowid)
+            return "INSERT", _row(raw, self.table, raw.lastrowid), None
+        deleted = _row(raw, self.table, rowid)
+        if kind == "DELETE":
+            raw.execute(f"DELETE FROM {self.table} WHERE rowid = ?", [rowid])
+            return "DELETE", None, deleted
+        assignments, values = _bind(argument, params, source, self.source_alias)
+        raw.execute(
+            f"UPDATE {self.table} AS {self.alias} SET {assignments} WHERE {self.alias}.rowid = ?",
+            [*values, rowid],
+        )
+        return "UPDATE", _row(raw, self.table, rowid), deleted
+
+    def run(self, cursor, params):
+        raw = cursor._raw
+        scope, scope_values = _bind(self.scope, params)
+        in_scope = []
+        if self.not_matched_by_source:
+            raw.execute(f"SELECT {self.alias}.rowid FROM {self.table} AS {self.alias} WHERE {scope}", scope_values)
+            in_scope = [row[0] for row in raw.fetchall()]
+
+        source_sql, source_values = _bind(self.source_sql, params)
+        raw.execute(source_sql, source_values)
+        names = self.source_columns or [column[0].lower() for column in raw.description]
+        sources = [dict(zip(names, values)) for values in raw.fetchall()]
+
+        results = []
+        matched_rowids = set()
+        for source in sources:
+            on, on_values = _bind(self.on, params, source, self.source_alias)
+            raw.execute(
+                f"SELECT {self.alias}.rowid FROM {self.table} AS {self.alias} WHERE ({scope}) AND ({on})",
+                [*scope_values, *on_values],
+            )
+            rowids = [row[0] for row in raw.fetchall()]
+            if rowids:
+                matched_rowids.update(rowids)
+                for rowid in rowids:
+                    for condition, action in self.matched:
+                        if self._holds(raw, condition, params, source, rowid):
+                            results.append(self._apply(cursor, action, params, source, rowid))
+                            break
+            else:
+                for condition, action in self.not_matched:
+                    if self._holds(raw, condition, params, source):
+                        results.append(self._apply(cursor, action, params, source))
+                        break
+
+        for rowid in in_scope:
+            if rowid in matched_rowids:
+                continue
+            for condition, action in self.not_matched_by_source:
+                if self._holds(raw, condition, params, {}, rowid):
+                    results.append(self._apply(cursor, action, params, {}, rowid))
+                    break
+
+        cursor.rowcount = len(results)
+        cursor._rows = [_output_row(self.output, *result) for result in results] if self.output else []
+
+
+_UPDATE_OUTPUT_RE = re.compile(
+    r"\s*UPDATE\s+(\w+)(?:\s+AS\s+(\w+))?\s+SET\s+(.*?)\s+OUTPUT\s+(.*?)(?:\s+WHERE\s+(.*?))?\s*;?\s*$",
+    re.I | re.S,
+)
+
+
+class _UpdateOutputStep:
+    # OUTPUT deleted.* needs the pre-update values, which RETURNING cannot give
+    def __init__(self, sql):
+        match = _UPDATE_OUTPUT_RE.match(sql)
+        if match is None:
+            raise NotImplementedError("Unsupported UPDATE ... OUTPUT form on SQLite")
+        self.table, alias, assignments, output, where = match.groups()
+        self.alias = alias or self.table
+        self.assignments = rewrite(assignments)
+        self.output = [item.strip() for item in _split_top_level(output, r",")]
+        self.where = rewrite(where) if where else "1=1"
+
+    def run(self, cursor, params):
+        raw = cursor._raw
+        where, where_values = _bind(self.where, params)
+        raw.execute(f"SELECT {self.alias}.rowid FROM {self.table} AS {self.alias} WHERE {where}", where_values)
+        rowids = [row[0] for row in raw.fetchall()]
+        assignments, values = _bind(self.assignments, params)
+        results = []
+        for rowid in rowids:
+            deleted = _row(raw, self.table, rowid)
+            raw.execute(
+                f"UPDATE {self.table} AS {self.alias} SET {assignments} WHERE {self.alias}.rowid = ?", [*values, rowid]
+            )
+            results.append(("UPDATE", _row(raw, self.table, rowid), deleted))
+        cursor.rowcount = len(results)
+        cursor._rows = [_output_row(self.output, *result) for result in results]
+
+
+@lru_cache(maxsize=1024)
+def plan(sql):
+    steps = []
+    for statement in _split_top_level(_mark_placeholders(sql), r";"):
+        if not statement.strip() or re.fullmatch(r"\s*SET\s+NOCOUNT\s+\w+\s*", statement, re.I):
+            continue
+        keyword = statement.lstrip()[:6].upper()
+        if _MERGE_HEAD_RE.match(statement) and re.search(r"\bMERGE\b", statement, re.I):
+            steps.append(_MergeStep(statement))
+        elif keyword == "UPDATE" and _keyword_positions(statement, r"\bOUTPUT\b"):
+            steps.append(_UpdateOutputStep(statement))
+        else:
+            statement = rewrite(statement)
+            if keyword in ("INSERT", "DELETE"):
+                statement = _output_to_returning(statement)
+            steps.append(_SqlStep(statement))
+    return tuple(steps)
+
+
+class SqliteCursor:
+    def __init__(self, raw, connection):
+        self._raw = raw
+        self.connection = connection
+        self._rows = None
+        self.rowcount = -1
+
+    @property
+    def description(self):
+        return self._raw.description
+
+    def execute(self, sql, params=()):
+        params = list(params or ())
+        for step in plan(sql):
+            step.run(self, params)
+        return self
+
+    def executemany(self, sql, seq_of_params):
+        total = 0
+        for params in seq_of_params:
+            self.execute(sql, params)
+            total += max(self.rowcount, 0)
+        self.rowcount = total
+        return self
+
+    def fetchone(self):
+        if self._rows is not None:
+            return self._rows.pop(0) if self._rows else None
+        return self._raw.fetchone()
+
+    def fetchmany(self, size=1):
+        if self._rows is not None:
+            rows, self._rows = self._rows[:size], self._rows[size:]
+            return rows
+        return self._raw.fetchmany(size)
+
+    def fetchall(self):
+        if self._rows is not None:
+            rows, self._rows = self._rows, []
+            return rows
+        return self._raw.fetchall()
+
+    def close(self):
+        self._raw.close()
+
+
+class SqliteConnection:
+    def __init__(self, path):
+        self._conn = sqlite3.connect(
+            path, detect_types=sqlite3.PARSE_DECLTYPES, check_same_thread=False, timeout=30
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self.last_identity = None
+        self._identity_tables = {}
+
+    def record_insert(self, table, rowid):
+        table = table.lower()
+        if table not in self._identity_tables:
+            row = self._conn.execute(
+                "SELECT sql FROM sqlite_master WHERE type = 'table' AND lower(name) = ?", [table]
+            ).fetchone()
+            self._identity_tables[table] = bool(row and "AUTOINCREMENT" in row[0].upper())
+        if self._identity_tables[table] and rowid:
+            self.last_identity = rowid
+
+    def cursor(self):
+        return SqliteCursor(self._conn.cursor(), self)
+
+    def commit(self):
+        self._conn.commit()
+
+    def rollback(self):
+        self._conn.rollback()
+
+    def close(self):
+        self._conn.close()
+
+
+_DDL_REWRITES = [
+    (re.compile(r"\b(?:BIG)?INT\s+PRIMARY\s+KEY\s+IDENTITY\s*\(\s*1\s*,\s*1\s*\)", re.I), "INTEGER PRIMARY KEY AUTOINCREMENT"),
+    (re.compile(r"\bN?VARCHAR\s*\(\s*MAX\s*\)", re.I), "TEXT"),
+    (re.compile(r"\b(N?VARCHAR\s*\(\s*\d+\s*\))", re.I), r"\1 COLLATE NOCASE"),
+    (re.compile(r"\bDEFAULT\s+GETDATE\(\)", re.I), "DEFAULT (datetime('now', 'localtime'))"),
+    (re.compile(r"\bDEFAULT\s+GETUTCDATE\(\)", re.I), "DEFAULT (datetime('now'))"),
+]
+
+
+def sqlite_columns(columns):
+    # Column definitions written for SQL Server, in SQLite terms; text columns
+    # compare case-insensitively as they do under SQL Server's default collation.
+    for pattern, replacement in _DDL_REWRITES:
+        columns = pattern.sub(replacement, columns)
+    return columns
@@ -1,16 +1,84 @@
-from fastapi import APIRouter, HTTPException, status, Depends
+from fastapi import APIRouter, HTTPException, status, Depends, Query, Request
+from fastapi.responses import StreamingResponse
 from fastapi.security import OAuth2PasswordBearer
-from typing import List
+from typing import List, Optional
 
 from app.auth.token import verify_token
 from app.services.dbServices import connect_to_database
+from app.services.projectionServices import Projection
 from app.utils.is_admin import is_admin
-from app.inventory.schemas import InventoryResponse, InventoryUpdate, InitialInventory
+from app.inventory.schemas import (
+    InventoryResponse,
+    InventoryUpdate,
+    InitialInventory,
+    ReorderLevelUpdate,
+    LowStockItemResponse,
+    InventoryMovementCreate,
+    InventoryMovementResponse,
+    InventoryReconciliation,
+)
+from app.inventory.services import (
+    refresh_low_stock,
+    is_valid_movement,
+    apply_movement,
+    set_quantity,
+    last_quantities,
+    record_adjustments,
+)
 from app.utils.date_convert import format_datetime
+from app.utils.serialization import FastJSONResponse, compile_row_mapper
+from app.utils.bulk_io import SUPPORTED_FORMATS, MEDIA_TYPES, import_records, stream_rows
 
 router = APIRouter()
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/admin/auth/login")
 
+IMPORT_BATCH_SIZE = 500
+
+INVENTORY_FIELDS = ["inventory_id", "product_id", "quantity", "reorder_level", "created_at", "updated_at"]
+
+MERGE_INVENTORY_QUERY = """
+    MERGE INTO Inventory AS target
+    USING (VALUES (?, ?)) AS source (productId, quantity)
+    ON target.productId = source.productId
+    WHEN MATCHED THEN
+        UPDATE SET quantity = source.quantity, updatedAt = GETDATE()
+    WHEN NOT MATCHED THEN
+        INSERT (productId, quantity, createdAt, updatedAt)
+        VALUES (source.productId, source.quantity, GETDATE(), GETDATE());
+"""
+
+
+def _movement_row(movement, balance=None):
+    return {
+        "movement_id": movement[0],
+        "product_id": movement[1],
+        "movement_type": movement[2],
+        "delta": movement[3],
+        "reference": movement[4],
+        "created_by": movement[5],
+        "created_at": format_datetime(movement[6]),
+        "balance": balance,
+    }
+
+
+INVENTORY = Projection("InventoryRow", {
+    "inventory_id": "inventoryId",
+    "product_id": "productId",
+    "quantity": "quantity",
+    "reorder_level": "reorderLevel",
+    "created_at": "createdAt",
+    "updated_at": "updatedAt",
+})
+
+_inventory_row = compile_row_mapper({
+    "inventory_id": "inventory_id",
+    "product_id": "product_id",
+    "quantity": "quantity",
+    "reorder_level": "reorder_level",
+    "created_at": ("created_at", format_datetime),
+    "updated_at": ("updated_at", format_datetime),
+})
+
 @router.get("/inventory", response_model=List[InventoryResponse])
 async def get_inventory(token: str = Depends(oauth2_scheme)):
     try:
@@ -23,22 +91,13 @@ async def get_inventory(token: str = Depends(oauth2_scheme)):
         conn = await connect_to_database()
         cursor = conn.cursor()
 
-        cursor.execute("SELECT * FROM Inventory")
-        inventory_items = cursor.fetchall()
+        cursor.execute(f"SELECT {INVENTORY.columns} FROM Inventory")
+        inventory_items = [_inventory_row(item) for item in INVENTORY.all(cursor)]
 
         cursor.close()
         conn.close()
 
-        return [
-            {
-                "inventory_id": item[0],
-                "product_id": item[1],
-                "quantity": item[2],
-                "created_at": format_datetime(item[3]),
-                "updated_at": format_datetime(item[4]),
-            }
-            for item in inventory_items
-        ]
+        return FastJSONResponse(inventory_items)
     except Exception as e:
         print(f"Exception: {e}")
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Error fetching inventory")
@@ -55,24 +114,14 @@ async def update_inventory(product_id: int, inventory_update: InventoryUpdate, t
         conn = await connect_to_database()
         cursor = conn.cursor()
 
-        cursor.execute("SELECT * FROM Inventory WHERE productId=?", (product_id,))
-        existing_inventory = cursor.fetchone()
-
-        if not existing_inventory:
+        if not set_quantity(cursor, product_id, inventory_update.quantity, None, username):
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Inventory record not found")
 
-        cursor.execute(
-            """
-            UPDATE Inventory
-            SET quantity=?, updatedAt=GETDATE()
-            WHERE productId=?
-        """,
-            (inventory_update.quantity, product_id),
-        )
+        refresh_low_stock(cursor, [product_id])
         conn.commit()
 
-        cursor.execute("SELECT * FROM Inventory WHERE productId=?", (product_id,))
-        updated_inventory = cursor.fetchone()
+        cursor.execute(f"SELECT {INVENTORY.columns} FROM Inventory WHERE productId=?", (product_id,))
+        updated_inventory = INVENTORY.one(cursor)
 
         cursor.close()
         conn.close()
@@ -80,13 +129,7 @@ async def update_inventory(product_id: int, inventory_update: InventoryUpdate, t
         if not updated_inventory:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Failed to update inventory")
 
-        return {
-            "inventory_id": updated_inventory[0],
-            "product_id": updated_inventory[1],
-            "quantity": updated_inventory[2],
-            "created_at": format_datetime(updated_inventory[3]),
-            "updated_at": format_datetime(updated_inventory[4]),
-        }
+        return _inventory_row(updated_inventory)
     except Exception as e:
         print(f"Exception: {e}")
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Error updating inventory")
@@ -104,39 +147,349 @@ async def initialize_inventory(initial_inventory: List[InitialInventory], token:
         conn = await connect_to_database()
         cursor = conn.cursor()
 
-        for item in initial_inventory:
-            cursor.execute(
-                """
-                MERGE INTO Inventory AS target
-                USING (VALUES (?, ?)) AS source (productId, quantity)
-                ON target.productId = source.productId
-                WHEN MATCHED THEN
-                    UPDATE SET quantity = source.quantity, updatedAt = GETDATE()
-                WHEN NOT MATCHED THEN
-                    INSERT (productId, quantity, createdAt, updatedAt)
-                    VALUES (source.productId, source.quantity, GETDATE(), GETDATE());
-                """,
-                (item.product_id, item.quantity),
-            )
+        rows = last_quantities((item.product_id, item.quantity) for item in initial_inventory)
+        record_adjustments(cursor, rows, "initialize", username)
+        for row in rows:
+            cursor.execute(MERGE_INVENTORY_QUERY, row)
 
+        refresh_low_stock(cursor, [product_id for product_id, _ in rows])
         conn.commit()
 
-        cursor.execute("SELECT * FROM Inventory")
-        inventory_items = cursor.fetchall()
+        cursor.execute(f"SELECT {INVENTORY.columns} FROM Inventory")
+        inventory_items = [_inventory_row(item) for item in INVENTORY.all(cursor)]
+
+        cursor.close()
+        conn.close()
+
+        return FastJSONResponse(inventory_items)
+    except Exception as e:
+        print(f"Exception: {e}")
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Error initializing inventory")
+
+
+@router.post("/inventory/import")
+async def import_inventory(
+    request: Request,
+    fmt: str = Query("csv", alias="format", description="csv or ndjson"),
+    token: str = Depends(oauth2_scheme),
+):
+    try:
+        payload = verify_token(token)
+        username = payload.get("sub")
+
+        if not await is_admin(username):
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized")
+
+        if fmt not in SUPPORTED_FORMATS:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Unsupported format")
+
+        conn = await connect_to_database()
+        cursor = conn.cursor()
+
+        def write_batch(batch):
+            rows = last_quantities((item.product_id, item.quantity) for item in batch)
+            record_adjustments(cursor, rows, "import", username)
+            cursor.executemany(MERGE_INVENTORY_QUERY, rows)
+            refresh_low_stock(cursor, [product_id for product_id, _ in rows])
+            conn.commit()
+            return len(batch)
+
+        try:
+            summary = await import_records(
+                request.stream(), fmt, lambda record: InitialInventory(**record), write_batch, IMPORT_BATCH_SIZE
+            )
+        finally:
+            cursor.close()
+            conn.close()
+
+        return summary
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"Exception: {e}")
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Error importing inventory")
+
+
+@router.get("/inventory/export")
+async def export_inventory(
+    fmt: str = Query("csv", alias="format", description="csv or ndjson"),
+    token: str = Depends(oauth2_scheme),
+):
+    try:
+        payload = verify_token(token)
+        username = payload.get("sub")
+
+        if not await is_admin(username):
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized")
+
+        if fmt not in SUPPORTED_FORMATS:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Unsupported format")
+
+        conn = await connect_to_database()
+        cursor = conn.cursor()
+        cursor.execute(f"SELECT {INVENTORY.columns} FROM Inventory ORDER BY productId")
+
+        return StreamingResponse(
+            stream_rows(conn, cursor, lambda row: _inventory_row(INVENTORY.row(row)), INVENTORY_FIELDS, fmt),
+            media_type=MEDIA_TYPES[fmt],
+            headers={"Content-Disposition": f'attachment; filename="inventory.{fmt}"'},
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"Exception: {e}")
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Error exporting inventory")
+
+
+@router.get("/inventory/low-stock", response_model=List[LowStockItemResponse])
+async def get_low_stock(token: str = Depends(oauth2_scheme)):
+    try:
+        payload = verify_token(token)
+        username = payload.get("sub")
+
+        if not await is_admin(username):
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized")
+
+        conn = await connect_to_database()
+        cursor = conn.cursor()
+
+        cursor.execute(
+            """
+            SELECT productId, quantity, reorderLevel, flaggedAt
+            FROM LowStockItems
+            ORDER BY quantity - reorderLevel, productId
+            """
+        )
+        low_stock_items = cursor.fetchall()
 
         cursor.close()
         conn.close()
 
         return [
             {
-                "inventory_id": item[0],
-                "product_id": item[1],
-                "quantity": item[2],
-                "created_at": format_datetime(item[3]),
-                "updated_at": format_datetime(item[4]),
+                "product_id": item[0],
+                "quantity": item[1],
+                "reorder_level": item[2],
+                "flagged_at": format_datetime(item[3]),
             }
-            for item in inventory_items
+            for item in low_stock_items
         ]
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"Exception: {e}")
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Error fetching low stock items")
+
+
+@router.put("/inventory/{product_id}/reorder-level", response_model=InventoryResponse)
+async def update_reorder_level(product_id: int, reorder_update: ReorderLevelUpdate, token: str = Depends(oauth2_scheme)):
+    try:
+        payload = verify_token(token)
+        username = payload.get("sub")
+
+        if not await is_admin(username):
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized")
+
+        conn = await connect_to_database()
+        cursor = conn.cursor()
+
+        cursor.execute(
+            "UPDATE Inventory SET reorderLevel=?, updatedAt=GETDATE() WHERE productId=?",
+            (reorder_update.reorder_level, product_id),
+        )
+
+        if cursor.rowcount == 0:
+            cursor.close()
+            conn.close()
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Inventory record not found")
+
+        refresh_low_stock(cursor, [product_id])
+        conn.commit()
+
+        cursor.execute(f"SELECT {INVENTORY.columns} FROM Inventory WHERE productId=?", (product_id,))
+        updated_inventory = INVENTORY.one(cursor)
+
+        cursor.close()
+        conn.close()
+
+        return _inventory_row(updated_inventory)
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"Exception: {e}")
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Error updating reorder level")
+
+
+@router.post("/inventory/{product_id}/movements", response_model=InventoryMovementResponse)
+async def create_inventory_movement(
+    product_id: int, movement: InventoryMovementCreate, token: str = Depends(oauth2_scheme)
+):
+    try:
+        payload = verify_token(token)
+        username = payload.get("sub")
+
+        if not await is_admin(username):
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized")
+
+        if not is_valid_movement(movement.movement_type, movement.delta):
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid movement type or delta")
+
+        conn = await connect_to_database()
+        cursor = conn.cursor()
+
+        result = apply_movement(cursor, product_id, movement.movement_type, movement.delta, movement.reference, username)
+
+        if result is None:
+            # Nothing merged: either the balance would go negative or there is
+            # no inventory row to take a negative movement from
+            cursor.execute("SELECT 1 FROM Inventory WHERE productId=?", (product_id,))
+            exists = cursor.fetchone() is not None
+            conn.rollback()
+            cursor.close()
+            conn.close()
+            if not exists:
+                raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Inventory not found for this product")
+            raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Insufficient stock")
+
+        refresh_low_stock(cursor, [product_id])
+        conn.commit()
+
+        cursor.close()
+        conn.close()
+
+        new_movement, balance = result
+        return _movement_row(new_movement, balance)
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"Exception: {e}")
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Error recording inventory movement")
+
+
+@router.get("/inventory/{product_id}/movements", response_model=List[InventoryMovementResponse])
+async def get_inventory_movements(
+    product_id: int,
+    limit: int = Query(50, ge=1, le=500),
+    before_id: Optional[int] = Query(None, description="Return movements older than this movement id"),
+    token: str = Depends(oauth2_scheme),
+):
+    try:
+        payload = verify_token(token)
+        username = payload.get("sub")
+
+        if not await is_admin(username):
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized")
+
+        conn = await connect_to_database()
+        cursor = conn.cursor()
+
+        query = """
+            SELECT TOP (?) movementId, productId, movementType, delta, reference, createdBy, createdAt
+            FROM InventoryMovements
+            WHERE productId=?
+        """
+        params = [limit, product_id]
+        if before_id is not None:
+            query += " AND movementId < ?"
+            params.append(before_id)
+        query += " ORDER BY movementId DESC"
+
+        cursor.execute(query, params)
+        movements = cursor.fetchall()
+
+        cursor.close()
+        conn.close()
+
+        return [_movement_row(movement) for movement in movements]
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"Exception: {e}")
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Error fetching inventory movements")
+
+
+@router.post("/inventory/snapshots")
+async def create_inventory_snapshot(token: str = Depends(oauth2_scheme)):
+    try:
+        payload = verify_token(token)
+        username = payload.get("sub")
+
+        if not await is_admin(username):
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized")
+
+        conn = await connect_to_database()
+        cursor = conn.cursor()
+
+        # HOLDLOCK keeps balances and the ledger high-water mark consistent
+        cursor.execute(
+            """
+            INSERT INTO InventorySnapshots (productId, quantity, lastMovementId, createdAt)
+            SELECT i.productId, i.quantity,
+                   (SELECT ISNULL(MAX(movementId), 0) FROM InventoryMovements WITH (HOLDLOCK)),
+                   GETDATE()
+            FROM Inventory i WITH (HOLDLOCK)
+            """
+        )
+        snapshot_count = cursor.rowcount
+        conn.commit()
+
+        cursor.close()
+        conn.close()
+
+        return {"detail": "Inventory snapshot created", "snapshot_count": snapshot_count}
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"Exception: {e}")
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Error creating inventory snapshot")
+
+
+@router.get("/inventory/{product_id}/reconcile", response_model=InventoryReconciliation)
+async def reconcile_inventory(product_id: int, token: str = Depends(oauth2_scheme)):
+    try:
+        payload = verify_token(token)
+        username = payload.get("sub")
+
+        if not await is_admin(username):
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized")
+
+        conn = await connect_to_database()
+        cursor = conn.cursor()
+
+        # Replays only the movements recorded after the latest snapshot
+        cursor.execute(
+            """
+            SELECT i.quantity, s.snapshotId, ISNULL(s.quantity, 0) + ISNULL(
+                (SELECT SUM(m.delta) FROM InventoryMovements m
+                 WHERE m.productId = i.productId AND m.movementId > ISNULL(s.lastMovementId, 0)), 0)
+            FROM Inventory i
+            OUTER APPLY (
+                SELECT TOP 1 snapshotId, quantity, lastMovementId
+                FROM InventorySnapshots
+                WHERE productId = i.productId
+                ORDER BY snapshotId DESC
+            ) s
+            WHERE i.productId=?
+            """,
+            (product_id,),
+        )
+        result = cursor.fetchone()
+
+        cursor.close()
+        conn.close()
+
+        if not result:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Inventory record not found")
+
+        return {
+            "product_id": product_id,
+            "quantity": result[0],
+            "ledger_quantity": result[2],
+            "snapshot_id": result[1],
+            "consistent": result[0] == result[2],
+        }
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Exception: {e}")
-        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Error initializing inventory")
\ No newline at end of file
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Error reconciling inventory")
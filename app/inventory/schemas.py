@@ -1,9 +1,11 @@
 from pydantic import BaseModel
+from typing import Optional
 
 class InventoryResponse(BaseModel):
     inventory_id: int
     product_id: int
     quantity: int
+    reorder_level: int = 0
     created_at: str
     updated_at: str
 
@@ -12,4 +14,35 @@ class InventoryUpdate(BaseModel):
 
 class InitialInventory(BaseModel):
     product_id: int
-    quantity: int
\ No newline at end of file
+    quantity: int
+
+class ReorderLevelUpdate(BaseModel):
+    reorder_level: int
+
+class LowStockItemResponse(BaseModel):
+    product_id: int
+    quantity: int
+    reorder_level: int
+    flagged_at: str
+
+class InventoryMovementCreate(BaseModel):
+    movement_type: str
+    delta: int
+    reference: Optional[str] = None
+
+class InventoryMovementResponse(BaseModel):
+    movement_id: int
+    product_id: int
+    movement_type: str
+    delta: int
+    reference: Optional[str] = None
+    created_by: Optional[str] = None
+    created_at: str
+    balance: Optional[int] = None
+
+class InventoryReconciliation(BaseModel):
+    product_id: int
+    quantity: int
+    ledger_quantity: int
+    snapshot_id: Optional[int] = None
+    consistent: bool
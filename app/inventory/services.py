@@ -0,0 +1,144 @@
+MOVEMENT_TYPES = {
+    "receipt": 1,
+    "release": 1,
+    "sale": -1,
+    "reservation": -1,
+    "adjustment": 0,
+}
+
+ADJUSTMENT_CHUNK_SIZE = 500
+
+LOW_STOCK_MESSAGE = "Low stock: product {product_id} has {quantity} left (reorder level {reorder_level})"
+
+INSERT_MOVEMENT_QUERY = """
+    INSERT INTO InventoryMovements (productId, movementType, delta, reference, createdBy, createdAt)
+    OUTPUT inserted.movementId, inserted.productId, inserted.movementType, inserted.delta,
+           inserted.reference, inserted.createdBy, inserted.createdAt
+    VALUES (?, ?, ?, ?, ?, GETDATE())
+"""
+
+
+def is_valid_movement(movement_type, delta):
+    if movement_type not in MOVEMENT_TYPES or delta == 0:
+        return False
+    sign = MOVEMENT_TYPES[movement_type]
+    return sign == 0 or (delta > 0) == (sign > 0)
+
+
+def apply_movement(cursor, product_id, movement_type, delta, reference, username):
+    # The balance is adjusted in place (quantity = quantity + delta), so
+    # concurrent writers never overwrite each other; stock may not go negative.
+    cursor.execute(
+        """
+        MERGE INTO Inventory AS target
+        USING (VALUES (?, ?)) AS source (productId, delta)
+        ON target.productId = source.productId
+        WHEN MATCHED AND target.quantity + source.delta >= 0 THEN
+            UPDATE SET quantity = target.quantity + source.delta, updatedAt = GETDATE()
+        WHEN NOT MATCHED AND source.delta >= 0 THEN
+            INSERT (productId, quantity, createdAt, updatedAt)
+            VALUES (source.productId, source.delta, GETDATE(), GETDATE())
+        OUTPUT inserted.quantity;
+        """,
+        (product_id, delta),
+    )
+    balance = cursor.fetchone()
+    if balance is None:
+        return None
+
+    cursor.execute(INSERT_MOVEMENT_QUERY, (product_id, movement_type, delta, reference, username))
+    return cursor.fetchone(), balance[0]
+
+
+def set_quantity(cursor, product_id, quantity, reference, username):
+    cursor.execute(
+        """
+        UPDATE Inventory
+        SET quantity=?, updatedAt=GETDATE()
+        OUTPUT deleted.quantity
+        WHERE productId=?
+        """,
+        (quantity, product_id),
+    )
+    previous = cursor.fetchone()
+    if previous is None:
+        return False
+
+    if quantity != previous[0]:
+        cursor.execute(INSERT_MOVEMENT_QUERY, (product_id, "adjustment", quantity - previous[0], reference, username))
+        cursor.fetchone()
+    return True
+
+
+def last_quantities(items):
+    # (product_id, quantity) pairs with one entry per product, the last one
+    # winning, so ledger deltas and the MERGE agree on repeated product ids
+    return list(dict(items).items())
+
+
+def record_adjustments(cursor, items, reference, username):
+    # Ledger entries for absolute quantities (initialize/import), computed
+    # against the current balances before they are merged. Chunked to stay
+    # under the 2100 parameter limit of SQL Server.
+    for start in range(0, len(items), ADJUSTMENT_CHUNK_SIZE):
+        chunk = items[start:start + ADJUSTMENT_CHUNK_SIZE]
+        values = ", ".join("(?, ?)" for _ in chunk)
+        params = [reference, username]
+        for product_id, quantity in chunk:
+            params.extend((product_id, quantity))
+        cursor.execute(
+            f"""
+            INSERT INTO InventoryMovements (productId, movementType, delta, reference, createdBy, createdAt)
+            SELECT source.productId, 'adjustment', source.quantity - ISNULL(i.quantity, 0), ?, ?, GETDATE()
+            FROM (VALUES {values}) AS source (productId, quantity)
+            LEFT JOIN Inventory i ON i.productId = source.productId
+            WHERE source.quantity <> ISNULL(i.quantity, 0)
+            """,
+            params,
+        )
+
+
+def refresh_low_stock(cursor, product_ids):
+    # Re-evaluates only the touched products against the LowStockItems set and
+    # returns the ones that newly crossed their reorder level.
+    product_ids = list(dict.fromkeys(product_ids))
+    if not product_ids:
+        return []
+
+    # Chunked like record_adjustments: initialize and import pass whole payloads
+    crossed = []
+    for start in range(0, len(product_ids), ADJUSTMENT_CHUNK_SIZE):
+        chunk = product_ids[start:start + ADJUSTMENT_CHUNK_SIZE]
+        placeholders = ", ".join("?" for _ in chunk)
+        cursor.execute(
+            f"""
+            MERGE INTO LowStockItems AS target
+            USING (
+                SELECT productId, quantity, reorderLevel FROM Inventory WHERE productId IN ({placeholders})
+            ) AS source
+            ON target.productId = source.productId
+            WHEN MATCHED AND source.quantity > source.reorderLevel THEN
+                DELETE
+            WHEN MATCHED THEN
+                UPDATE SET quantity = source.quantity, reorderLevel = source.reorderLevel, updatedAt = GETDATE()
+            WHEN NOT MATCHED AND source.quantity <= source.reorderLevel THEN
+                INSERT (productId, quantity, reorderLevel, flaggedAt, updatedAt)
+                VALUES (source.productId, source.quantity, source.reorderLevel, GETDATE(), GETDATE())
+            OUTPUT $action, inserted.productId, inserted.quantity, inserted.reorderLevel;
+            """,
+            chunk,
+        )
+        crossed.extend((row[1], row[2], row[3]) for row in cursor.fetchall() if row[0] == "INSERT")
+
+    for product_id, quantity, reorder_level in crossed:
+        cursor.execute(
+            """
+            INSERT INTO Notifications (userId, message, isRead, createdAt, updatedAt)
+            SELECT u.userId, ?, 0, GETDATE(), GETDATE()
+            FROM Users u
+            JOIN Admins a ON a.username = u.username
+            """,
+            (LOW_STOCK_MESSAGE.format(product_id=product_id, quantity=quantity, reorder_level=reorder_level),),
+        )
+
+    return crossed
@@ -0,0 +1,17 @@
+from fastapi import APIRouter, Header, HTTPException, Response, status
+from typing import Optional
+
+from app.services.metricsServices import METRICS_TOKEN, render_metrics
+
+router = APIRouter()
+
+
+@router.get("/metrics", include_in_schema=False)
+async def get_metrics(authorization: Optional[str] = Header(None)):
+    if METRICS_TOKEN and authorization != f"Bearer {METRICS_TOKEN}":
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid metrics token")
+    try:
+        return Response(render_metrics(), media_type="text/plain; version=0.0.4; charset=utf-8")
+    except Exception as e:
+        print(f"Exception: {e}")
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Error rendering metrics")
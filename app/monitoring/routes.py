@@ -0,0 +1,74 @@
+import asyncio
+
+from fastapi import APIRouter, HTTPException, Depends, Query, status
+from fastapi.responses import PlainTextResponse
+from fastapi.security import OAuth2PasswordBearer
+from typing import Any, Dict
+
+from app.auth.token import verify_token
+from app.utils.is_admin import is_admin
+from app.utils.profiler import PROFILE_INTERVAL_MS, PROFILE_MAX_SECONDS, finish_live, start_live
+from app.utils.query_stats import stats
+
+router = APIRouter()
+oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/admin/auth/login")
+
+
+async def require_admin(token):
+    payload = verify_token(token)
+    if not await is_admin(payload.get("sub")):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized")
+
+
+@router.get("/admin/monitoring/queries")
+async def get_query_stats(
+    top: int = Query(50, ge=1, le=500, description="Normalized statements to list, by total DB time"),
+    token: str = Depends(oauth2_scheme),
+) -> Dict[str, Any]:
+    try:
+        await require_admin(token)
+        return stats.snapshot(top)
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"Exception: {e}")
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Error fetching query stats")
+
+
+@router.delete("/admin/monitoring/queries")
+async def reset_query_stats(token: str = Depends(oauth2_scheme)) -> Dict[str, str]:
+    try:
+        await require_admin(token)
+        stats.reset()
+        return {"detail": "Query stats reset"}
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"Exception: {e}")
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Error resetting query stats")
+
+
+@router.post("/admin/monitoring/profile", response_class=PlainTextResponse)
+async def profile_worker(
+    seconds: float = Query(10, gt=0, le=PROFILE_MAX_SECONDS, description="How long to sample"),
+    interval_ms: float = Query(PROFILE_INTERVAL_MS, ge=1, le=1000, description="Time between samples"),
+    idle: bool = Query(False, description="Keep samples of threads waiting for work"),
+    token: str = Depends(oauth2_scheme),
+):
+    # Samples every thread of the worker serving this request while it keeps
+    # serving traffic; the result is collapsed stacks for a flamegraph.
+    try:
+        await require_admin(token)
+        sampler = start_live(interval_ms / 1000, idle)
+        if sampler is None:
+            raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="A profile is already running on this worker")
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            finish_live(sampler)
+        return PlainTextResponse(sampler.collapsed(), headers=sampler.headers())
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"Exception: {e}")
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Error profiling worker")
@@ -0,0 +1,66 @@
+import asyncio
+import os
+import threading
+
+QUEUE_SIZE = int(os.getenv("NOTIFICATION_QUEUE_SIZE", 100))
+
+
+def _offer(queue, event):
+    # Slow consumers lose their oldest pending event rather than blocking producers
+    if queue.full():
+        try:
+            queue.get_nowait()
+        except asyncio.QueueEmpty:
+            pass
+    queue.put_nowait(event)
+
+
+class NotificationHub:
+    def __init__(self, queue_size=QUEUE_SIZE):
+        self.queue_size = queue_size
+        self._subscribers = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self, user_id):
+        subscription = (asyncio.get_running_loop(), asyncio.Queue(maxsize=self.queue_size))
+        with self._lock:
+            self._subscribers.setdefault(user_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, user_id, subscription):
+        with self._lock:
+            subscriptions = self._subscribers.get(user_id)
+            if subscriptions is None:
+                return
+            subscriptions.discard(subscription)
+            if not subscriptions:
+                del self._subscribers[user_id]
+
+    def has_subscribers(self):
+        return bool(self._subscribers)
+
+    def connection_count(self):
+        with self._lock:
+            return sum(len(subscriptions) for subscriptions in self._subscribers.values())
+
+    def publish(self, user_id, event):
+        with self._lock:
+            subscriptions = list(self._subscribers.get(user_id, ()))
+        for loop, queue in subscriptions:
+            self._deliver(loop, queue, event)
+
+    def _deliver(self, loop, queue, event):
+        # Producers may run in the threadpool (background tasks), so hand the
+        # event to the subscriber's loop unless we are already on it.
+        try:
+            running_loop = asyncio.get_running_loop()
+        except RuntimeError:
+            running_loop = None
+
+        if running_loop is loop:
+            _offer(queue, event)
+        elif not loop.is_closed():
+            loop.call_soon_threadsafe(_offer, queue, event)
+
+
+hub = NotificationHub()
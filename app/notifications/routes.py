@@ -1,16 +1,103 @@
-from fastapi import APIRouter, HTTPException, status, Depends
-from typing import List
+import asyncio
+import json
+import os
+import time
+
+from fastapi import APIRouter, BackgroundTasks, HTTPException, status, Depends, Query, Request
+from fastapi.responses import StreamingResponse
+from typing import List, Optional
 from pydantic import BaseModel
 from fastapi.security import OAuth2PasswordBearer
 
 from app.auth.token import verify_token
 from app.services.dbServices import connect_to_database
+from app.services.projectionServices import Projection
 from app.utils.is_admin import is_admin
-from app.notifications.schemas import NotificationResponse, NotificationCreate, NotificationUpdate
+from app.notifications.schemas import (
+    NotificationResponse,
+    NotificationCreate,
+    NotificationUpdate,
+    NotificationMarkRead,
+    UnreadCountResponse,
+    BroadcastCreate,
+    BroadcastResponse,
+)
+from app.notifications.services import BROADCAST_STALE_SECONDS, SEGMENTS, segment_requires_target, run_broadcast
+from app.notifications.hub import hub
 from app.utils.date_convert import format_datetime
 
 router = APIRouter()
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/admin/auth/login")
+# EventSource cannot set headers, so the stream also accepts ?access_token=
+stream_oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/admin/auth/login", auto_error=False)
+
+MAX_MARK_READ_IDS = 1000
+HEARTBEAT_INTERVAL = float(os.getenv("NOTIFICATION_HEARTBEAT_INTERVAL", 15))
+# Catch-up query for notifications produced by other workers; 0 disables it
+STREAM_SYNC_INTERVAL = float(os.getenv("NOTIFICATION_STREAM_SYNC_INTERVAL", 60))
+
+BROADCAST_COLUMN_NAMES = [
+    "broadcastId", "message", "segment", "targetId", "status", "totalTargets", "processed", "createdAt", "updatedAt"
+]
+BROADCAST_COLUMNS = ", ".join(BROADCAST_COLUMN_NAMES)
+BROADCAST_OUTPUT = ", ".join(f"inserted.{column}" for column in BROADCAST_COLUMN_NAMES)
+
+
+NOTIFICATION = Projection("NotificationRow", {
+    "notification_id": "n.notificationId",
+    "user_id": "n.userId",
+    "message": "n.message",
+    "is_read": "n.isRead",
+    "created_at": "n.createdAt",
+    "updated_at": "n.updatedAt",
+})
+
+
+def _notification_row(item):
+    return {
+        "notification_id": item.notification_id,
+        "user_id": item.user_id,
+        "message": item.message,
+        "is_read": item.is_read,
+        "created_at": format_datetime(item.created_at),
+        "updated_at": format_datetime(item.updated_at),
+    }
+
+
+def _sse_event(notification):
+    return f"id: {notification['notification_id']}\nevent: notification\ndata: {json.dumps(notification, default=str)}\n\n"
+
+
+async def _fetch_notifications_since(user_id, last_id):
+    conn = await connect_to_database()
+    cursor = conn.cursor()
+    cursor.execute(
+        f"""
+        SELECT {NOTIFICATION.columns}
+        FROM Notifications n
+        WHERE n.userId=? AND n.notificationId > ?
+        ORDER BY n.notificationId
+        """,
+        (user_id, last_id),
+    )
+    notifications = NOTIFICATION.all(cursor)
+    cursor.close()
+    conn.close()
+    return [_notification_row(item) for item in notifications]
+
+
+def _broadcast_row(broadcast):
+    return {
+        "broadcast_id": broadcast[0],
+        "message": broadcast[1],
+        "segment": broadcast[2],
+        "target_id": broadcast[3],
+        "status": broadcast[4],
+        "total_targets": broadcast[5],
+        "processed": broadcast[6],
+        "created_at": format_datetime(broadcast[7]),
+        "updated_at": format_datetime(broadcast[8]),
+    }
 
 @router.get("/notifications", response_model=List[NotificationResponse])
 async def get_notifications(token: str = Depends(oauth2_scheme)):
@@ -29,27 +116,231 @@ async def get_notifications(token: str = Depends(oauth2_scheme)):
 
         user_id = user[0]
 
-        cursor.execute("SELECT * FROM Notifications WHERE userId=?", (user_id,))
-        notifications = cursor.fetchall()
+        cursor.execute(f"SELECT {NOTIFICATION.columns} FROM Notifications n WHERE n.userId=?", (user_id,))
+        notifications = NOTIFICATION.all(cursor)
 
         cursor.close()
         conn.close()
 
-        return [
-            {
-                "notification_id": item[0],
-                "user_id": item[1],
-                "message": item[2],
-                "is_read": item[3],
-                "created_at": format_datetime(item[4]),
-                "updated_at": format_datetime(item[5]),
-            }
-            for item in notifications
-        ]
+        return [_notification_row(item) for item in notifications]
     except Exception as e:
         print(f"Exception: {e}")
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Error fetching notifications")
 
+@router.get("/notifications/feed", response_model=List[NotificationResponse])
+async def get_notification_feed(
+    limit: int = Query(20, ge=1, le=100),
+    before_id: Optional[int] = Query(None, description="Return notifications older than this notification id"),
+    token: str = Depends(oauth2_scheme),
+):
+    try:
+        payload = verify_token(token)
+        username = payload.get("sub")
+
+        conn = await connect_to_database()
+        cursor = conn.cursor()
+
+        query = f"""
+            SELECT TOP (?) {NOTIFICATION.columns}
+            FROM Notifications n
+            WHERE n.userId = (SELECT userId FROM Users WHERE username=?)
+        """
+        params = [limit, username]
+        if before_id is not None:
+            query += " AND n.notificationId < ?"
+            params.append(before_id)
+        query += " ORDER BY n.notificationId DESC"
+
+        cursor.execute(query, params)
+        notifications = NOTIFICATION.all(cursor)
+
+        cursor.close()
+        conn.close()
+
+        return [_notification_row(item) for item in notifications]
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"Exception: {e}")
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Error fetching notifications")
+
+@router.get("/notifications/unread-count", response_model=UnreadCountResponse)
+async def get_unread_count(token: str = Depends(oauth2_scheme)):
+    try:
+        payload = verify_token(token)
+        username = payload.get("sub")
+
+        conn = await connect_to_database()
+        cursor = conn.cursor()
+
+        cursor.execute(
+            """
+            SELECT COUNT(*)
+            FROM Notifications
+            WHERE userId = (SELECT userId FROM Users WHERE username=?) AND isRead = 0
+            """,
+            (username,),
+        )
+        unread_count = cursor.fetchone()[0]
+
+        cursor.close()
+        conn.close()
+
+        return {"unread_count": unread_count}
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"Exception: {e}")
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Error fetching unread count")
+
+@router.put("/notifications/read")
+async def mark_notifications_read(mark_read: NotificationMarkRead, token: str = Depends(oauth2_scheme)):
+    try:
+        payload = verify_token(token)
+        username = payload.get("sub")
+
+        notification_ids = list(dict.fromkeys(mark_read.notification_ids))
+        if not notification_ids:
+            return {"updated": 0}
+
+        if len(notification_ids) > MAX_MARK_READ_IDS:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"At most {MAX_MARK_READ_IDS} notifications can be marked at once",
+            )
+
+        conn = await connect_to_database()
+        cursor = conn.cursor()
+
+        placeholders = ", ".join("?" for _ in notification_ids)
+        cursor.execute(
+            f"""
+            UPDATE Notifications
+            SET isRead = 1, updatedAt = GETDATE()
+            WHERE userId = (SELECT userId FROM Users WHERE username=?)
+              AND isRead = 0
+              AND notificationId IN ({placeholders})
+            """,
+            [username, *notification_ids],
+        )
+        updated = cursor.rowcount
+        conn.commit()
+
+        cursor.close()
+        conn.close()
+
+        return {"updated": updated}
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"Exception: {e}")
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Error marking notifications as read")
+
+@router.put("/notifications/read-all")
+async def mark_all_notifications_read(token: str = Depends(oauth2_scheme)):
+    try:
+        payload = verify_token(token)
+        username = payload.get("sub")
+
+        conn = await connect_to_database()
+        cursor = conn.cursor()
+
+        cursor.execute(
+            """
+            UPDATE Notifications
+            SET isRead = 1, updatedAt = GETDATE()
+            WHERE userId = (SELECT userId FROM Users WHERE username=?) AND isRead = 0
+            """,
+            (username,),
+        )
+        updated = cursor.rowcount
+        conn.commit()
+
+        cursor.close()
+        conn.close()
+
+        return {"updated": updated}
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"Exception: {e}")
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Error marking notifications as read")
+
+@router.get("/notifications/stream")
+async def stream_notifications(
+    request: Request,
+    access_token: Optional[str] = Query(None),
+    token: Optional[str] = Depends(stream_oauth2_scheme),
+):
+    if not (token or access_token):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Not authenticated")
+
+    try:
+        payload = verify_token(token or access_token)
+        username = payload.get("sub")
+
+        conn = await connect_to_database()
+        cursor = conn.cursor()
+
+        cursor.execute(
+            "SELECT u.userId, ISNULL(MAX(n.notificationId), 0) FROM Users u "
+            "LEFT JOIN Notifications n ON n.userId = u.userId WHERE u.username=? GROUP BY u.userId",
+            (username,),
+        )
+        user = cursor.fetchone()
+
+        cursor.close()
+        conn.close()
+
+        if not user:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
+
+        user_id, latest_id = user
+        last_event_id = request.headers.get("last-event-id")
+        last_id = int(last_event_id) if last_event_id and last_event_id.isdigit() else latest_id
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"Exception: {e}")
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Error opening notification stream")
+
+    subscription = hub.subscribe(user_id)
+
+    async def event_stream():
+        nonlocal last_id
+        _, queue = subscription
+        last_sync = time.monotonic()
+        try:
+            if last_id < latest_id:
+                for notification in await _fetch_notifications_since(user_id, last_id):
+                    last_id = notification["notification_id"]
+                    yield _sse_event(notification)
+
+            while not await request.is_disconnected():
+                try:
+                    notification = await asyncio.wait_for(queue.get(), timeout=HEARTBEAT_INTERVAL)
+                except asyncio.TimeoutError:
+                    if STREAM_SYNC_INTERVAL and time.monotonic() - last_sync >= STREAM_SYNC_INTERVAL:
+                        last_sync = time.monotonic()
+                        for missed in await _fetch_notifications_since(user_id, last_id):
+                            last_id = missed["notification_id"]
+                            yield _sse_event(missed)
+                    yield ": heartbeat\n\n"
+                    continue
+
+                if notification["notification_id"] <= last_id:
+                    continue
+                last_id = notification["notification_id"]
+                yield _sse_event(notification)
+        finally:
+            hub.unsubscribe(user_id, subscription)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
 @router.post("/admin/notifications", response_model=NotificationResponse)
 async def create_notification(notification_create: NotificationCreate, token: str = Depends(oauth2_scheme)):
     try:
@@ -71,8 +362,8 @@ async def create_notification(notification_create: NotificationCreate, token: st
         )
         conn.commit()
 
-        cursor.execute("SELECT * FROM Notifications WHERE notificationId=@@IDENTITY")
-        new_notification = cursor.fetchone()
+        cursor.execute(f"SELECT {NOTIFICATION.columns} FROM Notifications n WHERE n.notificationId=@@IDENTITY")
+        new_notification = NOTIFICATION.one(cursor)
 
         cursor.close()
         conn.close()
@@ -80,18 +371,128 @@ async def create_notification(notification_create: NotificationCreate, token: st
         if not new_notification:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Failed to create notification")
 
-        return {
-            "notification_id": new_notification[0],
-            "user_id": new_notification[1],
-            "message": new_notification[2],
-            "is_read": new_notification[3],
-            "created_at": format_datetime(new_notification[4]),
-            "updated_at": format_datetime(new_notification[5]),
-        }
+        notification = _notification_row(new_notification)
+        hub.publish(notification["user_id"], notification)
+
+        return notification
     except Exception as e:
         print(f"Exception: {e}")
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Error creating notification")
 
+@router.post("/admin/notifications/broadcast", response_model=BroadcastResponse)
+async def create_broadcast(
+    broadcast: BroadcastCreate, background_tasks: BackgroundTasks, token: str = Depends(oauth2_scheme)
+):
+    try:
+        payload = verify_token(token)
+        username = payload.get("sub")
+
+        if not await is_admin(username):
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized")
+
+        if broadcast.segment not in SEGMENTS:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Unknown segment")
+
+        if segment_requires_target(broadcast.segment) and broadcast.target_id is None:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Segment requires target_id")
+
+        conn = await connect_to_database()
+        cursor = conn.cursor()
+
+        cursor.execute(
+            f"""
+            INSERT INTO NotificationBroadcasts (message, segment, targetId, status, processed, lastUserId, createdBy, createdAt, updatedAt)
+            OUTPUT {BROADCAST_OUTPUT}
+            VALUES (?, ?, ?, 'Queued', 0, 0, ?, GETDATE(), GETDATE())
+            """,
+            (broadcast.message, broadcast.segment, broadcast.target_id, username),
+        )
+        new_broadcast = cursor.fetchone()
+        conn.commit()
+
+        cursor.close()
+        conn.close()
+
+        background_tasks.add_task(run_broadcast, new_broadcast[0], 0)
+
+        return _broadcast_row(new_broadcast)
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"Exception: {e}")
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Error creating broadcast")
+
+@router.get("/admin/notifications/broadcasts/{broadcast_id}", response_model=BroadcastResponse)
+async def get_broadcast(broadcast_id: int, token: str = Depends(oauth2_scheme)):
+    try:
+        payload = verify_token(token)
+        username = payload.get("sub")
+
+        if not await is_admin(username):
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized")
+
+        conn = await connect_to_database()
+        cursor = conn.cursor()
+
+        cursor.execute(f"SELECT {BROADCAST_COLUMNS} FROM NotificationBroadcasts WHERE broadcastId=?", (broadcast_id,))
+        broadcast = cursor.fetchone()
+
+        cursor.close()
+        conn.close()
+
+        if not broadcast:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Broadcast not found")
+
+        return _broadcast_row(broadcast)
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"Exception: {e}")
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Error fetching broadcast")
+
+@router.post("/admin/notifications/broadcasts/{broadcast_id}/resume", response_model=BroadcastResponse)
+async def resume_broadcast(broadcast_id: int, background_tasks: BackgroundTasks, token: str = Depends(oauth2_scheme)):
+    try:
+        payload = verify_token(token)
+        username = payload.get("sub")
+
+        if not await is_admin(username):
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized")
+
+        conn = await connect_to_database()
+        cursor = conn.cursor()
+
+        # Failed jobs, and Running/Queued ones whose worker stopped touching
+        # them. The new attempt takes the job over: a worker still running the
+        # old one finds its attempt gone at its next batch and stops.
+        cursor.execute(
+            f"""
+            UPDATE NotificationBroadcasts
+            SET status='Queued', attempt=attempt + 1, updatedAt=GETDATE()
+            OUTPUT {BROADCAST_OUTPUT}, inserted.attempt
+            WHERE broadcastId=?
+              AND (status='Failed' OR (status IN ('Running', 'Queued') AND updatedAt < DATEADD(second, -?, GETDATE())))
+            """,
+            (broadcast_id, BROADCAST_STALE_SECONDS),
+        )
+        broadcast = cursor.fetchone()
+        conn.commit()
+
+        cursor.close()
+        conn.close()
+
+        if not broadcast:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="No failed or stalled broadcast with this id")
+
+        background_tasks.add_task(run_broadcast, broadcast_id, broadcast[-1])
+
+        return _broadcast_row(broadcast)
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"Exception: {e}")
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Error resuming broadcast")
+
 @router.delete("/notifications/{notification_id}", response_model=NotificationResponse)
 async def delete_notification(notification_id: int, token: str = Depends(oauth2_scheme)):
     try:
@@ -101,8 +502,8 @@ async def delete_notification(notification_id: int, token: str = Depends(oauth2_
         conn = await connect_to_database()
         cursor = conn.cursor()
 
-        cursor.execute("SELECT * FROM Notifications WHERE notificationId=?", (notification_id,))
-        notification = cursor.fetchone()
+        cursor.execute(f"SELECT {NOTIFICATION.columns} FROM Notifications n WHERE n.notificationId=?", (notification_id,))
+        notification = NOTIFICATION.one(cursor)
 
         if not notification:
             cursor.close()
@@ -115,14 +516,7 @@ async def delete_notification(notification_id: int, token: str = Depends(oauth2_
         cursor.close()
         conn.close()
 
-        return {
-            "notification_id": notification[0],
-            "user_id": notification[1],
-            "message": notification[2],
-            "is_read": notification[3],
-            "created_at": format_datetime(notification[4]),
-            "updated_at": format_datetime(notification[5]),
-        }
+        return _notification_row(notification)
     except Exception as e:
         print(f"Exception: {e}")
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Error deleting notification")
@@ -1,5 +1,6 @@
 from pydantic import BaseModel
 from datetime import datetime
+from typing import List, Optional
 
 class NotificationBase(BaseModel):
     message: str
@@ -16,3 +17,25 @@ class NotificationResponse(NotificationBase):
 
 class NotificationUpdate(BaseModel):
     is_read: bool
+
+class NotificationMarkRead(BaseModel):
+    notification_ids: List[int]
+
+class UnreadCountResponse(BaseModel):
+    unread_count: int
+
+class BroadcastCreate(BaseModel):
+    message: str
+    segment: str = "all"
+    target_id: Optional[int] = None
+
+class BroadcastResponse(BaseModel):
+    broadcast_id: int
+    message: str
+    segment: str
+    target_id: Optional[int] = None
+    status: str
+    total_targets: Optional[int] = None
+    processed: int
+    created_at: str
+    updated_at: str
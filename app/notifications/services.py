@@ -0,0 +1,152 @@
+import os
+import time
+
+from app.services.dbServices import open_connection
+from app.notifications.hub import hub
+from app.utils.date_convert import format_datetime
+
+BROADCAST_BATCH_SIZE = int(os.getenv("BROADCAST_BATCH_SIZE", 5000))
+BROADCAST_BATCH_DELAY = float(os.getenv("BROADCAST_BATCH_DELAY", 0.05))
+# A Running or Queued job whose updatedAt is older than this lost its worker
+# (restart, deploy, crash) and may be resumed; live jobs touch updatedAt after
+# every batch.
+BROADCAST_STALE_SECONDS = float(os.getenv("BROADCAST_STALE_SECONDS", max(120, BROADCAST_BATCH_DELAY * 10)))
+
+# Extra predicate on Users u per segment; "?" is bound to the broadcast targetId.
+SEGMENTS = {
+    "all": "",
+    "product_buyers": """
+        AND EXISTS (
+            SELECT 1 FROM Orders o
+            JOIN OrderItems oi ON oi.orderId = o.orderId
+            WHERE o.userId = u.userId AND oi.productId = ?
+        )
+    """,
+    "category_buyers": """
+        AND EXISTS (
+            SELECT 1 FROM Orders o
+            JOIN OrderItems oi ON oi.orderId = o.orderId
+            JOIN Products p ON p.productId = oi.productId
+            WHERE o.userId = u.userId AND p.categoryId = ?
+        )
+    """,
+}
+
+
+def segment_requires_target(segment):
+    return "?" in SEGMENTS[segment]
+
+
+def _segment_params(segment, target_id):
+    return [target_id] if segment_requires_target(segment) else []
+
+
+def _superseded(conn, cursor, broadcast_id):
+    # A guarded UPDATE that matched nothing: the job was resumed under a newer
+    # attempt, so this run drops its uncommitted batch and stops.
+    if cursor.rowcount:
+        return False
+    conn.rollback()
+    print(f"Broadcast {broadcast_id} was taken over by a newer attempt, stopping")
+    return True
+
+
+def run_broadcast(broadcast_id, attempt):
+    # Runs in the threadpool after the request has returned. Users are walked
+    # in userId ranges and each range is one INSERT ... SELECT committed on its
+    # own, so locks are short-lived and a failed job can resume from lastUserId.
+    # Every progress update requires this run's attempt and commits together
+    # with its range, so a run superseded by a resume never inserts twice.
+    conn = open_connection()
+    cursor = conn.cursor()
+    try:
+        cursor.execute(
+            "SELECT message, segment, targetId, lastUserId FROM NotificationBroadcasts WHERE broadcastId=?",
+            (broadcast_id,),
+        )
+        message, segment, target_id, last_user_id = cursor.fetchone()
+        predicate = SEGMENTS[segment]
+        segment_params = _segment_params(segment, target_id)
+
+        cursor.execute(
+            f"SELECT COUNT(*) FROM Users u WHERE u.userId > ? {predicate}",
+            [last_user_id, *segment_params],
+        )
+        remaining = cursor.fetchone()[0]
+        cursor.execute(
+            """
+            UPDATE NotificationBroadcasts
+            SET status='Running', totalTargets=processed + ?, updatedAt=GETDATE()
+            WHERE broadcastId=? AND attempt=?
+            """,
+            (remaining, broadcast_id, attempt),
+        )
+        if _superseded(conn, cursor, broadcast_id):
+            return
+        conn.commit()
+
+        while True:
+            cursor.execute(
+                "SELECT MAX(userId) FROM (SELECT TOP (?) userId FROM Users WHERE userId > ? ORDER BY userId) batch",
+                (BROADCAST_BATCH_SIZE, last_user_id),
+            )
+            upper_user_id = cursor.fetchone()[0]
+            if upper_user_id is None:
+                break
+
+            # Only ask for the new rows back when someone is listening for pushes
+            live = hub.has_subscribers()
+            cursor.execute(
+                f"""
+                INSERT INTO Notifications (userId, message, isRead, createdAt, updatedAt)
+                {"OUTPUT inserted.notificationId, inserted.userId, inserted.createdAt" if live else ""}
+                SELECT u.userId, ?, 0, GETDATE(), GETDATE()
+                FROM Users u
+                WHERE u.userId > ? AND u.userId <= ? {predicate}
+                """,
+                [message, last_user_id, upper_user_id, *segment_params],
+            )
+            created = cursor.fetchall() if live else []
+            inserted = len(created) if live else cursor.rowcount
+            cursor.execute(
+                """
+                UPDATE NotificationBroadcasts
+                SET processed=processed + ?, lastUserId=?, updatedAt=GETDATE()
+                WHERE broadcastId=? AND attempt=?
+                """,
+                (inserted, upper_user_id, broadcast_id, attempt),
+            )
+            if _superseded(conn, cursor, broadcast_id):
+                return
+            conn.commit()
+
+            for notification_id, user_id, created_at in created:
+                hub.publish(user_id, {
+                    "notification_id": notification_id,
+                    "user_id": user_id,
+                    "message": message,
+                    "is_read": False,
+                    "created_at": format_datetime(created_at),
+                    "updated_at": format_datetime(created_at),
+                })
+
+            last_user_id = upper_user_id
+            if BROADCAST_BATCH_DELAY:
+                time.sleep(BROADCAST_BATCH_DELAY)
+
+        cursor.execute(
+            "UPDATE NotificationBroadcasts SET status='Completed', updatedAt=GETDATE() WHERE broadcastId=? AND attempt=?",
+            (broadcast_id, attempt),
+        )
+        conn.commit()
+    except Exception as e:
+        print(f"Broadcast {broadcast_id} failed: {e}")
+        conn.rollback()
+        cursor.execute(
+            "UPDATE NotificationBroadcasts SET status='Failed', updatedAt=GETDATE() WHERE broadcastId=? AND attempt=?",
+            (broadcast_id, attempt),
+        )
+        conn.commit()
+    finally:
+        cursor.close()
+        conn.close()
@@ -0,0 +1,84 @@
+DEFAULT_PRICE_BUCKETS = [25, 50, 100, 250, 500]
+
+
+def parse_variant_filters(values):
+    # "Size:M" pairs grouped by type: values of one type are OR-ed, types are AND-ed
+    filters = {}
+    for value in values:
+        variant_type, separator, variant_value = value.partition(":")
+        if not separator or not variant_type or not variant_value:
+            raise ValueError(f"Invalid variant filter: {value}")
+        filters.setdefault(variant_type, []).append(variant_value)
+    return filters
+
+
+def build_facet_query(name=None, category_id=None, min_price=None, max_price=None, variants=None, price_buckets=None):
+    # Every facet is computed from the same filtered set in one round trip
+    price_buckets = sorted(price_buckets or DEFAULT_PRICE_BUCKETS)
+
+    where = "WHERE 1=1"
+    params = []
+    if name:
+        where += " AND p.name LIKE ?"
+        params.append(f"%{name}%")
+    if category_id is not None:
+        where += " AND p.categoryId = ?"
+        params.append(category_id)
+    if min_price is not None:
+        where += " AND p.price >= ?"
+        params.append(min_price)
+    if max_price is not None:
+        where += " AND p.price <= ?"
+        params.append(max_price)
+    for variant_type, variant_values in (variants or {}).items():
+        placeholders = ", ".join("?" for _ in variant_values)
+        where += f"""
+            AND EXISTS (
+                SELECT 1 FROM ProductVariants fv
+                WHERE fv.productId = p.productId AND fv.variantType = ? AND fv.variantValue IN ({placeholders})
+            )"""
+        params.extend([variant_type, *variant_values])
+
+    bucket_cases = " ".join(f"WHEN p.price < ? THEN {index}" for index in range(len(price_buckets)))
+
+    # GROUPING SETS lets one scan of the filtered products produce all facets;
+    # COUNT(DISTINCT) undoes the fan-out from the variant join.
+    query = f"""
+        WITH filtered AS (
+            SELECT p.productId, p.categoryId,
+                   CASE {bucket_cases} ELSE {len(price_buckets)} END AS bucket
+            FROM Products p {where}
+        )
+        SELECT GROUPING(f.categoryId), GROUPING(f.bucket), GROUPING(v.variantType),
+               f.categoryId, c.name, f.bucket, v.variantType, v.variantValue,
+               COUNT(DISTINCT f.productId)
+        FROM filtered f
+        LEFT JOIN Categories c ON c.categoryId = f.categoryId
+        LEFT JOIN ProductVariants v ON v.productId = f.productId
+        GROUP BY GROUPING SETS ((), (f.categoryId, c.name), (f.bucket), (v.variantType, v.variantValue))
+    """
+    return query, [*price_buckets, *params], price_buckets
+
+
+def collect_facets(rows, price_buckets):
+    facets = {"total": 0, "categories": [], "price_ranges": [], "variants": []}
+    bucket_counts = {}
+    for category_rollup, bucket_rollup, variant_rollup, category_id, category_name, bucket, variant_type, variant_value, count in rows:
+        if not category_rollup:
+            facets["categories"].append({"id": category_id, "name": category_name, "count": count})
+        elif not bucket_rollup:
+            bucket_counts[bucket] = count
+        elif not variant_rollup:
+            if variant_type is not None:
+                facets["variants"].append({"variant_type": variant_type, "variant_value": variant_value, "count": count})
+        else:
+            facets["total"] = count
+
+    bounds = [None, *price_buckets, None]
+    for index in range(len(price_buckets) + 1):
+        if index in bucket_counts:
+            facets["price_ranges"].append({"min": bounds[index], "max": bounds[index + 1], "count": bucket_counts[index]})
+
+    facets["categories"].sort(key=lambda item: -item["count"])
+    facets["variants"].sort(key=lambda item: (item["variant_type"], -item["count"]))
+    return facets
@@ -1,88 +1,372 @@
-from fastapi import APIRouter, HTTPException, Query, Depends, status
-from typing import List, Optional
+from fastapi import APIRouter, HTTPException, Query, Depends, Request, Response, status
+from fastapi.responses import StreamingResponse
+from typing import Dict, List, Optional, Union
 from fastapi.security import OAuth2PasswordBearer
 
-from app.products.schemas import ProductCreate, ProductUpdate, ProductResponse
+from app.products.schemas import ProductCreate, ProductUpdate, ProductResponse, ProductSummaryResponse, ProductImport, ProductSearchResult, ProductSuggestion, ProductFacets
 from app.services.dbServices import connect_to_database
+from app.services.httpCacheServices import http_cache, bump_versions
+from app.services.projectionServices import Projection
 from app.utils.date_convert import format_datetime
 from app.utils.is_admin import is_admin
 from app.auth.token import verify_token
+from app.reviews.services import RATING_JOIN
+from app.products.facets import parse_variant_filters, build_facet_query, collect_facets
+from app.products.search import search_index, ensure_search_index
+from app.products.suggest import suggest_index, ensure_suggest_index
+from app.products.services import (
+    MAX_BATCH_IDS,
+    PRODUCT_INCLUDES,
+    PRODUCT_DETAIL,
+    PRODUCT_VIEWS,
+    product_cache,
+    product_detail,
+    fetch_products_by_ids,
+    parse_include,
+    attach_variants,
+)
+from app.utils.serialization import FastJSONResponse
+from app.utils.bulk_io import SUPPORTED_FORMATS, MEDIA_TYPES, import_records, stream_rows
 
 router = APIRouter()
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/admin/auth/login")
 
-@router.get("/products", response_model=List[ProductResponse])
+PRODUCT_FIELDS = ["id", "name", "description", "price", "category_id", "image_url", "created_at", "updated_at"]
+
+MERGE_PRODUCT_QUERY = """
+    MERGE INTO Products AS target
+    USING (VALUES (?, ?, ?, ?, ?, ?)) AS source (productId, name, description, price, categoryId, imageUrl)
+    ON target.productId = source.productId
+    WHEN MATCHED THEN
+        UPDATE SET name = source.name, description = source.description, price = source.price,
+                   categoryId = source.categoryId, imageUrl = source.imageUrl, updatedAt = GETDATE()
+    WHEN NOT MATCHED THEN
+        INSERT (name, description, price, categoryId, imageUrl, createdAt, updatedAt)
+        VALUES (source.name, source.description, source.price, source.categoryId, source.imageUrl, GETDATE(), GETDATE());
+"""
+
+
+PRODUCT_RECORD = Projection("ProductRecord", {
+    "id": "p.productId",
+    "name": "p.name",
+    "description": "p.description",
+    "price": "p.price",
+    "category_id": "p.categoryId",
+    "image_url": "p.imageUrl",
+    "created_at": "p.createdAt",
+    "updated_at": "p.updatedAt",
+})
+
+
+def _product_row(product):
+    return {
+        "id": product.id,
+        "name": product.name,
+        "description": product.description,
+        "price": product.price,
+        "category_id": product.category_id,
+        "image_url": product.image_url,
+        "created_at": format_datetime(product.created_at),
+        "updated_at": format_datetime(product.updated_at)
+    }
+
+@router.get("/products", response_model=List[Union[ProductResponse, ProductSummaryResponse]], dependencies=[Depends(http_cache("products", "variants"))])
 async def get_all_products(
+    response: Response,
     name: Optional[str] = Query(None, description="Filter products by name"),
     min_price: Optional[float] = Query(None, description="Filter products by minimum price"),
-    max_price: Optional[float] = Query(None, description="Filter products by maximum price")
+    max_price: Optional[float] = Query(None, description="Filter products by maximum price"),
+    include: Optional[str] = Query(None, description="Comma-separated related data to embed: variants"),
+    view: str = Query("full", description="full, or summary to leave out descriptions"),
 ):
     try:
+        try:
+            includes = parse_include(include, PRODUCT_INCLUDES)
+        except ValueError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+        if view not in PRODUCT_VIEWS:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="view must be full or summary")
+        projection, to_response = PRODUCT_VIEWS[view]
+
         conn = await connect_to_database()
         cursor = conn.cursor()
         
-        query = "SELECT * FROM Products WHERE 1=1"
+        query = f"SELECT {projection.columns} FROM Products p {RATING_JOIN} WHERE 1=1"
         params = []
         if name:
-            query += " AND name LIKE ?"
+            query += " AND p.name LIKE ?"
             params.append(f"%{name}%")
         if min_price is not None:
-            query += " AND price >= ?"
+            query += " AND p.price >= ?"
             params.append(min_price)
         if max_price is not None:
-            query += " AND price <= ?"
+            query += " AND p.price <= ?"
             params.append(max_price)
         
         cursor.execute(query, params)
-        products = cursor.fetchall()
+        products = [to_response(product) for product in projection.all(cursor)]
+
+        if "variants" in includes:
+            products = attach_variants(cursor, products)
         
         cursor.close()
         conn.close()
         
-        return [
-            {
-                "id": product[0],
-                "name": product[1],
-                "description": product[2],
-                "price": product[3],
-                "category_id": product[4],
-                "image_url": product[5],
-                "created_at": format_datetime(product[6]),
-                "updated_at": format_datetime(product[7])
-            }
-            for product in products
-        ]
+        return FastJSONResponse(products, headers=response.headers)
+    except HTTPException:
+        raise
     except Exception as e:
         print('Exception:', e)
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Error fetching products")
     
 
 
-@router.get("/products/{productId}", response_model=ProductResponse)
-async def get_product_details(productId: int):
+@router.get("/products/facets", response_model=ProductFacets)
+async def get_product_facets(
+    name: Optional[str] = Query(None, description="Filter products by name"),
+    category_id: Optional[int] = Query(None, description="Filter products by category"),
+    min_price: Optional[float] = Query(None, description="Filter products by minimum price"),
+    max_price: Optional[float] = Query(None, description="Filter products by maximum price"),
+    variant: List[str] = Query([], description="Variant filters as type:value, e.g. Size:M"),
+    price_buckets: Optional[str] = Query(None, description="Comma-separated price bucket boundaries"),
+):
     try:
+        try:
+            variants = parse_variant_filters(variant)
+            buckets = [float(value) for value in price_buckets.split(",") if value.strip()] if price_buckets else None
+        except ValueError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+        query, params, buckets = build_facet_query(name, category_id, min_price, max_price, variants, buckets)
+
         conn = await connect_to_database()
         cursor = conn.cursor()
 
-        cursor.execute("SELECT * FROM Products WHERE productId=?", (productId,))
-        product = cursor.fetchone()
+        cursor.execute(query, params)
+        rows = cursor.fetchall()
 
         cursor.close()
         conn.close()
 
-        if not product:
-            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Product not found")
+        return collect_facets(rows, buckets)
+    except HTTPException:
+        raise
+    except Exception as e:
+        print('Exception:', e)
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Error fetching product facets")
+
+
+@router.get("/products/suggest", response_model=List[ProductSuggestion])
+async def suggest_products(
+    q: str = Query(..., min_length=1, description="Prefix typed so far"),
+    limit: int = Query(10, ge=1, le=50),
+):
+    try:
+        if suggest_index.is_stale:
+            conn = await connect_to_database()
+            cursor = conn.cursor()
+            ensure_suggest_index(cursor)
+            cursor.close()
+            conn.close()
+
+        return suggest_index.suggest(q, limit)
+    except HTTPException:
+        raise
+    except Exception as e:
+        print('Exception:', e)
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Error fetching suggestions")
+
+
+@router.get("/products/search", response_model=List[ProductSearchResult])
+async def search_products(
+    q: str = Query(..., min_length=1, description="Search terms; the last may be a prefix"),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+):
+    try:
+        conn = await connect_to_database()
+        cursor = conn.cursor()
+
+        ensure_search_index(cursor)
+        ranked = search_index.search(q, limit, offset)
+        products = fetch_products_by_ids(cursor, [product_id for product_id, _ in ranked]) if ranked else {}
+
+        cursor.close()
+        conn.close()
+
+        return [
+            {**products[product_id], "score": round(score, 4)}
+            for product_id, score in ranked
+            if product_id in products
+        ]
+    except HTTPException:
+        raise
+    except Exception as e:
+        print('Exception:', e)
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Error searching products")
+
+
+@router.get("/products/batch", response_model=Dict[int, ProductResponse])
+async def get_products_batch(
+    ids: str = Query(..., description="Comma-separated product ids"),
+    include: Optional[str] = Query(None, description="Comma-separated related data to embed: variants")
+):
+    try:
+        try:
+            includes = parse_include(include, PRODUCT_INCLUDES)
+        except ValueError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+        try:
+            product_ids = [int(value) for value in ids.split(",") if value.strip()]
+        except ValueError:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="ids must be integers")
+
+        if not product_ids:
+            return {}
+
+        if len(product_ids) > MAX_BATCH_IDS:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST, detail=f"At most {MAX_BATCH_IDS} ids per request"
+            )
+
+        conn = await connect_to_database()
+        cursor = conn.cursor()
+
+        products = fetch_products_by_ids(cursor, product_ids)
+        if "variants" in includes:
+            products = {product["id"]: product for product in attach_variants(cursor, list(products.values()))}
+
+        cursor.close()
+        conn.close()
 
-        return {
-            "id": product[0],
-            "name": product[1],
-            "description": product[2],
-            "price": product[3],
-            "category_id": product[4],
-            "image_url": product[5],
-            "created_at": format_datetime(product[6]),
-            "updated_at": format_datetime(product[7])
-        }
+        return products
+    except HTTPException:
+        raise
+    except Exception as e:
+        print('Exception:', e)
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Error fetching products")
+
+
+@router.post("/products/import")
+async def import_products(
+    request: Request,
+    fmt: str = Query("csv", alias="format", description="csv or ndjson"),
+    token: str = Depends(oauth2_scheme),
+):
+    try:
+        payload = verify_token(token)
+        username = payload.get('sub')
+
+        if not await is_admin(username):
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized")
+
+        if fmt not in SUPPORTED_FORMATS:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Unsupported format")
+
+        conn = await connect_to_database()
+        cursor = conn.cursor()
+
+        def write_batch(batch):
+            cursor.executemany(MERGE_PRODUCT_QUERY, [
+                (item.id, item.name, item.description, item.price, item.category_id, item.image_url)
+                for item in batch
+            ])
+            bump_versions(cursor, "products")
+            conn.commit()
+            product_cache.invalidate(*(item.id for item in batch if item.id is not None))
+            # new rows get their ids inside the MERGE, so rebuild on next search
+            search_index.invalidate()
+            suggest_index.invalidate()
+            return len(batch)
+
+        try:
+            summary = await import_records(request.stream(), fmt, lambda record: ProductImport(**record), write_batch)
+        finally:
+            cursor.close()
+            conn.close()
+
+        return summary
+    except HTTPException:
+        raise
+    except Exception as e:
+        print('Exception:', e)
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Error importing products")
+
+
+@router.get("/products/export")
+async def export_products(
+    fmt: str = Query("csv", alias="format", description="csv or ndjson"),
+    token: str = Depends(oauth2_scheme),
+):
+    try:
+        payload = verify_token(token)
+        username = payload.get('sub')
+
+        if not await is_admin(username):
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized")
+
+        if fmt not in SUPPORTED_FORMATS:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Unsupported format")
+
+        conn = await connect_to_database()
+        cursor = conn.cursor()
+        cursor.execute(f"SELECT {PRODUCT_RECORD.columns} FROM Products p ORDER BY p.productId")
+
+        return StreamingResponse(
+            stream_rows(conn, cursor, lambda row: _product_row(PRODUCT_RECORD.row(row)), PRODUCT_FIELDS, fmt),
+            media_type=MEDIA_TYPES[fmt],
+            headers={"Content-Disposition": f'attachment; filename="products.{fmt}"'},
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        print('Exception:', e)
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Error exporting products")
+
+
+@router.get(
+    "/products/{productId}", response_model=ProductResponse, dependencies=[Depends(http_cache("products", "variants"))]
+)
+async def get_product_details(
+    productId: int,
+    include: Optional[str] = Query(None, description="Comma-separated related data to embed: variants")
+):
+    try:
+        try:
+            includes = parse_include(include, PRODUCT_INCLUDES)
+        except ValueError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+        detail = product_cache.get(productId)
+        if detail is not None and not includes:
+            return detail
+
+        conn = await connect_to_database()
+        cursor = conn.cursor()
+
+        if detail is None:
+            cursor.execute(f"SELECT {PRODUCT_DETAIL.columns} FROM Products p {RATING_JOIN} WHERE p.productId=?", (productId,))
+            product = PRODUCT_DETAIL.one(cursor)
+
+            if not product:
+                cursor.close()
+                conn.close()
+                raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Product not found")
+
+            detail = product_detail(product)
+            product_cache.set(productId, detail)
+
+        if "variants" in includes:
+            detail = attach_variants(cursor, [detail])[0]
+
+        cursor.close()
+        conn.close()
+
+        return detail
+    except HTTPException:
+        raise
     except Exception as e:
         print('Exception:', e)
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Error fetching product details")
@@ -105,10 +389,11 @@ async def create_product(product: ProductCreate, token: str = Depends(oauth2_sch
             INSERT INTO Products (name, description, price, categoryId, imageUrl, createdAt, updatedAt)
             VALUES (?, ?, ?, ?, ?, GETDATE(), GETDATE())
         """, (product.name, product.description, product.price, product.category_id, product.image_url))
+        bump_versions(cursor, "products")
         conn.commit()
         
-        cursor.execute("SELECT * FROM Products WHERE productId=@@IDENTITY")
-        new_product = cursor.fetchone()
+        cursor.execute(f"SELECT {PRODUCT_RECORD.columns} FROM Products p WHERE p.productId=@@IDENTITY")
+        new_product = PRODUCT_RECORD.one(cursor)
         
         cursor.close()
         conn.close()
@@ -116,16 +401,10 @@ async def create_product(product: ProductCreate, token: str = Depends(oauth2_sch
         if not new_product:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Product creation failed")
 
-        return {
-            "id": new_product[0],
-            "name": new_product[1],
-            "description": new_product[2],
-            "price": new_product[3],
-            "category_id": new_product[4],
-            "image_url": new_product[5],
-            "created_at": format_datetime(new_product[6]),
-            "updated_at": format_datetime(new_product[7]),
-        }
+        search_index.upsert(new_product.id, new_product.name, new_product.description)
+        suggest_index.upsert("product", new_product.id, new_product.name)
+
+        return _product_row(new_product)
     except Exception as e:
         print('Exception:', e)
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token or error creating product")
@@ -149,10 +428,12 @@ async def update_product(productId: int, product: ProductUpdate, token: str = De
             SET name=?, description=?, price=?, categoryId=?, imageUrl=?, updatedAt=GETDATE()
             WHERE productId=?
         """, (product.name, product.description, product.price, product.category_id, product.image_url, productId))
+        bump_versions(cursor, "products")
         conn.commit()
+        product_cache.invalidate(productId)
 
-        cursor.execute("SELECT * FROM Products WHERE productId=?", (productId,))
-        updated_product = cursor.fetchone()
+        cursor.execute(f"SELECT {PRODUCT_DETAIL.columns} FROM Products p {RATING_JOIN} WHERE p.productId=?", (productId,))
+        updated_product = PRODUCT_DETAIL.one(cursor)
 
         cursor.close()
         conn.close()
@@ -160,16 +441,10 @@ async def update_product(productId: int, product: ProductUpdate, token: str = De
         if not updated_product:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Product not found")
 
-        return {
-            "id": updated_product[0],
-            "name": updated_product[1],
-            "description": updated_product[2],
-            "price": updated_product[3],
-            "category_id": updated_product[4],
-            "image_url": updated_product[5],
-            "created_at": format_datetime(updated_product[6]),
-            "updated_at": format_datetime(updated_product[7])
-        }
+        search_index.upsert(updated_product.id, updated_product.name, updated_product.description)
+        suggest_index.upsert("product", updated_product.id, updated_product.name)
+
+        return product_detail(updated_product)
     except Exception as e:
         print('Exception:', e)
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token or error updating product")
@@ -189,7 +464,11 @@ async def delete_product(productId: int, token: str = Depends(oauth2_scheme)):
         cursor = conn.cursor()
 
         cursor.execute("DELETE FROM Products WHERE productId=?", (productId,))
+        bump_versions(cursor, "products")
         conn.commit()
+        product_cache.invalidate(productId)
+        search_index.remove(productId)
+        suggest_index.remove("product", productId)
 
         if cursor.rowcount == 0:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Product not found")
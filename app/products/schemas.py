@@ -1,4 +1,7 @@
 from pydantic import BaseModel
+from typing import List, Optional
+
+from app.products_varient.schemas import ProductVariantResponse
 
 class ProductResponse(BaseModel):
     id: int
@@ -20,6 +23,9 @@ class ProductCreate(BaseModel):
     category_id: int
     image_url: str
 
+class ProductImport(ProductCreate):
+    id: Optional[int] = None
+
 class ProductUpdate(BaseModel):
     name: str
     description: str
@@ -35,4 +41,51 @@ class ProductResponse(BaseModel):
     category_id: int
     image_url: str
     created_at: str
-    updated_at: str
\ No newline at end of file
+    updated_at: str
+    rating_count: int = 0
+    rating_average: Optional[float] = None
+    rating_histogram: List[int] = [0, 0, 0, 0, 0]
+    variants: Optional[List[ProductVariantResponse]] = None
+
+# view=summary on list endpoints: ProductResponse without the description
+class ProductSummaryResponse(BaseModel):
+    id: int
+    name: str
+    price: float
+    category_id: int
+    image_url: str
+    created_at: str
+    updated_at: str
+    rating_count: int = 0
+    rating_average: Optional[float] = None
+    rating_histogram: List[int] = [0, 0, 0, 0, 0]
+    variants: Optional[List[ProductVariantResponse]] = None
+
+class ProductSearchResult(ProductResponse):
+    score: float
+
+class ProductSuggestion(BaseModel):
+    type: str
+    id: int
+    name: str
+
+class CategoryFacet(BaseModel):
+    id: int
+    name: Optional[str] = None
+    count: int
+
+class PriceRangeFacet(BaseModel):
+    min: Optional[float] = None
+    max: Optional[float] = None
+    count: int
+
+class VariantFacet(BaseModel):
+    variant_type: str
+    variant_value: str
+    count: int
+
+class ProductFacets(BaseModel):
+    total: int
+    categories: List[CategoryFacet]
+    price_ranges: List[PriceRangeFacet]
+    variants: List[VariantFacet]
@@ -0,0 +1,136 @@
+import math
+import os
+import re
+import threading
+import time
+from bisect import bisect_left, insort
+from collections import Counter
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+NAME_WEIGHT = 3
+PREFIX_MATCH_WEIGHT = 0.7
+MAX_PREFIX_EXPANSIONS = 50
+# Rebuild from the database after this many seconds so writes made on other
+# workers are picked up; local writes are applied immediately.
+SEARCH_INDEX_MAX_AGE = float(os.getenv("SEARCH_INDEX_MAX_AGE", 300))
+
+
+def tokenize(text):
+    return TOKEN_PATTERN.findall(text.lower()) if text else []
+
+
+class SearchIndex:
+    # BM25 over name and description, with name terms counted NAME_WEIGHT
+    # times. The sorted term list gives prefix matching by binary search.
+    k1 = 1.2
+    b = 0.75
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._reset()
+        self.loaded_at = None
+
+    def _reset(self):
+        self._postings = {}
+        self._doc_terms = {}
+        self._doc_lengths = {}
+        self._total_length = 0
+        self._terms = []
+
+    @property
+    def is_stale(self):
+        return self.loaded_at is None or time.monotonic() - self.loaded_at > SEARCH_INDEX_MAX_AGE
+
+    def invalidate(self):
+        self.loaded_at = None
+
+    def load(self, rows):
+        with self._lock:
+            self._reset()
+            for product_id, name, description in rows:
+                self._add(product_id, name, description)
+            self.loaded_at = time.monotonic()
+
+    def upsert(self, product_id, name, description):
+        with self._lock:
+            self._remove(product_id)
+            self._add(product_id, name, description)
+
+    def remove(self, product_id):
+        with self._lock:
+            self._remove(product_id)
+
+    def _add(self, product_id, name, description):
+        terms = Counter(tokenize(description))
+        for term in tokenize(name):
+            terms[term] += NAME_WEIGHT
+        length = sum(terms.values())
+
+        self._doc_terms[product_id] = terms
+        self._doc_lengths[product_id] = length
+        self._total_length += length
+        for term, frequency in terms.items():
+            postings = self._postings.get(term)
+            if postings is None:
+                postings = self._postings[term] = {}
+                insort(self._terms, term)
+            postings[product_id] = frequency
+
+    def _remove(self, product_id):
+        terms = self._doc_terms.pop(product_id, None)
+        if terms is None:
+            return
+        self._total_length -= self._doc_lengths.pop(product_id)
+        for term in terms:
+            postings = self._postings[term]
+            del postings[product_id]
+            if not postings:
+                del self._postings[term]
+                del self._terms[bisect_left(self._terms, term)]
+
+    def _expand(self, token):
+        matches = {token: 1.0} if token in self._postings else {}
+        start = bisect_left(self._terms, token)
+        for term in self._terms[start:start + MAX_PREFIX_EXPANSIONS + 1]:
+            if not term.startswith(token):
+                break
+            matches.setdefault(term, PREFIX_MATCH_WEIGHT)
+        return matches
+
+    def search(self, query, limit=20, offset=0):
+        with self._lock:
+            document_count = len(self._doc_terms)
+            if not document_count:
+                return []
+            average_length = self._total_length / document_count
+
+            scores = {}
+            for token in dict.fromkeys(tokenize(query)):
+                for term, weight in self._expand(token).items():
+                    postings = self._postings[term]
+                    idf = math.log(1 + (document_count - len(postings) + 0.5) / (len(postings) + 0.5))
+                    for product_id, frequency in postings.items():
+                        norm = self.k1 * (1 - self.b + self.b * self._doc_lengths[product_id] / average_length)
+                        score = weight * idf * frequency * (self.k1 + 1) / (frequency + norm)
+                        scores[product_id] = scores.get(product_id, 0.0) + score
+
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+        return ranked[offset:offset + limit]
+
+
+search_index = SearchIndex()
+
+
+def ensure_search_index(cursor):
+    if not search_index.is_stale:
+        return
+    cursor.execute("SELECT productId, name, description FROM Products")
+
+    def rows():
+        while True:
+            batch = cursor.fetchmany(1000)
+            if not batch:
+                return
+            yield from batch
+
+    search_index.load(rows())
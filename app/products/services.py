@@ -0,0 +1,95 @@
+from app.services.cacheServices import get_cache
+from app.services.projectionServices import Projection
+from app.reviews.services import RATING_COLUMNS, RATING_JOIN, rating_fields
+from app.utils.serialization import compile_row_mapper
+from app.utils.date_convert import format_datetime
+from app.products_varient.services import fetch_variants_by_product_ids
+
+MAX_BATCH_IDS = 100
+PRODUCT_INCLUDES = {"variants"}
+
+# Product detail dicts by id; invalidated by product and review writes
+product_cache = get_cache("products", max_entries=4096, ttl=60)
+
+
+# List views skip the description, which is most of a product row's size
+PRODUCT_SUMMARY = Projection("ProductSummaryRow", {
+    "id": "p.productId",
+    "name": "p.name",
+    "price": "p.price",
+    "category_id": "p.categoryId",
+    "image_url": "p.imageUrl",
+    "created_at": "p.createdAt",
+    "updated_at": "p.updatedAt",
+    **RATING_COLUMNS,
+})
+PRODUCT_DETAIL = PRODUCT_SUMMARY.extend("ProductRow", description="p.description")
+
+product_summary = compile_row_mapper({
+    "id": "id",
+    "name": "name",
+    "price": ("price", float),
+    "category_id": "category_id",
+    "image_url": "image_url",
+    "created_at": ("created_at", format_datetime),
+    "updated_at": ("updated_at", format_datetime),
+    **rating_fields(),
+})
+
+product_detail = compile_row_mapper({
+    "id": "id",
+    "name": "name",
+    "description": "description",
+    "price": ("price", float),
+    "category_id": "category_id",
+    "image_url": "image_url",
+    "created_at": ("created_at", format_datetime),
+    "updated_at": ("updated_at", format_datetime),
+    **rating_fields(),
+    "variants": lambda row: None,
+})
+
+# view name -> (projection, response mapper) for list endpoints
+PRODUCT_VIEWS = {
+    "full": (PRODUCT_DETAIL, product_detail),
+    "summary": (PRODUCT_SUMMARY, product_summary),
+}
+
+
+def fetch_products_by_ids(cursor, product_ids):
+    # Serves what it can from the cache and resolves the rest with one IN query
+    found = {}
+    missing = []
+    for product_id in dict.fromkeys(product_ids):
+        cached = product_cache.get(product_id)
+        if cached is None:
+            missing.append(product_id)
+        else:
+            found[product_id] = cached
+
+    if missing:
+        placeholders = ", ".join("?" for _ in missing)
+        cursor.execute(
+            f"SELECT {PRODUCT_DETAIL.columns} FROM Products p {RATING_JOIN} WHERE p.productId IN ({placeholders})",
+            missing,
+        )
+        for product in PRODUCT_DETAIL.all(cursor):
+            detail = product_detail(product)
+            product_cache.set(detail["id"], detail)
+            found[detail["id"]] = detail
+
+    return {product_id: found[product_id] for product_id in product_ids if product_id in found}
+
+
+def parse_include(include, allowed):
+    requested = {value.strip() for value in (include or "").split(",") if value.strip()}
+    unknown = requested - allowed
+    if unknown:
+        raise ValueError(f"Unsupported include: {', '.join(sorted(unknown))}")
+    return requested
+
+
+def attach_variants(cursor, products):
+    # One grouped query for the whole page; copies keep cached dicts untouched
+    variants = fetch_variants_by_product_ids(cursor, [product["id"] for product in products])
+    return [{**product, "variants": variants[product["id"]]} for product in products]
@@ -0,0 +1,95 @@
+import os
+import threading
+import time
+from bisect import bisect_left, insort
+
+from app.products.search import tokenize
+
+SUGGEST_INDEX_MAX_AGE = float(os.getenv("SUGGEST_INDEX_MAX_AGE", 300))
+
+
+def _keys(name):
+    # One key per word start, so "run" and "sho" both find "Running Shoes"
+    tokens = tokenize(name)
+    return {" ".join(tokens[i:]) for i in range(len(tokens))}
+
+
+class SuggestIndex:
+    # Sorted array of (key, kind, id, name); a prefix query is a binary search
+    # followed by a short forward scan.
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = []
+        self._names = {}
+        self.loaded_at = None
+
+    @property
+    def is_stale(self):
+        return self.loaded_at is None or time.monotonic() - self.loaded_at > SUGGEST_INDEX_MAX_AGE
+
+    def invalidate(self):
+        self.loaded_at = None
+
+    def load(self, rows):
+        entries = []
+        names = {}
+        for kind, item_id, name in rows:
+            names[(kind, item_id)] = name
+            entries.extend((key, kind, item_id, name) for key in _keys(name))
+        entries.sort()
+        with self._lock:
+            self._entries = entries
+            self._names = names
+            self.loaded_at = time.monotonic()
+
+    def upsert(self, kind, item_id, name):
+        with self._lock:
+            self._remove(kind, item_id)
+            self._names[(kind, item_id)] = name
+            for key in _keys(name):
+                insort(self._entries, (key, kind, item_id, name))
+
+    def remove(self, kind, item_id):
+        with self._lock:
+            self._remove(kind, item_id)
+
+    def _remove(self, kind, item_id):
+        name = self._names.pop((kind, item_id), None)
+        if name is None:
+            return
+        for key in _keys(name):
+            position = bisect_left(self._entries, (key, kind, item_id, name))
+            if position < len(self._entries) and self._entries[position] == (key, kind, item_id, name):
+                del self._entries[position]
+
+    def suggest(self, prefix, limit=10):
+        prefix = " ".join(tokenize(prefix))
+        if not prefix:
+            return []
+
+        results = []
+        seen = set()
+        with self._lock:
+            position = bisect_left(self._entries, (prefix,))
+            while position < len(self._entries) and len(results) < limit:
+                key, kind, item_id, name = self._entries[position]
+                if not key.startswith(prefix):
+                    break
+                if (kind, item_id) not in seen:
+                    seen.add((kind, item_id))
+                    results.append({"type": kind, "id": item_id, "name": name})
+                position += 1
+        return results
+
+
+suggest_index = SuggestIndex()
+
+
+def ensure_suggest_index(cursor):
+    if not suggest_index.is_stale:
+        return
+    cursor.execute(
+        "SELECT 'category', categoryId, name FROM Categories "
+        "UNION ALL SELECT 'product', productId, name FROM Products"
+    )
+    suggest_index.load(cursor.fetchall())
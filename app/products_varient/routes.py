@@ -1,4 +1,5 @@
-from fastapi import APIRouter, HTTPException, status, Depends
+from fastapi import APIRouter, HTTPException, status, Depends, Query, Request
+from fastapi.responses import StreamingResponse
 from typing import List
 from fastapi.security import OAuth2PasswordBearer
 
@@ -6,34 +7,64 @@ from app.products_varient.schemas import (
     ProductResponse,
     VariantTypeCreate,
     VariantTypeUpdate,
-    VariantResponse,
     ProductVariantCreate,
-    ProductVariantUpdate
+    ProductVariantUpdate,
+    ProductVariantImport,
+    ProductVariantResponse,
+    ProductVariantBulk,
+    ProductVariantBulkResponse
 )
 from app.services.dbServices import connect_to_database
+from app.services.httpCacheServices import http_cache, bump_versions
 from app.utils.date_convert import format_datetime
 from app.utils.is_admin import is_admin
 from app.auth.token import verify_token
+from app.products_varient.services import (
+    MAX_BULK_VARIANTS,
+    VARIANT,
+    VARIANT_TYPE,
+    variant_row,
+    variant_type_row,
+    build_bulk_merge,
+)
+from app.utils.bulk_io import SUPPORTED_FORMATS, MEDIA_TYPES, import_records, stream_rows
 
 router = APIRouter()
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/admin/auth/login")
 
-@router.get("/variant-types/{categoryId}", response_model=List[VariantTypeCreate])
+VARIANT_FIELDS = ["variantId", "productId", "variantType", "variantValue", "stock", "price"]
+
+MERGE_VARIANT_QUERY = """
+    MERGE INTO ProductVariants AS target
+    USING (VALUES (?, ?, ?, ?, ?)) AS source (productId, variantType, variantValue, stock, price)
+    ON target.productId = source.productId
+        AND target.variantType = source.variantType
+        AND target.variantValue = source.variantValue
+    WHEN MATCHED THEN
+        UPDATE SET stock = source.stock, price = source.price
+    WHEN NOT MATCHED THEN
+        INSERT (productId, variantType, variantValue, stock, price)
+        VALUES (source.productId, source.variantType, source.variantValue, source.stock, source.price);
+"""
+
+
+@router.get(
+    "/variant-types/{categoryId}",
+    response_model=List[VariantTypeCreate],
+    dependencies=[Depends(http_cache("categories", max_age=300))],
+)
 async def get_variant_types_by_category(categoryId: int):
     try:
         conn = await connect_to_database()
         cursor = conn.cursor()
 
-        cursor.execute("SELECT * FROM VariantTypes WHERE categoryId=?", (categoryId,))
-        variant_types = cursor.fetchall()
+        cursor.execute(f"SELECT {VARIANT_TYPE.columns} FROM VariantTypes WHERE categoryId=?", (categoryId,))
+        variant_types = VARIANT_TYPE.all(cursor)
 
         cursor.close()
         conn.close()
 
-        return [
-            {"variantTypeId": vt[0], "categoryId": vt[1], "variantType": vt[2]}
-            for vt in variant_types
-        ]
+        return [variant_type_row(vt) for vt in variant_types]
     except Exception as e:
         print("Exception:", e)
         raise HTTPException(
@@ -64,10 +95,11 @@ async def create_variant_type(
         """,
             (variant_type.categoryId, variant_type.variantType),
         )
+        bump_versions(cursor, "categories")
         conn.commit()
 
-        cursor.execute("SELECT * FROM VariantTypes WHERE variantTypeId=@@IDENTITY")
-        new_variant_type = cursor.fetchone()
+        cursor.execute(f"SELECT {VARIANT_TYPE.columns} FROM VariantTypes WHERE variantTypeId=@@IDENTITY")
+        new_variant_type = VARIANT_TYPE.one(cursor)
 
         cursor.close()
         conn.close()
@@ -77,11 +109,7 @@ async def create_variant_type(
                 status_code=status.HTTP_404_NOT_FOUND, detail="Variant Type creation failed"
             )
 
-        return {
-            "variantTypeId": new_variant_type[0],
-            "categoryId": new_variant_type[1],
-            "variantType": new_variant_type[2]
-        }
+        return variant_type_row(new_variant_type)
     except Exception as e:
         print("Exception:", e)
         raise HTTPException(
@@ -109,10 +137,11 @@ async def update_variant_type(variantTypeId: int, variant_type: VariantTypeUpdat
             """,
             (variant_type.variantType, variantTypeId),
         )
+        bump_versions(cursor, "categories")
         conn.commit()
 
-        cursor.execute("SELECT * FROM VariantTypes WHERE variantTypeId=?", (variantTypeId,))
-        updated_variant_type = cursor.fetchone()
+        cursor.execute(f"SELECT {VARIANT_TYPE.columns} FROM VariantTypes WHERE variantTypeId=?", (variantTypeId,))
+        updated_variant_type = VARIANT_TYPE.one(cursor)
 
         cursor.close()
         conn.close()
@@ -122,11 +151,7 @@ async def update_variant_type(variantTypeId: int, variant_type: VariantTypeUpdat
                 status_code=status.HTTP_404_NOT_FOUND, detail="Variant Type not found"
             )
 
-        return {
-            "variantTypeId": updated_variant_type[0],
-            "categoryId": updated_variant_type[1],
-            "variantType": updated_variant_type[2]
-        }
+        return variant_type_row(updated_variant_type)
     except Exception as e:
         print("Exception:", e)
         raise HTTPException(
@@ -147,6 +172,7 @@ async def delete_variant_type(variantTypeId: int, token: str = Depends(oauth2_sc
         cursor = conn.cursor()
 
         cursor.execute("DELETE FROM VariantTypes WHERE variantTypeId=?", (variantTypeId,))
+        bump_versions(cursor, "categories")
         conn.commit()
 
         if cursor.rowcount == 0:
@@ -165,29 +191,23 @@ async def delete_variant_type(variantTypeId: int, token: str = Depends(oauth2_sc
             detail="Invalid token or error deleting variant type",
         )
 
-@router.get("/products/{productId}/variants", response_model=List[VariantResponse])
+@router.get(
+    "/products/{productId}/variants",
+    response_model=List[ProductVariantResponse],
+    dependencies=[Depends(http_cache("variants"))],
+)
 async def get_variants_by_product(productId: int):
     try:
         conn = await connect_to_database()
         cursor = conn.cursor()
 
-        cursor.execute("SELECT * FROM ProductVariants WHERE productId=?", (productId,))
-        variants = cursor.fetchall()
+        cursor.execute(f"SELECT {VARIANT.columns} FROM ProductVariants WHERE productId=?", (productId,))
+        variants = VARIANT.all(cursor)
 
         cursor.close()
         conn.close()
 
-        return [
-            {
-                "variantId": variant[0],
-                "productId": variant[1],
-                "variantType": variant[2],
-                "variantValue": variant[3],
-                "stock": variant[4],
-                "price": variant[5]
-            }
-            for variant in variants
-        ]
+        return [variant_row(variant) for variant in variants]
     except Exception as e:
         print("Exception:", e)
         raise HTTPException(
@@ -195,7 +215,78 @@ async def get_variants_by_product(productId: int):
             detail="Error fetching variants by product",
         )
 
-@router.post("/products/{productId}/variants", response_model=VariantResponse)
+@router.put("/products/{productId}/variants/bulk", response_model=ProductVariantBulkResponse)
+async def bulk_upsert_product_variants(
+    productId: int, bulk: ProductVariantBulk, token: str = Depends(oauth2_scheme)
+):
+    try:
+        payload = verify_token(token)
+        username = payload.get("sub")
+
+        if not await is_admin(username):
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized")
+
+        if len(bulk.variants) > MAX_BULK_VARIANTS:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST, detail=f"At most {MAX_BULK_VARIANTS} variants per request"
+            )
+
+        keys = {(variant.variantType, variant.variantValue) for variant in bulk.variants}
+        if len(keys) != len(bulk.variants):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST, detail="Duplicate variantType/variantValue pairs"
+            )
+
+        if not bulk.variants and not bulk.replace:
+            return {"created": [], "updated": [], "deleted": []}
+
+        conn = await connect_to_database()
+        cursor = conn.cursor()
+
+        try:
+            cursor.execute("SELECT 1 FROM Products WHERE productId=?", (productId,))
+            if not cursor.fetchone():
+                raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Product not found")
+
+            if bulk.variants:
+                query, params = build_bulk_merge(productId, bulk.variants, bulk.replace)
+                cursor.execute(query, params)
+            else:
+                # Replacing with an empty matrix removes every variant
+                cursor.execute(
+                    "DELETE FROM ProductVariants OUTPUT 'DELETE', deleted.variantId WHERE productId=?",
+                    (productId,),
+                )
+            rows = cursor.fetchall()
+            bump_versions(cursor, "variants")
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cursor.close()
+            conn.close()
+
+        result = {"created": [], "updated": [], "deleted": []}
+        for row in rows:
+            action = row[0]
+            if action == "INSERT":
+                result["created"].append(variant_row(VARIANT.row(row[1:7])))
+            elif action == "UPDATE":
+                result["updated"].append(variant_row(VARIANT.row(row[1:7])))
+            else:
+                result["deleted"].append(row[-1])
+        return result
+    except HTTPException:
+        raise
+    except Exception as e:
+        print("Exception:", e)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Error applying product variants",
+        )
+
+@router.post("/products/{productId}/variants", response_model=ProductVariantResponse)
 async def create_product_variant(
     productId: int, variant: ProductVariantCreate, token: str = Depends(oauth2_scheme)
 ):
@@ -218,10 +309,11 @@ async def create_product_variant(
         """,
             (productId, variant.variantType, variant.variantValue, variant.stock, variant.price),
         )
+        bump_versions(cursor, "variants")
         conn.commit()
 
-        cursor.execute("SELECT * FROM ProductVariants WHERE variantId=@@IDENTITY")
-        new_variant = cursor.fetchone()
+        cursor.execute(f"SELECT {VARIANT.columns} FROM ProductVariants WHERE variantId=@@IDENTITY")
+        new_variant = VARIANT.one(cursor)
 
         cursor.close()
         conn.close()
@@ -231,14 +323,7 @@ async def create_product_variant(
                 status_code=status.HTTP_404_NOT_FOUND, detail="Product Variant creation failed"
             )
 
-        return {
-            "variantId": new_variant[0],
-            "productId": new_variant[1],
-            "variantType": new_variant[2],
-            "variantValue": new_variant[3],
-            "stock": new_variant[4],
-            "price": new_variant[5]
-        }
+        return variant_row(new_variant)
     except Exception as e:
         print("Exception:", e)
         raise HTTPException(
@@ -246,7 +331,7 @@ async def create_product_variant(
             detail="Invalid token or error creating product variant",
         )
 
-@router.put("/products/{productId}/variants/{variantId}", response_model=VariantResponse)
+@router.put("/products/{productId}/variants/{variantId}", response_model=ProductVariantResponse)
 async def update_product_variant(
     productId: int, variantId: int, variant: ProductVariantUpdate, token: str = Depends(oauth2_scheme)
 ):
@@ -268,10 +353,11 @@ async def update_product_variant(
             """,
             (variant.variantType, variant.variantValue, variant.stock, variant.price, variantId, productId),
         )
+        bump_versions(cursor, "variants")
         conn.commit()
 
-        cursor.execute("SELECT * FROM ProductVariants WHERE variantId=? AND productId=?", (variantId, productId))
-        updated_variant = cursor.fetchone()
+        cursor.execute(f"SELECT {VARIANT.columns} FROM ProductVariants WHERE variantId=? AND productId=?", (variantId, productId))
+        updated_variant = VARIANT.one(cursor)
 
         cursor.close()
         conn.close()
@@ -281,14 +367,7 @@ async def update_product_variant(
                 status_code=status.HTTP_404_NOT_FOUND, detail="Product Variant not found"
             )
 
-        return {
-            "variantId": updated_variant[0],
-            "productId": updated_variant[1],
-            "variantType": updated_variant[2],
-            "variantValue": updated_variant[3],
-            "stock": updated_variant[4],
-            "price": updated_variant[5]
-        }
+        return variant_row(updated_variant)
     except Exception as e:
         print("Exception:", e)
         raise HTTPException(
@@ -311,6 +390,7 @@ async def delete_product_variant(
         cursor = conn.cursor()
 
         cursor.execute("DELETE FROM ProductVariants WHERE variantId=? AND productId=?", (variantId, productId))
+        bump_versions(cursor, "variants")
         conn.commit()
 
         if cursor.rowcount == 0:
@@ -328,3 +408,84 @@ async def delete_product_variant(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid token or error deleting product variant",
         )
+
+
+@router.post("/product-variants/import")
+async def import_product_variants(
+    request: Request,
+    fmt: str = Query("csv", alias="format", description="csv or ndjson"),
+    token: str = Depends(oauth2_scheme),
+):
+    try:
+        payload = verify_token(token)
+        username = payload.get("sub")
+
+        if not await is_admin(username):
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized")
+
+        if fmt not in SUPPORTED_FORMATS:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Unsupported format")
+
+        conn = await connect_to_database()
+        cursor = conn.cursor()
+
+        def write_batch(batch):
+            cursor.executemany(MERGE_VARIANT_QUERY, [
+                (item.productId, item.variantType, item.variantValue, item.stock, item.price)
+                for item in batch
+            ])
+            bump_versions(cursor, "variants")
+            conn.commit()
+            return len(batch)
+
+        try:
+            summary = await import_records(
+                request.stream(), fmt, lambda record: ProductVariantImport(**record), write_batch
+            )
+        finally:
+            cursor.close()
+            conn.close()
+
+        return summary
+    except HTTPException:
+        raise
+    except Exception as e:
+        print("Exception:", e)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Error importing product variants",
+        )
+
+
+@router.get("/product-variants/export")
+async def export_product_variants(
+    fmt: str = Query("csv", alias="format", description="csv or ndjson"),
+    token: str = Depends(oauth2_scheme),
+):
+    try:
+        payload = verify_token(token)
+        username = payload.get("sub")
+
+        if not await is_admin(username):
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized")
+
+        if fmt not in SUPPORTED_FORMATS:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Unsupported format")
+
+        conn = await connect_to_database()
+        cursor = conn.cursor()
+        cursor.execute(f"SELECT {VARIANT.columns} FROM ProductVariants ORDER BY productId, variantId")
+
+        return StreamingResponse(
+            stream_rows(conn, cursor, lambda row: variant_row(VARIANT.row(row)), VARIANT_FIELDS, fmt),
+            media_type=MEDIA_TYPES[fmt],
+            headers={"Content-Disposition": f'attachment; filename="product_variants.{fmt}"'},
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        print("Exception:", e)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Error exporting product variants",
+        )
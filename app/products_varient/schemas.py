@@ -1,4 +1,5 @@
 from pydantic import BaseModel
+from typing import List
 
 class VariantTypeCreate(BaseModel):
     categoryId: int
@@ -18,6 +19,26 @@ class ProductVariantCreate(BaseModel):
     stock: int
     price: float
 
+class ProductVariantImport(ProductVariantCreate):
+    productId: int
+
+class ProductVariantResponse(BaseModel):
+    variantId: int
+    productId: int
+    variantType: str
+    variantValue: str
+    stock: int
+    price: float
+
+class ProductVariantBulk(BaseModel):
+    variants: List[ProductVariantCreate]
+    replace: bool = False
+
+class ProductVariantBulkResponse(BaseModel):
+    created: List[ProductVariantResponse]
+    updated: List[ProductVariantResponse]
+    deleted: List[int]
+
 class ProductVariantUpdate(BaseModel):
     variantType: str
     variantValue: str
@@ -0,0 +1,102 @@
+from app.services.projectionServices import Projection
+
+# Grouped lookups used to embed variants and variant types in other
+# resources without a query per parent row.
+# SQL Server allows at most 2100 parameters per statement
+IN_CHUNK_SIZE = 1000
+# Four parameters per row keeps a full matrix inside that limit
+MAX_BULK_VARIANTS = 500
+
+
+VARIANT = Projection("VariantRow", {
+    "variant_id": "variantId",
+    "product_id": "productId",
+    "variant_type": "variantType",
+    "variant_value": "variantValue",
+    "stock": "stock",
+    "price": "price",
+})
+
+VARIANT_TYPE = Projection("VariantTypeRow", {
+    "variant_type_id": "variantTypeId",
+    "category_id": "categoryId",
+    "variant_type": "variantType",
+})
+
+
+def variant_row(variant):
+    return {
+        "variantId": variant.variant_id,
+        "productId": variant.product_id,
+        "variantType": variant.variant_type,
+        "variantValue": variant.variant_value,
+        "stock": variant.stock,
+        "price": variant.price
+    }
+
+
+def variant_type_row(variant_type):
+    return {
+        "variantTypeId": variant_type.variant_type_id,
+        "categoryId": variant_type.category_id,
+        "variantType": variant_type.variant_type
+    }
+
+
+def _grouped(cursor, query, projection, ids, to_dict, key):
+    grouped = {item_id: [] for item_id in ids}
+    ids = list(grouped)
+    for start in range(0, len(ids), IN_CHUNK_SIZE):
+        chunk = ids[start:start + IN_CHUNK_SIZE]
+        placeholders = ", ".join("?" for _ in chunk)
+        cursor.execute(query.format(columns=projection.columns, placeholders=placeholders), chunk)
+        for row in projection.all(cursor):
+            grouped[getattr(row, key)].append(to_dict(row))
+    return grouped
+
+
+def fetch_variants_by_product_ids(cursor, product_ids):
+    return _grouped(
+        cursor,
+        "SELECT {columns} FROM ProductVariants WHERE productId IN ({placeholders}) ORDER BY productId, variantId",
+        VARIANT,
+        product_ids,
+        variant_row,
+        "product_id",
+    )
+
+
+def fetch_variant_types_by_category_ids(cursor, category_ids):
+    return _grouped(
+        cursor,
+        "SELECT {columns} FROM VariantTypes WHERE categoryId IN ({placeholders}) ORDER BY categoryId, variantTypeId",
+        VARIANT_TYPE,
+        category_ids,
+        variant_type_row,
+        "category_id",
+    )
+
+
+def build_bulk_merge(product_id, variants, replace=False):
+    # Merging into a CTE scoped to the product keeps WHEN NOT MATCHED BY SOURCE
+    # from reaching other products' variants.
+    values = ", ".join("(?, ?, ?, ?)" for _ in variants)
+    query = f"""
+        WITH target AS (SELECT {VARIANT.columns} FROM ProductVariants WHERE productId = ?)
+        MERGE INTO target
+        USING (VALUES {values}) AS source (variantType, variantValue, stock, price)
+        ON target.variantType = source.variantType AND target.variantValue = source.variantValue
+        WHEN MATCHED THEN
+            UPDATE SET stock = source.stock, price = source.price
+        WHEN NOT MATCHED BY TARGET THEN
+            INSERT (productId, variantType, variantValue, stock, price)
+            VALUES (?, source.variantType, source.variantValue, source.stock, source.price)
+        {"WHEN NOT MATCHED BY SOURCE THEN DELETE" if replace else ""}
+        OUTPUT $action, inserted.variantId, inserted.productId, inserted.variantType,
+               inserted.variantValue, inserted.stock, inserted.price, deleted.variantId;
+    """
+    params = [product_id]
+    for variant in variants:
+        params.extend([variant.variantType, variant.variantValue, variant.stock, variant.price])
+    params.append(product_id)
+    return query, params
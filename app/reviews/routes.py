@@ -1,16 +1,24 @@
-from typing import List
-from fastapi import APIRouter, HTTPException, status, Depends
+from typing import List, Optional
+from fastapi import APIRouter, HTTPException, status, Depends, Query, Response
 from fastapi.security import OAuth2PasswordBearer
 
 from app.auth.token import verify_token
 from app.services.dbServices import connect_to_database
+from app.services.httpCacheServices import http_cache, bump_versions
 from app.utils.is_admin import is_admin
 from app.reviews.schemas import ReviewCreate, ReviewResponse, ReviewUpdate
+from app.reviews.services import apply_rating_change, REVIEW_SORTS, encode_cursor, decode_cursor
+from app.services.cacheServices import get_cache
+from app.products.services import product_cache
 from app.utils.date_convert import format_datetime
 
 router = APIRouter()
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/admin/auth/login")
 
+# Default first page (most recent, no filters, default limit) per product,
+# dropped on any review write; other variants are client-chosen and go to the DB
+first_page_cache = get_cache("review_first_page", max_entries=2048, ttl=60)
+
 
 @router.post("/products/{product_id}/reviews", response_model=ReviewResponse)
 async def add_review(
@@ -50,7 +58,11 @@ async def add_review(
         """,
             (product_id, user_id, review.rating, review.comment),
         )
+        apply_rating_change(cursor, product_id, added=review.rating)
+        bump_versions(cursor, "reviews", "products")
         conn.commit()
+        first_page_cache.invalidate(product_id)
+        product_cache.invalidate(product_id)
 
         cursor.execute("SELECT * FROM Reviews WHERE reviewId=@@IDENTITY")
         new_review = cursor.fetchone()
@@ -82,19 +94,70 @@ async def add_review(
         )
 
 
-@router.get("/products/{product_id}/reviews", response_model=List[ReviewResponse])
-async def get_reviews(product_id: int):
+@router.get(
+    "/products/{product_id}/reviews",
+    response_model=List[ReviewResponse],
+    dependencies=[Depends(http_cache("reviews", max_age=30))],
+)
+async def get_reviews(
+    product_id: int,
+    response: Response,
+    limit: int = Query(20, ge=1, le=100),
+    page_cursor: Optional[str] = Query(None, alias="cursor", description="X-Next-Cursor from the previous page"),
+    sort: str = Query("recent", description="recent, rating_desc or rating_asc"),
+    rating: Optional[int] = Query(None, ge=1, le=5, description="Only reviews with exactly this rating"),
+    min_rating: Optional[int] = Query(None, ge=1, le=5),
+):
     try:
+        if sort not in REVIEW_SORTS:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid sort")
+
+        cacheable = page_cursor is None and sort == "recent" and rating is None and min_rating is None and limit == 20
+        if cacheable:
+            cached_page = first_page_cache.get(product_id)
+            if cached_page is not None:
+                review_list, next_cursor = cached_page
+                if next_cursor:
+                    response.headers["X-Next-Cursor"] = next_cursor
+                return review_list
+
+        order_by, key_column, comparison = REVIEW_SORTS[sort]
+        query = """
+            SELECT TOP (?) reviewId, productId, userId, rating, comment, createdAt, updatedAt
+            FROM Reviews
+            WHERE productId=?
+        """
+        params = [limit + 1, product_id]
+        if rating is not None:
+            query += " AND rating=?"
+            params.append(rating)
+        if min_rating is not None:
+            query += " AND rating>=?"
+            params.append(min_rating)
+        if page_cursor is not None:
+            try:
+                key, last_review_id = decode_cursor(page_cursor, sort)
+            except Exception:
+                raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+            query += f" AND ({key_column} {comparison} ? OR ({key_column} = ? AND reviewId {comparison} ?))"
+            params.extend([key, key, last_review_id])
+        query += f" ORDER BY {order_by}"
+
         conn = await connect_to_database()
         cursor = conn.cursor()
 
-        cursor.execute("SELECT * FROM Reviews WHERE productId=?", (product_id,))
+        cursor.execute(query, params)
         reviews = cursor.fetchall()
 
-        if not reviews:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND, detail="No reviews found"
-            )
+        cursor.close()
+        conn.close()
+
+        next_cursor = None
+        if len(reviews) > limit:
+            reviews = reviews[:limit]
+            last = reviews[-1]
+            next_cursor = encode_cursor(sort, last[5] if key_column == "createdAt" else last[3], last[0])
+            response.headers["X-Next-Cursor"] = next_cursor
 
         review_list = [
             {
@@ -109,10 +172,12 @@ async def get_reviews(product_id: int):
             for review in reviews
         ]
 
-        cursor.close()
-        conn.close()
+        if cacheable:
+            first_page_cache.set(product_id, (review_list, next_cursor))
 
         return review_list
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Exception: {e}")
         raise HTTPException(
@@ -164,7 +229,11 @@ async def update_review(
         """,
             (review.rating, review.comment, review_id),
         )
+        apply_rating_change(cursor, existing_review[1], removed=existing_review[3], added=review.rating)
+        bump_versions(cursor, "reviews", "products")
         conn.commit()
+        first_page_cache.invalidate(existing_review[1])
+        product_cache.invalidate(existing_review[1])
 
         cursor.execute("SELECT * FROM Reviews WHERE reviewId=?", (review_id,))
         updated_review = cursor.fetchone()
@@ -231,7 +300,11 @@ async def delete_review(
             )
 
         cursor.execute("DELETE FROM Reviews WHERE reviewId=?", (review_id,))
+        apply_rating_change(cursor, existing_review[1], removed=existing_review[3])
+        bump_versions(cursor, "reviews", "products")
         conn.commit()
+        first_page_cache.invalidate(existing_review[1])
+        product_cache.invalidate(existing_review[1])
 
         cursor.close()
         conn.close()
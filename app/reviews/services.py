@@ -0,0 +1,81 @@
+import base64
+import json
+from datetime import datetime
+
+# Projection columns for the ProductRatings aggregate joined as r
+RATING_COLUMNS = {
+    "review_count": "r.reviewCount",
+    "rating_sum": "r.ratingSum",
+    "rating_1": "r.rating1",
+    "rating_2": "r.rating2",
+    "rating_3": "r.rating3",
+    "rating_4": "r.rating4",
+    "rating_5": "r.rating5",
+}
+RATING_JOIN = "LEFT JOIN ProductRatings r ON r.productId = p.productId"
+
+
+def apply_rating_change(cursor, product_id, removed=None, added=None):
+    # Applies one review write to ProductRatings as deltas; pass the old rating
+    # as removed and/or the new rating as added.
+    count_delta = (added is not None) - (removed is not None)
+    sum_delta = (added or 0) - (removed or 0)
+    buckets = [(added == star) - (removed == star) for star in range(1, 6)]
+
+    cursor.execute(
+        """
+        MERGE INTO ProductRatings AS target
+        USING (VALUES (?, ?, ?, ?, ?, ?, ?, ?)) AS source (productId, countDelta, sumDelta, d1, d2, d3, d4, d5)
+        ON target.productId = source.productId
+        WHEN MATCHED THEN
+            UPDATE SET reviewCount = target.reviewCount + source.countDelta,
+                       ratingSum = target.ratingSum + source.sumDelta,
+                       rating1 = target.rating1 + source.d1,
+                       rating2 = target.rating2 + source.d2,
+                       rating3 = target.rating3 + source.d3,
+                       rating4 = target.rating4 + source.d4,
+                       rating5 = target.rating5 + source.d5,
+                       updatedAt = GETDATE()
+        WHEN NOT MATCHED THEN
+            INSERT (productId, reviewCount, ratingSum, rating1, rating2, rating3, rating4, rating5, updatedAt)
+            VALUES (source.productId, source.countDelta, source.sumDelta,
+                    source.d1, source.d2, source.d3, source.d4, source.d5, GETDATE());
+        """,
+        (product_id, count_delta, sum_delta, *buckets),
+    )
+
+
+def rating_fields():
+    # Response fields computed from a row carrying RATING_COLUMNS
+    return {
+        "rating_count": lambda row: row.review_count or 0,
+        "rating_average": lambda row: round(row.rating_sum / row.review_count, 2) if row.review_count else None,
+        "rating_histogram": lambda row: [
+            row.rating_1 or 0, row.rating_2 or 0, row.rating_3 or 0, row.rating_4 or 0, row.rating_5 or 0
+        ],
+    }
+
+
+# sort name -> (ORDER BY, keyset column, comparison for the next page)
+REVIEW_SORTS = {
+    "recent": ("createdAt DESC, reviewId DESC", "createdAt", "<"),
+    "rating_desc": ("rating DESC, reviewId DESC", "rating", "<"),
+    "rating_asc": ("rating ASC, reviewId ASC", "rating", ">"),
+}
+
+
+def encode_cursor(sort, key, review_id):
+    if isinstance(key, datetime):
+        key = key.isoformat()
+    raw = json.dumps([sort, key, review_id]).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor, sort):
+    raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+    cursor_sort, key, review_id = json.loads(raw)
+    if cursor_sort != sort:
+        raise ValueError("Cursor does not match sort order")
+    if sort == "recent":
+        key = datetime.fromisoformat(key)
+    return key, int(review_id)
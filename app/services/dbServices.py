@@ -1,24 +1,127 @@
 import os
+import threading
+import weakref
+from collections import deque
 from dotenv import load_dotenv
-import pypyodbc as odbc
+
+from app.database.backends import create_backend
+from app.utils.query_stats import instrument
 
 load_dotenv()
 
+DATABASE_BACKEND = os.getenv("DATABASE_BACKEND", "mssql").lower()
 DRIVER_NAME = "SQL SERVER"
 SERVER_NAME = os.getenv("DATABASE_SERVER")
 DATABASE_NAME = os.getenv("DATABASE_NAME")
+SQLITE_PATH = os.getenv("SQLITE_PATH", "vendo.sqlite3")
+
+# Idle connections kept per worker; 0 opens a new connection for every request
+DATABASE_POOL_SIZE = int(os.getenv("DATABASE_POOL_SIZE", 10))
+
+if DATABASE_BACKEND == "sqlite":
+    backend = create_backend("sqlite", path=SQLITE_PATH)
+else:
+    backend = create_backend(DATABASE_BACKEND, server=SERVER_NAME, database=DATABASE_NAME, driver=DRIVER_NAME)
+
+def open_connection():
+    return backend.connect()
+
+
+class PooledConnection:
+    # Proxies a pooled connection; close() hands it back to the pool, so the
+    # existing "conn.close()" call sites reuse connections unchanged. Routes
+    # that raise before close() drop the proxy instead: the finalizer then
+    # returns the connection, so in_use does not leak.
+    __slots__ = ("_conn", "_release", "__weakref__")
+
+    def __init__(self, conn, pool):
+        self._conn = conn
+        self._release = weakref.finalize(self, pool.release, conn)
+        self._release.atexit = False
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def close(self):
+        self._conn = None
+        self._release()
+
+
+class ConnectionPool:
+    def __init__(self, factory, max_idle):
+        self.factory = factory
+        self.max_idle = max_idle
+        self.in_use = 0
+        self.opened = 0
+        self._idle = deque()
+        self._lock = threading.Lock()
 
-connection_string = f"""
-    DRIVER={{{DRIVER_NAME}}};
-    SERVER={SERVER_NAME};
-    DATABASE={DATABASE_NAME};
-"""
+    def acquire(self):
+        with self._lock:
+            conn = self._idle.pop() if self._idle else None
+            self.in_use += 1
+        if conn is None:
+            try:
+                conn = self._open()
+            except Exception:
+                with self._lock:
+                    self.in_use -= 1
+                raise
+        return PooledConnection(conn, self)
+
+    def release(self, conn):
+        with self._lock:
+            self.in_use -= 1
+        # Uncommitted work is discarded; a connection that cannot roll back is broken
+        try:
+            conn.rollback()
+        except Exception:
+            self._discard(conn)
+            return
+        with self._lock:
+            if len(self._idle) < self.max_idle:
+                self._idle.append(conn)
+                return
+        self._discard(conn)
+
+    def warm(self, count=None):
+        count = self.max_idle if count is None else min(count, self.max_idle)
+        opened = []
+        while len(self._idle) + len(opened) < count:
+            opened.append(self._open())
+        with self._lock:
+            self._idle.extend(opened)
+        return len(opened)
+
+    def clear(self):
+        with self._lock:
+            idle, self._idle = self._idle, deque()
+        for conn in idle:
+            self._discard(conn)
+
+    def stats(self):
+        return {"idle": len(self._idle), "max_idle": self.max_idle, "in_use": self.in_use, "opened": self.opened}
+
+    def _open(self):
+        conn = self.factory()
+        with self._lock:
+            self.opened += 1
+        return conn
+
+    def _discard(self, conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+
+pool = ConnectionPool(open_connection, DATABASE_POOL_SIZE)
 
 async def connect_to_database():
     try:
-        conn = odbc.connect(connection_string)
+        conn = pool.acquire() if DATABASE_POOL_SIZE > 0 else open_connection()
         print("Database connection successful")
-        return conn
+        return instrument(conn)
     except Exception as e:
         print("Database connection failed")
         print(e)
@@ -0,0 +1,116 @@
+import hashlib
+import os
+from datetime import datetime, timezone
+from email.utils import format_datetime as format_http_date, parsedate_to_datetime
+
+from fastapi import HTTPException, Request, Response, status
+
+from app.services.cacheServices import get_cache
+from app.services.dbServices import connect_to_database
+
+# How long a worker trusts its copy of a version counter. Local writes update
+# it immediately; writes on other workers are seen within this window.
+CACHE_VERSION_TTL = float(os.getenv("CACHE_VERSION_TTL", 2))
+
+version_cache = get_cache("cache_versions", max_entries=256, ttl=CACHE_VERSION_TTL)
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+def bump_versions(cursor, *scopes):
+    # Runs inside the writer's transaction, before its commit
+    values = ", ".join("(?)" for _ in scopes)
+    cursor.execute(
+        f"""
+        MERGE INTO CacheVersions AS target
+        USING (VALUES {values}) AS source (scope)
+        ON target.scope = source.scope
+        WHEN MATCHED THEN
+            UPDATE SET version = target.version + 1, updatedAt = GETUTCDATE()
+        WHEN NOT MATCHED THEN
+            INSERT (scope, version, updatedAt) VALUES (source.scope, 1, GETUTCDATE());
+        """,
+        list(scopes),
+    )
+    version_cache.invalidate(*scopes)
+
+
+async def get_versions(scopes):
+    versions = {}
+    missing = []
+    for scope in scopes:
+        cached = version_cache.get(scope)
+        if cached is None:
+            missing.append(scope)
+        else:
+            versions[scope] = cached
+
+    if missing:
+        conn = await connect_to_database()
+        cursor = conn.cursor()
+        placeholders = ", ".join("?" for _ in missing)
+        cursor.execute(
+            f"SELECT scope, version, updatedAt FROM CacheVersions WHERE scope IN ({placeholders})", missing
+        )
+        rows = {row[0]: (row[1], row[2]) for row in cursor.fetchall()}
+        cursor.close()
+        conn.close()
+
+        for scope in missing:
+            # A scope that has never been written is version 0
+            versions[scope] = rows.get(scope, (0, None))
+            version_cache.set(scope, versions[scope])
+
+    return [versions[scope] for scope in scopes]
+
+
+def _etag(request, versions):
+    query = "&".join(sorted(f"{key}={value}" for key, value in request.query_params.multi_items()))
+    key = f"{request.url.path}?{query}|" + ",".join(str(version) for version, _ in versions)
+    return 'W/"' + hashlib.sha1(key.encode()).hexdigest()[:20] + '"'
+
+
+def _last_modified(versions):
+    latest = max((updated_at for _, updated_at in versions if updated_at is not None), default=None)
+    if latest is None:
+        return _EPOCH
+    # CacheVersions stores UTC; HTTP dates have one-second precision
+    return latest.replace(tzinfo=timezone.utc, microsecond=0)
+
+
+def _not_modified(request, etag, last_modified):
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        candidates = {value.strip() for value in if_none_match.split(",")}
+        return "*" in candidates or etag in candidates or etag[2:] in candidates
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            return last_modified <= parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+def http_cache(*scopes, max_age=60):
+    # Route dependency: the validators are derived from version counters, so a
+    # conditional request is answered with 304 before the handler runs.
+    cache_control = f"public, max-age={max_age}"
+
+    async def dependency(request: Request, response: Response):
+        versions = await get_versions(scopes)
+        etag = _etag(request, versions)
+        last_modified = _last_modified(versions)
+        headers = {
+            "ETag": etag,
+            "Last-Modified": format_http_date(last_modified, usegmt=True),
+            "Cache-Control": cache_control,
+        }
+
+        if _not_modified(request, etag, last_modified):
+            raise HTTPException(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+        response.headers.update(headers)
+
+    return dependency
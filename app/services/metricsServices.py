@@ -0,0 +1,94 @@
+import asyncio
+import os
+
+from app.services.cacheServices import caches
+from app.services.dbServices import pool
+from app.utils.metrics import merge_snapshots, read_snapshots, registry, render, write_snapshot
+
+# Shared directory for multi-worker deployments: each worker writes its
+# snapshot there and /metrics on any worker serves the sum. Empty it when the
+# server (re)starts, as totals from old processes are kept.
+METRICS_DIR = os.getenv("METRICS_DIR")
+METRICS_FLUSH_SECONDS = float(os.getenv("METRICS_FLUSH_SECONDS", 5))
+# When set, /metrics requires "Authorization: Bearer <METRICS_TOKEN>"
+METRICS_TOKEN = os.getenv("METRICS_TOKEN")
+
+db_pool_connections = registry.gauge("db_pool_connections", "Pooled database connections by state", ("state",))
+db_pool_max_idle = registry.gauge("db_pool_max_idle", "Idle connections the pool keeps at most")
+db_pool_opened = registry.counter("db_pool_opened_total", "Database connections opened by the pool")
+cache_hits = registry.counter("cache_hits_total", "In-process cache hits", ("cache",))
+cache_misses = registry.counter("cache_misses_total", "In-process cache misses", ("cache",))
+cache_entries = registry.gauge("cache_entries", "Entries held by each in-process cache", ("cache",))
+
+_export_task = None
+
+
+@registry.collector
+def collect_pool():
+    stats = pool.stats()
+    db_pool_connections.set(stats["idle"], "idle")
+    db_pool_connections.set(stats["in_use"], "in_use")
+    db_pool_max_idle.set(stats["max_idle"])
+    db_pool_opened.set(stats["opened"])
+
+
+@registry.collector
+def collect_caches():
+    for name, cache in list(caches.items()):
+        stats = cache.stats()
+        cache_hits.set(stats["hits"], name)
+        cache_misses.set(stats["misses"], name)
+        cache_entries.set(stats["entries"], name)
+
+
+def add_hit_ratios(merged):
+    # Ratios do not add up across workers, so they are derived after merging
+    hits = merged.get("cache_hits_total", {}).get("values", {})
+    misses = merged.get("cache_misses_total", {}).get("values", {})
+    values = {}
+    for key in set(hits) | set(misses):
+        total = hits.get(key, 0) + misses.get(key, 0)
+        values[key] = round(hits.get(key, 0) / total, 4) if total else 0.0
+    merged["cache_hit_ratio"] = {
+        "type": "gauge", "help": "Cache hits over lookups since start, all workers", "labels": ["cache"], "values": values,
+    }
+    return merged
+
+
+def render_metrics():
+    snapshot = registry.snapshot()
+    snapshots = [snapshot]
+    if METRICS_DIR:
+        write_snapshot(METRICS_DIR, snapshot)
+        snapshots += read_snapshots(METRICS_DIR, exclude_pid=snapshot["pid"])
+    return render(add_hit_ratios(merge_snapshots(snapshots, gauge_max_age=METRICS_FLUSH_SECONDS * 3)))
+
+
+async def export_loop():
+    while True:
+        await asyncio.sleep(METRICS_FLUSH_SECONDS)
+        try:
+            write_snapshot(METRICS_DIR, registry.snapshot())
+        except Exception as e:
+            print(e)
+
+
+def start_export():
+    global _export_task
+    if METRICS_DIR and _export_task is None:
+        os.makedirs(METRICS_DIR, exist_ok=True)
+        _export_task = asyncio.get_running_loop().create_task(export_loop())
+
+
+async def stop_export():
+    global _export_task
+    if _export_task is None:
+        return
+    _export_task.cancel()
+    try:
+        await _export_task
+    except asyncio.CancelledError:
+        pass
+    _export_task = None
+    # Final totals, so counters from this worker outlive it
+    write_snapshot(METRICS_DIR, registry.snapshot())
@@ -0,0 +1,59 @@
+from typing import Dict, Iterator, List, Optional
+
+
+class Row:
+    # Base for per-projection row classes: attribute access by column name,
+    # no per-instance __dict__. Values arrive in column order.
+    __slots__ = ()
+
+    def __init__(self, *values):
+        if len(values) != len(self.__slots__):
+            raise TypeError(f"{type(self).__name__} takes {len(self.__slots__)} values, got {len(values)}")
+        for name, value in zip(self.__slots__, values):
+            setattr(self, name, value)
+
+    def __repr__(self):
+        values = ", ".join(f"{name}={getattr(self, name)!r}" for name in self.__slots__)
+        return f"{type(self).__name__}({values})"
+
+    def as_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+def _row_class(name, fields):
+    return type(name, (Row,), {"__slots__": tuple(fields)})
+
+
+class Projection:
+    # A named column list for one use case. Queries interpolate .columns in
+    # place of "*", and rows come back as instances of .row_class, so adding a
+    # column to a table cannot shift what a route reads.
+    def __init__(self, name: str, columns: Dict[str, str]):
+        self.name = name
+        self.fields = tuple(columns)
+        self.expressions = dict(columns)
+        self.columns = ", ".join(columns.values())
+        self.row_class = _row_class(name, self.fields)
+
+    def extend(self, name: str, **columns: str) -> "Projection":
+        return Projection(name, {**self.expressions, **columns})
+
+    def row(self, values) -> Row:
+        return self.row_class(*values)
+
+    def one(self, cursor) -> Optional[Row]:
+        values = cursor.fetchone()
+        return None if values is None else self.row_class(*values)
+
+    def all(self, cursor) -> List[Row]:
+        row_class = self.row_class
+        return [row_class(*values) for values in cursor.fetchall()]
+
+    def iterate(self, cursor, batch_size: int = 1000) -> Iterator[Row]:
+        row_class = self.row_class
+        while True:
+            batch = cursor.fetchmany(batch_size)
+            if not batch:
+                return
+            for values in batch:
+                yield row_class(*values)
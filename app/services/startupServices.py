@@ -0,0 +1,75 @@
+import os
+import time
+from contextlib import contextmanager
+
+from app.database.migrate import ensure_schema
+from app.services.dbServices import DATABASE_POOL_SIZE, connect_to_database, pool
+from app.services.httpCacheServices import get_versions
+
+# Connections opened before the first request; capped by DATABASE_POOL_SIZE
+STARTUP_WARM_CONNECTIONS = int(os.getenv("STARTUP_WARM_CONNECTIONS", 2))
+# Newest products loaded into the product cache at boot
+STARTUP_WARM_PRODUCTS = int(os.getenv("STARTUP_WARM_PRODUCTS", 100))
+# Print the per-phase boot timings once startup finishes
+STARTUP_PROFILE = os.getenv("STARTUP_PROFILE", "").lower() in ("1", "true", "yes")
+
+CACHE_SCOPES = ("products", "variants", "categories", "reviews")
+
+boot_started = time.perf_counter()
+timings = []
+
+
+@contextmanager
+def timed(phase):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.append((phase, time.perf_counter() - started))
+
+
+async def warm_caches():
+    await get_versions(CACHE_SCOPES)
+    if STARTUP_WARM_PRODUCTS <= 0:
+        return
+    # Imported here so loading this module does not pull in the products package
+    from app.products.services import fetch_products_by_ids
+
+    conn = await connect_to_database()
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SELECT TOP (?) productId FROM Products ORDER BY productId DESC", [STARTUP_WARM_PRODUCTS])
+        product_ids = [row[0] for row in cursor.fetchall()]
+        if product_ids:
+            fetch_products_by_ids(cursor, product_ids)
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def report():
+    total = time.perf_counter() - boot_started
+    lines = [f"Startup profile ({total * 1000:.1f} ms since app import)"]
+    for phase, seconds in timings:
+        lines.append(f"  {seconds * 1000:9.1f} ms  {phase}")
+    return "\n".join(lines)
+
+
+async def startup():
+    with timed("schema"):
+        schema = await ensure_schema()
+    timings[-1] = (f"schema ({schema})", timings[-1][1])
+
+    if DATABASE_POOL_SIZE > 0:
+        with timed("connection pool"):
+            pool.warm(STARTUP_WARM_CONNECTIONS)
+
+    with timed("caches"):
+        try:
+            await warm_caches()
+        except Exception as e:
+            # A cold cache is only slower, never wrong
+            print(e)
+
+    if STARTUP_PROFILE:
+        print(report())
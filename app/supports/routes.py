@@ -3,6 +3,7 @@ from typing import List
 from fastapi.security import OAuth2PasswordBearer
 
 from app.services.dbServices import connect_to_database
+from app.services.projectionServices import Projection
 from app.supports.schemas import (
     SupportTicketCreate,
     SupportTicketUpdate,
@@ -14,6 +15,28 @@ from app.utils.date_convert import format_datetime
 router = APIRouter()
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/admin/auth/login")
 
+TICKET = Projection("SupportTicketRow", {
+    "ticket_id": "ticketId",
+    "user_id": "userId",
+    "subject": "subject",
+    "message": "message",
+    "status": "status",
+    "created_at": "createdAt",
+    "updated_at": "updatedAt",
+})
+
+
+def _ticket_row(ticket):
+    return {
+        "ticket_id": ticket.ticket_id,
+        "user_id": ticket.user_id,
+        "subject": ticket.subject,
+        "message": ticket.message,
+        "status": ticket.status,
+        "created_at": format_datetime(ticket.created_at),
+        "updated_at": format_datetime(ticket.updated_at),
+    }
+
 
 @router.post("/support/ticket", response_model=SupportTicketResponse)
 async def create_ticket(
@@ -47,10 +70,10 @@ async def create_ticket(
         conn.commit()
 
         cursor.execute(
-            "SELECT * FROM SupportTickets WHERE userId=? ORDER BY createdAt DESC",
+            f"SELECT {TICKET.columns} FROM SupportTickets WHERE userId=? ORDER BY createdAt DESC",
             (user_id,),
         )
-        new_ticket = cursor.fetchone()
+        new_ticket = TICKET.one(cursor)
 
         cursor.close()
         conn.close()
@@ -61,15 +84,7 @@ async def create_ticket(
                 detail="Error retrieving new ticket",
             )
 
-        return {
-            "ticket_id": new_ticket[0],
-            "user_id": new_ticket[1],
-            "subject": new_ticket[2],
-            "message": new_ticket[3],
-            "status": new_ticket[4],
-            "created_at": format_datetime(new_ticket[5]),
-            "updated_at": format_datetime(new_ticket[6]),
-        }
+        return _ticket_row(new_ticket)
     except Exception as e:
         print(f"Exception: {e}")
         raise HTTPException(
@@ -97,24 +112,13 @@ async def get_tickets(token: str = Depends(oauth2_scheme)):
 
         user_id = user_record[0]
 
-        cursor.execute("SELECT * FROM SupportTickets WHERE userId=?", (user_id,))
-        tickets = cursor.fetchall()
+        cursor.execute(f"SELECT {TICKET.columns} FROM SupportTickets WHERE userId=?", (user_id,))
+        tickets = TICKET.all(cursor)
 
         cursor.close()
         conn.close()
 
-        return [
-            {
-                "ticket_id": item[0],
-                "user_id": item[1],
-                "subject": item[2],
-                "message": item[3],
-                "status": item[4],
-                "created_at": format_datetime(item[5]),
-                "updated_at": format_datetime(item[6]),
-            }
-            for item in tickets
-        ]
+        return [_ticket_row(item) for item in tickets]
     except Exception as e:
         print(f"Exception: {e}")
         raise HTTPException(
@@ -141,10 +145,10 @@ async def get_ticket(ticket_id: int, token: str = Depends(oauth2_scheme)):
         user_id = user_record[0]
         
         cursor.execute(
-            "SELECT * FROM SupportTickets WHERE ticketId=? AND userId=?",
+            f"SELECT {TICKET.columns} FROM SupportTickets WHERE ticketId=? AND userId=?",
             (ticket_id, user_id),
         )
-        ticket = cursor.fetchone()
+        ticket = TICKET.one(cursor)
         
         cursor.close()
         conn.close()
@@ -152,15 +156,7 @@ async def get_ticket(ticket_id: int, token: str = Depends(oauth2_scheme)):
         if not ticket:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Ticket not found")
         
-        return {
-            "ticket_id": ticket[0],
-            "user_id": ticket[1],
-            "subject": ticket[2],
-            "message": ticket[3],
-            "status": ticket[4],
-            "created_at": format_datetime(ticket[5]),
-            "updated_at": format_datetime(ticket[6]),
-        }
+        return _ticket_row(ticket)
     except Exception as e:
         print(f"Exception: {e}")
         raise HTTPException(
@@ -191,7 +187,7 @@ async def update_ticket(
         user_id = user_record[0]
         
         cursor.execute(
-            "SELECT * FROM SupportTickets WHERE ticketId=? AND userId=?",
+            "SELECT 1 FROM SupportTickets WHERE ticketId=? AND userId=?",
             (ticket_id, user_id),
         )
         existing_ticket = cursor.fetchone()
@@ -218,10 +214,10 @@ async def update_ticket(
         conn.commit()
         
         cursor.execute(
-            "SELECT * FROM SupportTickets WHERE ticketId=? AND userId=?",
+            f"SELECT {TICKET.columns} FROM SupportTickets WHERE ticketId=? AND userId=?",
             (ticket_id, user_id),
         )
-        updated_ticket = cursor.fetchone()
+        updated_ticket = TICKET.one(cursor)
         
         cursor.close()
         conn.close()
@@ -231,15 +227,7 @@ async def update_ticket(
                 status_code=status.HTTP_404_NOT_FOUND, detail="Failed to update ticket"
             )
         
-        return {
-            "ticket_id": updated_ticket[0],
-            "user_id": updated_ticket[1],
-            "subject": updated_ticket[2],
-            "message": updated_ticket[3],
-            "status": updated_ticket[4],
-            "created_at": format_datetime(updated_ticket[5]),
-            "updated_at": format_datetime(updated_ticket[6]),
-        }
+        return _ticket_row(updated_ticket)
     except Exception as e:
         print(f"Exception: {e}")
         raise HTTPException(
@@ -266,7 +254,7 @@ async def delete_ticket(ticket_id: int, token: str = Depends(oauth2_scheme)):
         user_id = user_record[0]
         
         cursor.execute(
-            "SELECT * FROM SupportTickets WHERE ticketId=? AND userId=?",
+            "SELECT 1 FROM SupportTickets WHERE ticketId=? AND userId=?",
             (ticket_id, user_id),
         )
         existing_ticket = cursor.fetchone()
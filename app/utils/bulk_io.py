@@ -0,0 +1,124 @@
+import csv
+import io
+import json
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, List, Sequence, Tuple
+
+SUPPORTED_FORMATS = ("csv", "ndjson")
+MEDIA_TYPES = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+DEFAULT_BATCH_SIZE = 1000
+MAX_REPORTED_ERRORS = 100
+
+
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    buffer = b""
+    first = True
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            text = line.decode("utf-8").rstrip("\r")
+            if first:
+                text, first = text.lstrip("\ufeff"), False
+            yield text
+    if buffer:
+        text = buffer.decode("utf-8").rstrip("\r")
+        yield text.lstrip("\ufeff") if first else text
+
+
+async def iter_records(chunks: AsyncIterator[bytes], fmt: str) -> AsyncIterator[Tuple[int, Any]]:
+    # NDJSON lines are yielded undecoded so a bad line is reported per record
+    # instead of aborting the whole upload.
+    number = 0
+    if fmt == "ndjson":
+        async for line in iter_lines(chunks):
+            if line.strip():
+                number += 1
+                yield number, line
+        return
+
+    header = None
+    pending = ""
+    async for line in iter_lines(chunks):
+        pending = f"{pending}\n{line}" if pending else line
+        if pending.count('"') % 2:
+            # quoted field continues on the next line
+            continue
+        record, pending = pending, ""
+        if not record.strip():
+            continue
+        values = next(csv.reader([record]))
+        if header is None:
+            header = [value.strip() for value in values]
+            continue
+        number += 1
+        yield number, {key: value for key, value in zip(header, values) if value != ""}
+
+
+async def import_records(
+    chunks: AsyncIterator[bytes],
+    fmt: str,
+    parse: Callable[[Dict[str, Any]], Any],
+    write_batch: Callable[[List[Any]], int],
+    batch_size: int = DEFAULT_BATCH_SIZE,
+) -> Dict[str, Any]:
+    summary = {"processed": 0, "imported": 0, "failed": 0, "errors": []}
+    batch = []
+
+    async for number, raw in iter_records(chunks, fmt):
+        summary["processed"] += 1
+        try:
+            record = json.loads(raw) if isinstance(raw, str) else raw
+            batch.append(parse(record))
+        except Exception as e:
+            summary["failed"] += 1
+            if len(summary["errors"]) < MAX_REPORTED_ERRORS:
+                summary["errors"].append({"record": number, "error": str(e)})
+            continue
+
+        if len(batch) >= batch_size:
+            summary["imported"] += write_batch(batch)
+            batch = []
+
+    if batch:
+        summary["imported"] += write_batch(batch)
+
+    return summary
+
+
+def stream_rows(
+    conn,
+    cursor,
+    to_dict: Callable[[Sequence[Any]], Dict[str, Any]],
+    fields: Sequence[str],
+    fmt: str,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+) -> Iterator[bytes]:
+    # Rows are pulled from the open cursor with fetchmany so only one batch is
+    # held in memory; the connection is released when the client finishes or
+    # disconnects.
+    try:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, lineterminator="\n")
+        if fmt == "csv":
+            writer.writerow(fields)
+
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            for row in rows:
+                item = to_dict(row)
+                if fmt == "csv":
+                    writer.writerow(["" if item[field] is None else item[field] for field in fields])
+                else:
+                    buffer.write(json.dumps(item, default=str))
+                    buffer.write("\n")
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+
+        if buffer.tell():
+            yield buffer.getvalue().encode("utf-8")
+    finally:
+        cursor.close()
+        conn.close()
@@ -0,0 +1,177 @@
+import os
+import zlib
+from typing import Iterable, Optional
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSION_MINIMUM_SIZE = int(os.getenv("COMPRESSION_MINIMUM_SIZE", 1024))
+GZIP_LEVEL = int(os.getenv("COMPRESSION_GZIP_LEVEL", 6))
+BROTLI_QUALITY = int(os.getenv("COMPRESSION_BROTLI_QUALITY", 4))
+
+# Server-sent events are left alone: proxies and browsers buffer compressed
+# event streams, which defeats the heartbeat and push latency.
+COMPRESSIBLE_TYPES = (
+    "application/json",
+    "application/x-ndjson",
+    "text/csv",
+    "text/plain",
+    "text/html",
+)
+
+
+class _GzipEncoder:
+    name = "gzip"
+
+    def __init__(self, level: int):
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, zlib.MAX_WBITS | 16)
+
+    def compress(self, data: bytes) -> bytes:
+        # Sync flush so each streamed chunk reaches the client as it is produced
+        return self._compressor.compress(data) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self, data: bytes = b"") -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush(zlib.Z_FINISH)
+
+
+class _BrotliEncoder:
+    name = "br"
+
+    def __init__(self, quality: int):
+        self._compressor = brotli.Compressor(quality=quality)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.process(data) + self._compressor.flush()
+
+    def finish(self, data: bytes = b"") -> bytes:
+        return self._compressor.process(data) + self._compressor.finish()
+
+
+def _accepted_encodings(header: str) -> dict:
+    accepted = {}
+    for part in header.split(","):
+        coding, _, params = part.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        if coding:
+            accepted[coding.strip().lower()] = quality
+    return accepted
+
+
+class CompressionMiddleware:
+    # Pure ASGI so streamed responses are compressed chunk by chunk instead of
+    # being buffered. Bodies under minimum_size go out as they are.
+    def __init__(
+        self,
+        app,
+        minimum_size: int = COMPRESSION_MINIMUM_SIZE,
+        content_types: Iterable[str] = COMPRESSIBLE_TYPES,
+        gzip_level: int = GZIP_LEVEL,
+        brotli_quality: int = BROTLI_QUALITY,
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.content_types = tuple(content_types)
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope["headers"])
+        accepted = _accepted_encodings(headers.get(b"accept-encoding", b"").decode("latin-1"))
+        encoding = None
+        if brotli is not None and accepted.get("br", 0) > 0:
+            encoding = "br"
+        elif accepted.get("gzip", 0) > 0:
+            encoding = "gzip"
+
+        responder = _CompressionResponder(self, send, encoding)
+        await self.app(scope, receive, responder.send)
+
+    def new_encoder(self, encoding: str):
+        if encoding == "br":
+            return _BrotliEncoder(self.brotli_quality)
+        return _GzipEncoder(self.gzip_level)
+
+    def is_compressible(self, content_type: str) -> bool:
+        media_type = content_type.split(";", 1)[0].strip().lower()
+        return media_type in self.content_types
+
+
+class _CompressionResponder:
+    def __init__(self, middleware: CompressionMiddleware, send, encoding: Optional[str]):
+        self.middleware = middleware
+        self._send = send
+        self.encoding = encoding
+        self.start = None
+        self.encoder = None
+        self.passthrough = False
+        self.buffer = b""
+
+    async def send(self, message):
+        message_type = message["type"]
+
+        if message_type == "http.response.start":
+            self.start = message
+            headers = {key.lower(): value for key, value in message.get("headers", [])}
+            eligible = (
+                message["status"] not in (204, 206, 304)
+                and b"content-encoding" not in headers
+                and self.middleware.is_compressible(headers.get(b"content-type", b"").decode("latin-1"))
+            )
+            if eligible:
+                # Shared caches must key compressed and plain variants apart
+                self.start = {**message, "headers": [*message.get("headers", []), (b"vary", b"Accept-Encoding")]}
+            self.passthrough = not eligible or self.encoding is None
+            if self.passthrough:
+                await self._send(self.start)
+            return
+
+        if message_type != "http.response.body" or self.passthrough:
+            await self._send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.encoder is None:
+            self.buffer += body
+            if len(self.buffer) < self.middleware.minimum_size:
+                if not more_body:
+                    await self._send(self.start)
+                    await self._send({"type": "http.response.body", "body": self.buffer})
+                return
+
+            self.encoder = self.middleware.new_encoder(self.encoding)
+            body, self.buffer = self.buffer, b""
+            if not more_body:
+                compressed = self.encoder.finish(body)
+                await self._send(self._compressed_start(len(compressed)))
+                await self._send({"type": "http.response.body", "body": compressed})
+                return
+            await self._send(self._compressed_start(None))
+
+        compressed = self.encoder.compress(body) if more_body else self.encoder.finish(body)
+        if compressed or not more_body:
+            await self._send({"type": "http.response.body", "body": compressed, "more_body": more_body})
+
+    def _compressed_start(self, content_length: Optional[int]):
+        headers = [
+            (key, value)
+            for key, value in self.start.get("headers", [])
+            if key.lower() != b"content-length"
+        ]
+        headers.append((b"content-encoding", self.encoding.encode("latin-1")))
+        if content_length is not None:
+            headers.append((b"content-length", str(content_length).encode("latin-1")))
+        return {**self.start, "headers": headers}
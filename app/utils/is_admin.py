@@ -1,3 +1,4 @@
+from app.auth.token import verify_token
 from app.services.dbServices import connect_to_database
 
 async def is_admin(username: str) -> bool:
@@ -7,4 +8,11 @@ async def is_admin(username: str) -> bool:
     exists = cursor.fetchone() is not None
     cursor.close()
     conn.close()
-    return exists
\ No newline at end of file
+    return exists
+
+async def is_admin_token(token: str) -> bool:
+    try:
+        payload = verify_token(token)
+        return await is_admin(payload.get("sub"))
+    except Exception:
+        return False
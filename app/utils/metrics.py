@@ -0,0 +1,257 @@
+import json
+import os
+import time
+from bisect import bisect_left
+
+from app.utils.query_stats import current_queries, route_template
+
+# Prometheus' default latency buckets, in seconds
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+
+# Metrics are recorded from the event loop thread only (middleware code and
+# collectors), so updates are plain dict operations with no locks. Each
+# metric keeps one value per tuple of label values.
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name, help, labels=()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.values = {}
+
+    def inc(self, *labels, amount=1):
+        self.values[labels] = self.values.get(labels, 0) + amount
+
+    def set(self, value, *labels):
+        # For totals kept elsewhere (cache hits, pool opens) and copied in by a collector
+        self.values[labels] = value
+
+    def snapshot(self):
+        return {
+            "type": self.kind, "help": self.help, "labels": list(self.labels),
+            "samples": [[list(labels), value] for labels, value in self.values.items()],
+        }
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, *labels, amount=1):
+        self.values[labels] = self.values.get(labels, 0) - amount
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name, help, labels=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        self.values = {}
+
+    def observe(self, value, *labels):
+        # Per-bucket (not cumulative) counts, then the +Inf bucket, then the sum
+        entry = self.values.get(labels)
+        if entry is None:
+            entry = self.values[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+        entry[bisect_left(self.buckets, value)] += 1
+        entry[-1] += value
+
+    def snapshot(self):
+        return {
+            "type": self.kind, "help": self.help, "labels": list(self.labels), "buckets": list(self.buckets),
+            "samples": [[list(labels), list(entry)] for labels, entry in self.values.items()],
+        }
+
+
+class Registry:
+    def __init__(self):
+        self.metrics = {}
+        self.collectors = []
+
+    def register(self, metric):
+        self.metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, help, labels=()):
+        return self.register(Counter(name, help, labels))
+
+    def gauge(self, name, help, labels=()):
+        return self.register(Gauge(name, help, labels))
+
+    def histogram(self, name, help, labels=(), buckets=DEFAULT_BUCKETS):
+        return self.register(Histogram(name, help, labels, buckets))
+
+    def collector(self, function):
+        # Called before every snapshot to copy in state owned by other modules
+        self.collectors.append(function)
+        return function
+
+    def snapshot(self):
+        for collect in self.collectors:
+            try:
+                collect()
+            except Exception as e:
+                print(e)
+        return {
+            "pid": os.getpid(),
+            "written_at": time.time(),
+            "metrics": {name: metric.snapshot() for name, metric in self.metrics.items()},
+        }
+
+
+def merge_snapshots(snapshots, gauge_max_age=None):
+    # Counters and histograms are summed over every process that ever wrote
+    # one, so totals survive worker restarts. Gauges describe live state and
+    # come only from snapshots newer than gauge_max_age seconds.
+    now = time.time()
+    merged = {}
+    for snapshot in snapshots:
+        live = gauge_max_age is None or now - snapshot["written_at"] <= gauge_max_age
+        for name, metric in snapshot["metrics"].items():
+            if metric["type"] == "gauge" and not live:
+                continue
+            target = merged.get(name)
+            if target is None:
+                target = merged[name] = {key: value for key, value in metric.items() if key != "samples"}
+                target["values"] = {}
+            values = target["values"]
+            for labels, value in metric["samples"]:
+                key = tuple(labels)
+                if key not in values:
+                    values[key] = list(value) if isinstance(value, list) else value
+                elif isinstance(value, list):
+                    values[key] = [left + right for left, right in zip(values[key], value)]
+                else:
+                    values[key] += value
+    return merged
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names, values, extra=None):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value):
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+def render(merged):
+    # Prometheus text exposition format, version 0.0.4
+    lines = []
+    for name in sorted(merged):
+        metric = merged[name]
+        lines.append(f"# HELP {name} {metric['help']}")
+        lines.append(f"# TYPE {name} {metric['type']}")
+        names = metric["labels"]
+        for key in sorted(metric["values"]):
+            value = metric["values"][key]
+            if metric["type"] != "histogram":
+                lines.append(f"{name}{_labels(names, key)} {_number(value)}")
+                continue
+            cumulative = 0
+            for bound, count in zip(metric["buckets"] + ["+Inf"], value[:-1]):
+                cumulative += count
+                le = 'le="%s"' % (bound if bound == "+Inf" else _number(float(bound)))
+                lines.append(f"{name}_bucket{_labels(names, key, le)} {cumulative}")
+            lines.append(f"{name}_sum{_labels(names, key)} {_number(float(value[-1]))}")
+            lines.append(f"{name}_count{_labels(names, key)} {cumulative}")
+    return "\n".join(lines) + "\n"
+
+
+def write_snapshot(directory, snapshot):
+    # Atomic replace, so a scraping worker never reads a half-written file
+    path = os.path.join(directory, f"metrics-{snapshot['pid']}.json")
+    temporary = f"{path}.tmp"
+    with open(temporary, "w") as f:
+        json.dump(snapshot, f)
+    os.replace(temporary, path)
+
+
+def read_snapshots(directory, exclude_pid=None):
+    snapshots = []
+    for filename in os.listdir(directory):
+        if not (filename.startswith("metrics-") and filename.endswith(".json")):
+            continue
+        if filename == f"metrics-{exclude_pid}.json":
+            continue
+        try:
+            with open(os.path.join(directory, filename)) as f:
+                snapshots.append(json.load(f))
+        except (OSError, ValueError) as e:
+            print(e)
+    return snapshots
+
+
+registry = Registry()
+
+http_requests_in_flight = registry.gauge("http_requests_in_flight", "HTTP requests being served")
+http_request_duration = registry.histogram(
+    "http_request_duration_seconds", "HTTP request latency by route template and status",
+    ("method", "route", "status"),
+)
+db_query_duration = registry.histogram(
+    "db_query_duration_seconds", "SQL statement time, execute plus fetch, by route template",
+    ("method", "route"), QUERY_BUCKETS,
+)
+db_queries_per_request = registry.histogram(
+    "db_queries_per_request", "SQL statements run per HTTP request", ("method", "route"), QUERY_COUNT_BUCKETS,
+)
+
+
+class MetricsMiddleware:
+    # Sits inside QueryStatsMiddleware so the request's query record is still
+    # current when the response is done. Latency stops at the last body
+    # message: background tasks run inside the ASGI call afterwards and are
+    # not part of the request.
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+        finished = False
+
+        def finish():
+            nonlocal finished
+            finished = True
+            http_requests_in_flight.dec()
+            http_request_duration.observe(
+                time.perf_counter() - started, scope["method"], route_template(scope), str(status_code)
+            )
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+            if message["type"] == "http.response.body" and not message.get("more_body", False) and not finished:
+                finish()
+
+        http_requests_in_flight.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            if not finished:
+                finish()
+            method, route = scope["method"], route_template(scope)
+            queries = current_queries()
+            if queries is not None:
+                db_queries_per_request.observe(queries.statements, method, route)
+                for _, seconds in queries.timings:
+                    db_query_duration.observe(seconds, method, route)
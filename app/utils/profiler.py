@@ -0,0 +1,177 @@
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+# Per-request profiles need a finer interval than live sampling: most
+# requests finish within tens of milliseconds.
+PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", 5))
+PROFILE_REQUEST_INTERVAL_MS = float(os.getenv("PROFILE_REQUEST_INTERVAL_MS", 1))
+PROFILE_MAX_SECONDS = float(os.getenv("PROFILE_MAX_SECONDS", 60))
+
+# Leaf frames of threads parked with nothing to do: the event loop in
+# select(), pool threads waiting on their queue or a condition.
+IDLE_LEAVES = {
+    ("selectors.py", "select"),
+    ("threading.py", "wait"),
+    ("threading.py", "_wait_for_tstate_lock"),
+    ("queue.py", "get"),
+}
+
+# Import roots trimmed from file names, longest first, so frames read
+# "package/module.py:qualname" and collapse the same way on every machine
+_ROOTS = sorted({os.path.abspath(path) for path in sys.path if path} | {os.getcwd()}, key=len, reverse=True)
+_labels = {}
+
+
+def _label(code):
+    label = _labels.get(code)
+    if label is None:
+        path = code.co_filename
+        for root in _ROOTS:
+            if path.startswith(root + os.sep):
+                path = path[len(root) + 1:]
+                break
+        label = _labels[code] = f"{path.replace(os.sep, '/')}:{getattr(code, 'co_qualname', code.co_name)}"
+    return label
+
+
+class Sampler:
+    # Statistical wall-clock profiler: a daemon thread reads every thread's
+    # current stack every interval and counts the collapsed stacks. Nothing
+    # runs and nothing is hooked while no sampler is started.
+    def __init__(self, interval=PROFILE_INTERVAL_MS / 1000, include_idle=False, keep=None):
+        self.interval = interval
+        self.include_idle = include_idle
+        self.keep = keep
+        self.stacks = Counter()
+        self.samples = 0
+        self.started = None
+        self.stopped = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self.started = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        self.stopped = time.perf_counter()
+        return self
+
+    def _run(self):
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            self.samples += 1
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own:
+                    continue
+                frames = []
+                while frame is not None:
+                    frames.append(frame)
+                    frame = frame.f_back
+                leaf = frames[0].f_code
+                if not self.include_idle and (os.path.basename(leaf.co_filename), leaf.co_name) in IDLE_LEAVES:
+                    continue
+                if self.keep is not None and not self.keep(frames):
+                    continue
+                stack = [names.get(thread_id, str(thread_id))]
+                stack.extend(_label(frame.f_code) for frame in reversed(frames))
+                self.stacks[";".join(stack)] += 1
+
+    def collapsed(self):
+        # Brendan Gregg's folded format: flamegraph.pl, speedscope, inferno
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+    def headers(self):
+        return {
+            "X-Profile-Samples": str(self.samples),
+            "X-Profile-Interval-Ms": f"{self.interval * 1000:g}",
+            "X-Profile-Duration-Ms": f"{((self.stopped or time.perf_counter()) - self.started) * 1000:.1f}",
+        }
+
+
+_live = threading.Lock()
+
+
+def start_live(interval, include_idle):
+    # One live profile per worker at a time; None while another is running
+    if not _live.acquire(blocking=False):
+        return None
+    try:
+        return Sampler(interval, include_idle).start()
+    except Exception:
+        _live.release()
+        raise
+
+
+def finish_live(sampler):
+    try:
+        return sampler.stop()
+    finally:
+        _live.release()
+
+
+def _header(scope, name):
+    for key, value in scope["headers"]:
+        if key == name:
+            return value.decode("latin-1")
+    return None
+
+
+class ProfilerMiddleware:
+    # An admin request with "X-Profile: 1" is profiled on its own: samples are
+    # kept when the stack holds this request's middleware frame (loop-thread
+    # work: routing, validation, async endpoints, serialization) or the
+    # endpoint's code (sync endpoints in the threadpool). The response body is
+    # replaced by the collapsed stacks; the endpoint's status moves to
+    # X-Profile-Status. Other requests only pay for the header lookup.
+    def __init__(self, app, is_admin_token):
+        self.app = app
+        self.is_admin_token = is_admin_token
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not _header(scope, b"x-profile"):
+            await self.app(scope, receive, send)
+            return
+
+        authorization = _header(scope, b"authorization") or ""
+        token = authorization[7:] if authorization.lower().startswith("bearer ") else None
+        if not token or not await self.is_admin_token(token):
+            await self.app(scope, receive, send)
+            return
+
+        root = sys._getframe()
+
+        def keep(frames):
+            endpoint = getattr(scope.get("endpoint"), "__code__", None)
+            return any(frame is root or frame.f_code is endpoint for frame in frames)
+
+        status_code = 500
+
+        async def capture(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+
+        sampler = Sampler(PROFILE_REQUEST_INTERVAL_MS / 1000, keep=keep).start()
+        try:
+            await self.app(scope, receive, capture)
+        finally:
+            sampler.stop()
+
+        body = sampler.collapsed().encode()
+        headers = {**sampler.headers(), "X-Profile-Status": str(status_code)}
+        await send({
+            "type": "http.response.start",
+            "status": 200,
+            "headers": [(b"content-type", b"text/plain; charset=utf-8"), (b"content-length", str(len(body)).encode())]
+            + [(key.lower().encode(), value.encode()) for key, value in headers.items()],
+        })
+        await send({"type": "http.response.body", "body": body})
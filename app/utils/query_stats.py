@@ -0,0 +1,267 @@
+import os
+import re
+import threading
+import time
+from collections import deque
+from contextvars import ContextVar
+from functools import lru_cache
+
+# Record statement counts, DB time and rows for every request
+QUERY_STATS = os.getenv("QUERY_STATS", "on").lower() not in ("0", "off", "false", "no")
+# Add the per-request numbers to response headers (X-DB-* and Server-Timing)
+DEBUG = os.getenv("DEBUG", "").lower() in ("1", "true", "yes")
+# Statements slower than this are printed and kept in the slow log
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", 100))
+SLOW_LOG_SIZE = int(os.getenv("SLOW_LOG_SIZE", 200))
+# Distinct normalized statements tracked; later ones are counted as "(other)"
+MAX_TRACKED_STATEMENTS = int(os.getenv("MAX_TRACKED_STATEMENTS", 500))
+
+_STRING_RE = re.compile(r"N?'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r"(?<![\w.@])-?\d+(?:\.\d+)?\b")
+_IN_LIST_RE = re.compile(r"\bIN\s*\(\s*\?(?:\s*,\s*\?)*\s*\)", re.I)
+_VALUES_RE = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)(?:\s*,\s*\(\s*\?(?:\s*,\s*\?)*\s*\))+")
+_SPACE_RE = re.compile(r"\s+")
+
+
+@lru_cache(maxsize=2048)
+def normalize_sql(sql):
+    # Literals become ?, IN lists and multi-row VALUES collapse, so statements
+    # that differ only by their data group together.
+    sql = _STRING_RE.sub("?", sql)
+    sql = _NUMBER_RE.sub("?", sql)
+    sql = _IN_LIST_RE.sub("IN (...)", sql)
+    sql = _VALUES_RE.sub("(...)", sql)
+    return _SPACE_RE.sub(" ", sql).strip()
+
+
+class RequestQueries:
+    # Each statement is a [sql, seconds] cell; the cursor keeps adding fetch
+    # time to the cell of the statement it last executed.
+    __slots__ = ("endpoint", "timings", "seconds", "rows")
+
+    def __init__(self, endpoint=None):
+        self.endpoint = endpoint
+        self.timings = []
+        self.seconds = 0.0
+        self.rows = 0
+
+    @property
+    def statements(self):
+        return len(self.timings)
+
+    @property
+    def slow(self):
+        return [cell for cell in self.timings if cell[1] * 1000 >= SLOW_QUERY_MS]
+
+    def record(self, sql, seconds):
+        cell = [sql, seconds]
+        self.timings.append(cell)
+        self.seconds += seconds
+        return cell
+
+    def fetched(self, cell, seconds, rows):
+        # Drivers stream result sets, so fetch time is DB time too
+        cell[1] += seconds
+        self.seconds += seconds
+        self.rows += rows
+
+
+_current = ContextVar("request_queries", default=None)
+
+
+def current_queries():
+    return _current.get()
+
+
+class QueryStats:
+    # Process-wide totals, merged once per request under one lock
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.endpoints = {}
+            self.statements = {}
+            self.slow_log = deque(maxlen=SLOW_LOG_SIZE)
+
+    def merge(self, queries):
+        slow = queries.slow
+        with self._lock:
+            endpoint = self.endpoints.get(queries.endpoint)
+            if endpoint is None:
+                endpoint = self.endpoints[queries.endpoint] = {
+                    "requests": 0, "statements": 0, "db_seconds": 0.0, "rows": 0, "slow": 0, "max_statements": 0,
+                }
+            endpoint["requests"] += 1
+            endpoint["statements"] += queries.statements
+            endpoint["db_seconds"] += queries.seconds
+            endpoint["rows"] += queries.rows
+            endpoint["slow"] += len(slow)
+            endpoint["max_statements"] = max(endpoint["max_statements"], queries.statements)
+
+            for raw, seconds in queries.timings:
+                sql = normalize_sql(raw)
+                entry = self.statements.get(sql)
+                if entry is None:
+                    if len(self.statements) >= MAX_TRACKED_STATEMENTS:
+                        sql = "(other)"
+                        entry = self.statements.get(sql)
+                    if entry is None:
+                        entry = self.statements[sql] = {"calls": 0, "seconds": 0.0, "max_seconds": 0.0, "endpoints": set()}
+                entry["calls"] += 1
+                entry["seconds"] += seconds
+                entry["max_seconds"] = max(entry["max_seconds"], seconds)
+                entry["endpoints"].add(queries.endpoint)
+
+            for raw, seconds in slow:
+                sql = normalize_sql(raw)
+                print(f"Slow query ({seconds * 1000:.1f} ms) in {queries.endpoint}: {sql}")
+                self.slow_log.append({"endpoint": queries.endpoint, "sql": sql, "ms": round(seconds * 1000, 2), "at": time.time()})
+
+    def snapshot(self, top=50):
+        with self._lock:
+            endpoints = {
+                name: {
+                    **values,
+                    "db_seconds": round(values["db_seconds"], 6),
+                    "statements_per_request": round(values["statements"] / values["requests"], 2),
+                }
+                for name, values in sorted(self.endpoints.items())
+            }
+            statements = sorted(self.statements.items(), key=lambda item: -item[1]["seconds"])[:top]
+            return {
+                "slow_query_ms": SLOW_QUERY_MS,
+                "endpoints": endpoints,
+                "statements": [
+                    {
+                        "sql": sql, "calls": values["calls"], "seconds": round(values["seconds"], 6),
+                        "max_ms": round(values["max_seconds"] * 1000, 2), "endpoints": sorted(values["endpoints"]),
+                    }
+                    for sql, values in statements
+                ],
+                "slow": list(self.slow_log),
+            }
+
+
+stats = QueryStats()
+
+
+class InstrumentedCursor:
+    __slots__ = ("_cursor", "_cell")
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+        self._cell = None
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def _timed(self, sql, method, *args):
+        queries = _current.get()
+        if queries is None:
+            return method(*args)
+        started = time.perf_counter()
+        try:
+            return method(*args)
+        finally:
+            self._cell = queries.record(sql, time.perf_counter() - started)
+
+    def _fetched(self, method, *args):
+        queries = _current.get()
+        if queries is None or self._cell is None:
+            return method(*args)
+        started = time.perf_counter()
+        result = method(*args)
+        rows = len(result) if isinstance(result, list) else int(result is not None)
+        queries.fetched(self._cell, time.perf_counter() - started, rows)
+        return result
+
+    def execute(self, sql, *args):
+        return self._timed(sql, self._cursor.execute, sql, *args)
+
+    def executemany(self, sql, *args):
+        return self._timed(sql, self._cursor.executemany, sql, *args)
+
+    def fetchone(self):
+        return self._fetched(self._cursor.fetchone)
+
+    def fetchmany(self, *args):
+        return self._fetched(self._cursor.fetchmany, *args)
+
+    def fetchall(self):
+        return self._fetched(self._cursor.fetchall)
+
+
+class InstrumentedConnection:
+    __slots__ = ("_conn",)
+
+    def __init__(self, conn):
+        self._conn = conn
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def cursor(self):
+        return InstrumentedCursor(self._conn.cursor())
+
+    def close(self):
+        return self._conn.close()
+
+
+def instrument(conn):
+    return InstrumentedConnection(conn) if QUERY_STATS and conn is not None else conn
+
+
+def route_template(scope):
+    route = scope.get("route")
+    template = getattr(route, "path", None)
+    if not template:
+        return "(unmatched)"
+    # include_router copies the router prefix into route.path, so the
+    # template matches the request path as it is. FastAPI releases that
+    # include routers lazily put the router's own route in the scope instead,
+    # whose path lacks the prefix; the prefix is then the part of the request
+    # path in front of the template's segments.
+    path = scope["path"]
+    path_regex = getattr(route, "path_regex", None)
+    if path_regex is None or path_regex.match(path):
+        return template
+    return path.rsplit("/", template.count("/"))[0] + template
+
+
+class QueryStatsMiddleware:
+    # Pure ASGI so the request's context (and the RequestQueries in it) is the
+    # one sync routes inherit in their worker threads. Headers reflect the
+    # statements run before the response starts; anything a streaming body
+    # runs afterwards still reaches the aggregates.
+    def __init__(self, app, headers=DEBUG):
+        self.app = app
+        self.headers = headers
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not QUERY_STATS:
+            await self.app(scope, receive, send)
+            return
+
+        queries = RequestQueries()
+        token = _current.set(queries)
+
+        async def send_with_headers(message):
+            if message["type"] == "http.response.start" and self.headers:
+                milliseconds = queries.seconds * 1000
+                message["headers"] = list(message.get("headers", [])) + [
+                    (b"x-db-queries", str(queries.statements).encode()),
+                    (b"x-db-time-ms", f"{milliseconds:.2f}".encode()),
+                    (b"x-db-rows", str(queries.rows).encode()),
+                    (b"x-db-slow-queries", str(len(queries.slow)).encode()),
+                    (b"server-timing", f'db;dur={milliseconds:.2f};desc="{queries.statements} queries"'.encode()),
+                ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_headers)
+        finally:
+            _current.reset(token)
+            queries.endpoint = f"{scope['method']} {route_template(scope)}"
+            stats.merge(queries)
@@ -0,0 +1,74 @@
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from operator import attrgetter, itemgetter
+from typing import Any, Callable, Dict, Union
+
+from fastapi.responses import Response
+
+from app.utils.date_convert import format_datetime
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# A field is a column index or row attribute name, an (index or attribute,
+# converter) pair, or a callable that receives the whole row.
+FieldSpec = Union[int, str, tuple, Callable[[Any], Any]]
+
+
+def _accessor(source):
+    return itemgetter(source) if isinstance(source, int) else attrgetter(source)
+
+
+def _converted(access, converter):
+    return lambda row: converter(access(row))
+
+
+def compile_row_mapper(fields: Dict[str, FieldSpec]) -> Callable[[Any], dict]:
+    # Resolves the field spec once into (name, getter) pairs, so mapping a row
+    # is one comprehension over prebuilt getters instead of re-reading the spec.
+    getters = []
+    for name, spec in fields.items():
+        if isinstance(spec, (int, str)):
+            getter = _accessor(spec)
+        elif isinstance(spec, tuple):
+            source, converter = spec
+            getter = _converted(_accessor(source), converter)
+        else:
+            getter = spec
+        getters.append((name, getter))
+    getters = tuple(getters)
+
+    def map_row(row):
+        return {name: getter(row) for name, getter in getters}
+
+    return map_row
+
+
+def _default(value):
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, datetime):
+        return format_datetime(value)
+    if isinstance(value, date):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+if orjson is not None:
+    def dumps(content: Any) -> bytes:
+        return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_OMIT_MICROSECONDS)
+else:
+    def dumps(content: Any) -> bytes:
+        return json.dumps(content, default=_default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class FastJSONResponse(Response):
+    # For trusted rows from the database: returning this from a route skips the
+    # response_model validation pass, which stays on the route for the docs.
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
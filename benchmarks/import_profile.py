@@ -0,0 +1,88 @@
+"""Report where application import time goes.
+
+    python -m benchmarks.import_profile --top 25
+    python -m benchmarks.import_profile --json > import-profile.json
+
+Imports the app (app.config by default) in a fresh interpreter with
+-X importtime and aggregates the result, so the numbers match a worker's cold
+start. Run it before and after a change to see what moved.
+"""
+import argparse
+import json
+import subprocess
+import sys
+
+
+def collect(module):
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+    )
+    entries = []
+    errors = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:"):
+            errors.append(line)
+            continue
+        fields = line[len("import time:"):].split("|")
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            continue
+        name = fields[2].rstrip()
+        entries.append({
+            "module": name.strip(),
+            "depth": (len(name) - len(name.lstrip())) // 2,
+            "self_us": int(fields[0]),
+            "cumulative_us": int(fields[1]),
+        })
+    return entries, result.returncode, errors
+
+
+def by_package(entries):
+    packages = {}
+    for entry in entries:
+        package = entry["module"].split(".")[0]
+        packages[package] = packages.get(package, 0) + entry["self_us"]
+    return sorted(packages.items(), key=lambda item: -item[1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--module", default="app.config")
+    parser.add_argument("--top", type=int, default=20)
+    parser.add_argument("--json", action="store_true", help="print the full profile as JSON")
+    args = parser.parse_args()
+
+    entries, returncode, errors = collect(args.module)
+    total = sum(entry["self_us"] for entry in entries)
+    app_modules = [entry for entry in entries if entry["module"].split(".")[0] == "app"]
+
+    if args.json:
+        print(json.dumps({
+            "module": args.module,
+            "ok": returncode == 0,
+            "total_us": total,
+            "packages": dict(by_package(entries)),
+            "modules": entries,
+        }, indent=2))
+        return returncode
+
+    if returncode != 0:
+        print(f"import {args.module} failed; timings cover the modules loaded before the error")
+        print("\n".join(errors[-5:]))
+        print()
+
+    print(f"{len(entries)} modules, {total / 1000:.1f} ms total self time\n")
+    print("Slowest modules (cumulative):")
+    for entry in sorted(entries, key=lambda e: -e["cumulative_us"])[:args.top]:
+        print(f"  {entry['cumulative_us'] / 1000:9.1f} ms  {entry['self_us'] / 1000:8.1f} ms self  {entry['module']}")
+    print("\nBy top-level package (self):")
+    for package, self_us in by_package(entries)[:args.top]:
+        print(f"  {self_us / 1000:9.1f} ms  {package}")
+    if app_modules:
+        print(f"\napp modules: {sum(e['self_us'] for e in app_modules) / 1000:.1f} ms self")
+    return returncode
+
+
+if __name__ == "__main__":
+    sys.exit(main())
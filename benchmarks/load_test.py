@@ -0,0 +1,327 @@
+"""Load-test the API in-process against a seeded SQLite database.
+
+    python -m benchmarks.load_test --scale small --duration 30 --concurrency 8
+    python -m benchmarks.load_test --mix browse=6,checkout=4 --json > after.json
+    python -m benchmarks.load_test --compare before.json
+
+The app runs in this process behind httpx's ASGI transport (httpx is needed),
+so timings cover routing, validation, SQL and serialization but no network.
+Virtual users pick weighted scenarios until the duration is up; each endpoint
+reports throughput, p50/p95/p99 latency, and the SQL statements and DB time
+per request from the app's X-DB-* debug headers. The database is seeded once
+per scale and reused; pass --reseed after schema or seed changes.
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+from app.database.seed import SCALES
+
+SCENARIO_WEIGHTS = {"browse": 60, "cart": 20, "checkout": 10, "admin": 10}
+SEARCH_TERMS = ["Pro", "Classic", "Slim", "Eco", "Smart", "Vintage"]
+PASSWORD = "password"
+
+def percentile(ordered, fraction):
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, max(0, int(round(fraction * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+
+class Recorder:
+    def __init__(self):
+        self.samples = {}
+        self.recording = False
+
+    def add(self, endpoint, seconds, status_code, queries, db_ms):
+        if self.recording:
+            self.samples.setdefault(endpoint, []).append((seconds, status_code, queries, db_ms))
+
+    def summary(self, elapsed):
+        endpoints = {}
+        everything = []
+        for endpoint, samples in sorted(self.samples.items()):
+            endpoints[endpoint] = self._stats(samples, elapsed)
+            everything.extend(samples)
+        return {"total": self._stats(everything, elapsed), "endpoints": endpoints}
+
+    @staticmethod
+    def _stats(samples, elapsed):
+        latencies = sorted(sample[0] for sample in samples)
+        queries = [sample[2] for sample in samples]
+        count = len(samples)
+        return {
+            "requests": count,
+            "errors": sum(1 for sample in samples if sample[1] >= 400),
+            "rps": round(count / elapsed, 2) if elapsed else 0.0,
+            "p50_ms": round(percentile(latencies, 0.50) * 1000, 2),
+            "p95_ms": round(percentile(latencies, 0.95) * 1000, 2),
+            "p99_ms": round(percentile(latencies, 0.99) * 1000, 2),
+            "max_ms": round(latencies[-1] * 1000, 2) if latencies else 0.0,
+            "queries_per_request": round(sum(queries) / count, 2) if count else 0.0,
+            "max_queries": max(queries) if queries else 0,
+            "db_ms_per_request": round(sum(sample[3] for sample in samples) / count, 2) if count else 0.0,
+        }
+
+
+class Session:
+    # One virtual user; admin scenarios send the admin token, the rest shop as a user
+    def __init__(self, client, recorder, user_token, admin_token, rng, catalog):
+        self.client = client
+        self.recorder = recorder
+        self.user_headers = {"Authorization": f"Bearer {user_token}"}
+        self.admin_headers = {"Authorization": f"Bearer {admin_token}"}
+        self.rng = rng
+        self.catalog = catalog
+
+    async def call(self, method, endpoint, json_body=None, params=None, as_admin=False, **path):
+        started = time.perf_counter()
+        response = await self.client.request(
+            method, endpoint.format(**path), json=json_body, params=params,
+            headers=self.admin_headers if as_admin else self.user_headers,
+        )
+        elapsed = time.perf_counter() - started
+        self.recorder.add(
+            f"{method} {endpoint}", elapsed, response.status_code,
+            int(response.headers.get("x-db-queries", 0)), float(response.headers.get("x-db-time-ms", 0)),
+        )
+        return response
+
+    def product(self):
+        return self.rng.choice(self.catalog["products"])
+
+
+async def browse(session):
+    product_id, _ = session.product()
+    await session.call("GET", "/api/products", params={"view": "summary"})
+    await session.call("GET", "/api/products/search", params={"q": session.rng.choice(SEARCH_TERMS)})
+    await session.call("GET", "/api/products/{productId}", productId=product_id)
+    await session.call("GET", "/api/products/{product_id}/reviews", product_id=product_id)
+    await session.call(
+        "GET", "/api/categories/{categoryId}/products", categoryId=session.rng.choice(session.catalog["categories"])
+    )
+
+
+async def cart(session):
+    for _ in range(session.rng.randint(1, 3)):
+        product_id, _ = session.product()
+        await session.call("POST", "/api/cart", json_body={"product_id": product_id, "quantity": session.rng.randint(1, 3)})
+    await session.call("GET", "/api/cart")
+
+
+async def checkout(session):
+    response = await session.call("GET", "/api/cart")
+    cart_items = response.json() if response.status_code == 200 else []
+    if not cart_items:
+        await cart(session)
+        response = await session.call("GET", "/api/cart")
+        cart_items = response.json() if response.status_code == 200 else []
+    prices = dict(session.catalog["products"])
+    items = [
+        {"product_id": item["product_id"], "quantity": item["quantity"], "price": prices.get(item["product_id"], 0.0)}
+        for item in cart_items
+    ]
+    if not items:
+        return
+    total = round(sum(item["price"] * item["quantity"] for item in items), 2)
+    response = await session.call("POST", "/api/orders", json_body={"total_amount": total, "items": items})
+    if response.status_code == 200:
+        await session.call("POST", "/api/payments", json_body={
+            "order_id": response.json()["order_id"], "amount": total,
+            "payment_method": "card", "payment_status": "Completed",
+        })
+    for item in cart_items:
+        await session.call("DELETE", "/api/cart/{cart_item_id}", cart_item_id=item["cart_item_id"])
+
+
+async def admin(session):
+    for endpoint in (
+        "/api/admin/reports/sales-report",
+        "/api/admin/reports/orders-report",
+        "/api/admin/reports/users-report",
+        "/api/admin/reports/visitors",
+        "/api/admin/reports/sales",
+        "/api/inventory/low-stock",
+    ):
+        await session.call("GET", endpoint, as_admin=True)
+
+
+SCENARIOS = {
+    "browse": browse,
+    "cart": cart,
+    "checkout": checkout,
+    "admin": admin,
+}
+
+
+def parse_mix(text):
+    weights = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in SCENARIOS:
+            raise argparse.ArgumentTypeError(f"unknown scenario {name!r}; expected one of {', '.join(SCENARIOS)}")
+        weights[name] = int(weight or 1)
+    return weights
+
+
+def prepare_database(path, counts, reseed):
+    from app.auth.services import get_password_hash
+    from app.database.migrate import migrate
+    from app.database.seed import seed
+    from app.services.dbServices import open_connection
+
+    if reseed:
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)
+    conn = open_connection()
+    try:
+        migrate(conn)
+        cursor = conn.cursor()
+        cursor.execute("SELECT COUNT(*) FROM Users")
+        if not cursor.fetchone()[0]:
+            started = time.perf_counter()
+            seed(conn, counts, get_password_hash(PASSWORD))
+            print(f"Seeded {path} in {time.perf_counter() - started:.1f}s", file=sys.stderr)
+        cursor.execute("SELECT productId, price FROM Products")
+        products = [(row[0], float(row[1])) for row in cursor.fetchall()]
+        cursor.execute("SELECT categoryId FROM Categories")
+        categories = [row[0] for row in cursor.fetchall()]
+        cursor.execute("SELECT TOP 1000 email FROM Users ORDER BY userId")
+        emails = [row[0] for row in cursor.fetchall()]
+        cursor.close()
+    finally:
+        conn.close()
+    return {"products": products, "categories": categories, "emails": emails}
+
+
+async def login(client, endpoint, email):
+    response = await client.post(endpoint, json={"email": email, "password": PASSWORD})
+    response.raise_for_status()
+    return response.json()["access_token"]
+
+
+async def virtual_user(session, weights, deadline):
+    names = list(weights)
+    chances = [weights[name] for name in names]
+    while time.perf_counter() < deadline:
+        await SCENARIOS[session.rng.choices(names, chances)[0]](session)
+
+
+async def run(args, catalog):
+    import httpx
+
+    from app.config import app
+
+    recorder = Recorder()
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://loadtest") as client:
+            admin_token = await login(client, "/api/admin/auth/login", "admin@example.com")
+            user_emails = catalog["emails"][:args.concurrency] or ["admin@example.com"]
+            user_tokens = [await login(client, "/api/auth/login", email) for email in user_emails]
+
+            sessions = [
+                Session(client, recorder, user_tokens[index % len(user_tokens)], admin_token,
+                        random.Random(args.seed + index), catalog)
+                for index in range(args.concurrency)
+            ]
+
+            if args.warmup > 0:
+                deadline = time.perf_counter() + args.warmup
+                await asyncio.gather(*(virtual_user(session, args.mix, deadline) for session in sessions))
+
+            recorder.recording = True
+            started = time.perf_counter()
+            deadline = started + args.duration
+            await asyncio.gather(*(virtual_user(session, args.mix, deadline) for session in sessions))
+            elapsed = time.perf_counter() - started
+            recorder.recording = False
+    return recorder.summary(elapsed), elapsed
+
+
+def print_report(result, baseline=None):
+    base = (baseline or {}).get("endpoints", {})
+    print(f"{'endpoint':<52} {'reqs':>6} {'err':>4} {'rps':>8} {'p50':>8} {'p95':>8} {'p99':>8} {'q/req':>6} {'db ms':>7}")
+    rows = list(result["endpoints"].items()) + [("TOTAL", result["total"])]
+    for endpoint, stats in rows:
+        line = (
+            f"{endpoint[:52]:<52} {stats['requests']:>6} {stats['errors']:>4} {stats['rps']:>8.1f} "
+            f"{stats['p50_ms']:>8.1f} {stats['p95_ms']:>8.1f} {stats['p99_ms']:>8.1f} {stats['queries_per_request']:>6.1f} {stats['db_ms_per_request']:>7.2f}"
+        )
+        previous = base.get(endpoint) if endpoint != "TOTAL" else (baseline or {}).get("total")
+        if previous and previous["p95_ms"]:
+            line += f"  p95 {(stats['p95_ms'] / previous['p95_ms'] - 1) * 100:+.0f}%"
+            if stats["queries_per_request"] != previous["queries_per_request"]:
+                line += f"  q/req was {previous['queries_per_request']:.2f}"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scale", choices=sorted(SCALES), default="small")
+    for table in ("products", "users", "orders"):
+        parser.add_argument(f"--{table}", type=int, default=None, help=f"override the seeded {table} count")
+    parser.add_argument("--db", default=None, help="SQLite file; defaults to one per data size in the temp dir")
+    parser.add_argument("--reseed", action="store_true", help="drop and regenerate the database first")
+    parser.add_argument("--duration", type=float, default=20.0, help="measured seconds")
+    parser.add_argument("--warmup", type=float, default=3.0, help="unmeasured seconds before the run")
+    parser.add_argument("--concurrency", type=int, default=8, help="virtual users")
+    parser.add_argument("--mix", type=parse_mix, default=dict(SCENARIO_WEIGHTS),
+                        help="scenario weights, e.g. browse=6,cart=2,checkout=1,admin=1")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", action="store_true", help="print the results as JSON")
+    parser.add_argument("--compare", default=None, help="a previous --json result to diff against")
+    args = parser.parse_args()
+
+    counts = dict(SCALES[args.scale])
+    for table in ("products", "users", "orders"):
+        counts[table] = getattr(args, table) or counts[table]
+    path = args.db or os.path.join(
+        tempfile.gettempdir(), f"vendo-load-{counts['users']}u-{counts['products']}p-{counts['orders']}o.sqlite3"
+    )
+
+    # Must be set before the app is imported; the benchmark never touches SQL Server
+    os.environ["DATABASE_BACKEND"] = "sqlite"
+    os.environ["SQLITE_PATH"] = path
+    os.environ["SCHEMA_MARKER_PATH"] = path + ".version"
+    # Per-request statement counts and DB time come back as X-DB-* headers
+    os.environ["QUERY_STATS"] = "on"
+    os.environ["DEBUG"] = "1"
+    os.environ.setdefault("JWT_SECRET_KEY", "load-test")
+    os.environ.setdefault("ALGORITHM", "HS256")
+    os.environ.setdefault("ACCESS_TOKEN_EXPIRE_MINUTES", "60")
+    os.environ.setdefault("REFRESH_TOKEN_EXPIRE_DAYS", "1")
+
+    # The routes print as they go; keep stdout for the report
+    with contextlib.redirect_stdout(sys.stderr):
+        catalog = prepare_database(path, counts, args.reseed)
+        result, elapsed = asyncio.run(run(args, catalog))
+    result = {
+        "config": {
+            "scale": args.scale, "counts": counts, "duration": round(elapsed, 2),
+            "concurrency": args.concurrency, "mix": args.mix, "seed": args.seed,
+        },
+        **result,
+    }
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    if args.json:
+        print(json.dumps(result, indent=2))
+    else:
+        print_report(result, baseline)
+    return 1 if result["total"]["errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,136 @@
+"""Compare the per-route JSON paths for a large product listing.
+
+    python -m benchmarks.serialization_bench --rows 10000 --repeat 5
+
+Rows are synthetic, so no database is needed. The validated paths decode
+"SELECT p.*" tuples by position as the routes used to; the mapped paths read
+PRODUCT_DETAIL / PRODUCT_SUMMARY projection rows.
+"""
+import argparse
+import json
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+from typing import List
+
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+
+from app.products.schemas import ProductResponse
+from app.products.services import PRODUCT_DETAIL, PRODUCT_SUMMARY, product_detail, product_summary
+from app.utils.date_convert import format_datetime
+from app.utils.serialization import dumps, orjson
+
+
+def make_rows(count):
+    created = datetime(2024, 1, 1, 9, 30)
+    return [
+        {
+            "id": i, "name": f"Product {i}", "description": "A reasonably long product description " * 4,
+            "price": Decimal("19.99") + i, "category_id": i % 40,
+            "image_url": f"https://cdn.example.com/products/{i}.jpg",
+            "created_at": created + timedelta(minutes=i), "updated_at": created + timedelta(hours=i),
+            "review_count": i % 50, "rating_sum": (i % 50) * 4,
+            "rating_1": 1, "rating_2": 2, "rating_3": 3, "rating_4": 4, "rating_5": i % 40,
+        }
+        for i in range(count)
+    ]
+
+
+def positional(rows):
+    order = [
+        "id", "name", "description", "price", "category_id", "image_url", "created_at", "updated_at",
+        "review_count", "rating_sum", "rating_1", "rating_2", "rating_3", "rating_4", "rating_5",
+    ]
+    return [tuple(row[field] for field in order) for row in rows]
+
+
+def projected(rows, projection):
+    return [tuple(row[field] for field in projection.fields) for row in rows]
+
+
+def legacy_rating_summary(row, offset):
+    count = row[offset] or 0
+    return {
+        "rating_count": count,
+        "rating_average": round(row[offset + 1] / count, 2) if count else None,
+        "rating_histogram": [row[offset + 2 + i] or 0 for i in range(5)],
+    }
+
+
+def hand_built(rows):
+    return [
+        {
+            "id": product[0],
+            "name": product[1],
+            "description": product[2],
+            "price": product[3],
+            "category_id": product[4],
+            "image_url": product[5],
+            "created_at": format_datetime(product[6]),
+            "updated_at": format_datetime(product[7]),
+            **legacy_rating_summary(product, 8),
+        }
+        for product in rows
+    ]
+
+
+adapter = TypeAdapter(List[ProductResponse])
+
+
+def validated_stdlib(rows):
+    # FastAPI before dump_json: validate, jsonable_encoder, json.dumps
+    content = jsonable_encoder(adapter.validate_python(hand_built(rows)))
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def validated_dump_json(rows):
+    # Current FastAPI: validate, then serialize through pydantic-core
+    return adapter.dump_json(adapter.validate_python(hand_built(rows)))
+
+
+def mapped_detail(rows):
+    return dumps([product_detail(PRODUCT_DETAIL.row(row)) for row in rows])
+
+
+def mapped_summary(rows):
+    return dumps([product_summary(PRODUCT_SUMMARY.row(row)) for row in rows])
+
+
+ENCODER = "orjson" if orjson is not None else "stdlib json"
+
+# name -> (path, input builder)
+PATHS = {
+    "validated + stdlib json": (validated_stdlib, positional),
+    "validated + dump_json": (validated_dump_json, positional),
+    f"detail rows + {ENCODER}": (mapped_detail, lambda rows: projected(rows, PRODUCT_DETAIL)),
+    f"summary rows + {ENCODER}": (mapped_summary, lambda rows: projected(rows, PRODUCT_SUMMARY)),
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    source = make_rows(args.rows)
+    baseline = None
+    for name, (path, build) in PATHS.items():
+        rows = build(source)
+        path(rows)
+        timings = []
+        for _ in range(args.repeat):
+            started = time.perf_counter()
+            body = path(rows)
+            timings.append(time.perf_counter() - started)
+        best = min(timings)
+        baseline = baseline or best
+        print(
+            f"{name:<28} {best * 1000:8.1f} ms  {args.rows / best:10.0f} rows/s  "
+            f"{len(body) / 1024:8.0f} KiB  x{baseline / best:.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()